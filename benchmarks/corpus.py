@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Corpora of records used by the benchmarks.
+
+Two kinds of corpora are available: synthetic HEP records of configurable
+size, and the MARCXML and JSON snippets used as fixtures in ``tests/``.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import ast
+import os
+import random
+from xml.sax.saxutils import escape
+
+from six import string_types
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests')
+
+FIXTURE_RULE_SETS = {
+    'test_cds.py': 'cds2hep_marc',
+    'test_common.py': 'hep',
+    'test_conferences.py': 'conferences',
+    'test_data.py': 'data',
+    'test_experiments.py': 'experiments',
+    'test_hepnames.py': 'hepnames',
+    'test_institutions.py': 'institutions',
+    'test_jobs.py': 'jobs',
+    'test_journals.py': 'journals',
+}
+
+SIZES = {
+    'small': {'authors': 5, 'references': 20, 'documents': 1},
+    'medium': {'authors': 100, 'references': 200, 'documents': 2},
+    'large': {'authors': 1000, 'references': 800, 'documents': 5},
+    'review': {'authors': 10, 'references': 2000, 'documents': 1},
+    'collaboration': {'authors': 3000, 'references': 50, 'documents': 1},
+}
+
+JOURNALS = ['Phys.Rev.', 'Phys.Lett.', 'Nucl.Phys.', 'JHEP', 'Eur.Phys.J.']
+
+AFFILIATIONS = ['CERN', 'Fermilab', 'DESY', 'SLAC', 'KEK', 'Beijing, Inst. High Energy Phys.']
+
+
+def synthetic_marcxml(recid, authors=100, references=200, documents=2, seed=None):
+    """Generate the MARCXML of a realistic HEP record.
+
+    Args:
+        recid(int): the control number of the record.
+        authors(int): the number of authors, the first one in ``100`` and
+            the others in ``700``.
+        references(int): the number of ``999C5`` references.
+        documents(int): the number of ``FFT`` documents.
+        seed: the seed of the random generator, for reproducible records.
+
+    Returns:
+        str: a string containing MARCXML.
+
+    """
+    rng = random.Random(recid if seed is None else seed)
+
+    fields = [
+        _controlfield('001', recid),
+        _controlfield('005', '20171011194718.0'),
+        _datafield('037', [('9', 'arXiv'), ('a', 'arXiv:1710.{:05d}'.format(recid % 100000)), ('c', 'hep-ph')]),
+        _datafield('245', [('a', 'Synthetic record number {}'.format(recid)), ('9', 'arXiv')]),
+        _datafield('269', [('c', '2017-10-11')]),
+        _datafield('520', [('9', 'arXiv'), ('a', 'An abstract. ' * 20)]),
+        _datafield('65017', [('2', 'arXiv'), ('a', 'hep-ph')]),
+        _datafield('65017', [('2', 'INSPIRE'), ('a', 'Phenomenology-HEP')]),
+    ]
+
+    for position in range(authors):
+        tag = '100' if position == 0 else '700'
+        fields.append(_datafield(tag, [
+            ('a', 'Author{}, A.{}'.format(position, chr(ord('A') + position % 26))),
+            ('i', 'INSPIRE-{:08d}'.format(position)),
+            ('j', 'ORCID:0000-0002-{:04d}-{:04d}'.format(position // 10000, position % 10000)),
+            ('u', rng.choice(AFFILIATIONS)),
+            ('x', str(1000000 + position)),
+            ('y', '1'),
+        ]))
+
+    for position in range(references):
+        journal = rng.choice(JOURNALS)
+        fields.append(_datafield('999', [
+            ('0', str(rng.randint(1, 1600000))),
+            ('h', 'Author{}, A.'.format(position)),
+            ('o', str(position + 1)),
+            ('r', 'arXiv:hep-ph/{:07d}'.format(rng.randint(0, 9999999))),
+            ('s', '{},{},{}'.format(journal, rng.randint(1, 99), rng.randint(1, 9999))),
+            ('y', str(rng.randint(1970, 2017))),
+            ('x', '[{}] Author{}, A., {} {} ({})'.format(position + 1, position, journal, position, 2000)),
+        ], ind1='C', ind2='5'))
+
+    for position in range(documents):
+        fields.append(_datafield('FFT', [
+            ('a', '/opt/cds-invenio/var/tmp/{}/document{}.pdf'.format(recid, position)),
+            ('d', 'Fulltext'),
+            ('f', '.pdf'),
+            ('n', 'document{}'.format(position)),
+            ('t', 'Main' if position == 0 else 'Supplementary material'),
+        ]))
+
+    fields.extend([
+        _datafield('980', [('a', 'HEP')]),
+        _datafield('980', [('a', 'Citeable')]),
+        _datafield('980', [('a', 'CORE')]),
+    ])
+
+    return u'<record>{}</record>'.format(u''.join(fields))
+
+
+def synthetic_corpus(size='medium', count=10):
+    """Generate a list of synthetic MARCXML records of a given size.
+
+    Args:
+        size(str): one of the keys of ``SIZES``.
+        count(int): the number of records.
+
+    Returns:
+        list: a list of strings containing MARCXML.
+
+    """
+    return [synthetic_marcxml(recid, **SIZES[size]) for recid in range(1, count + 1)]
+
+
+def fixture_corpus(tests_dir=TESTS_DIR):
+    """Collect the MARCXML snippets used as fixtures in the tests.
+
+    The snippets are the string literals assigned to a variable called
+    ``snippet``; which rule set they are meant for is inferred from the
+    name of the test module.
+
+    Args:
+        tests_dir(str): the directory of the tests.
+
+    Returns:
+        dict: a dictionary from the name of a rule set to the list of
+        MARCXML strings to convert with it.
+
+    """
+    result = {}
+
+    for filename in sorted(os.listdir(tests_dir)):
+        if filename.startswith('test_hep_'):
+            rule_set = 'hep'
+        else:
+            rule_set = FIXTURE_RULE_SETS.get(filename)
+        if rule_set is None:
+            continue
+
+        with open(os.path.join(tests_dir, filename), 'rb') as fd:
+            tree = ast.parse(fd.read(), filename)
+
+        for snippet in _iter_snippets(tree):
+            if isinstance(snippet, string_types):
+                result.setdefault(rule_set, []).append(_as_record(snippet))
+
+    return result
+
+
+def _iter_snippets(tree):
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Assign):
+            continue
+        if not any(isinstance(target, ast.Name) and target.id == 'snippet' for target in node.targets):
+            continue
+        try:
+            yield ast.literal_eval(node.value)
+        except ValueError:
+            continue
+
+
+def _as_record(snippet):
+    snippet = snippet.strip()
+    if snippet.startswith('<record'):
+        return snippet
+    return u'<record>{}</record>'.format(snippet)
+
+
+def _controlfield(tag, value):
+    return u'<controlfield tag="{}">{}</controlfield>'.format(tag, value)
+
+
+def _datafield(tag, subfields, ind1=' ', ind2=' '):
+    return u'<datafield tag="{}" ind1="{}" ind2="{}">{}</datafield>'.format(
+        tag, ind1, ind2, u''.join(
+            u'<subfield code="{}">{}</subfield>'.format(code, escape(value))
+            for code, value in subfields
+        ),
+    )
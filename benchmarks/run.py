@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Measure the throughput and peak memory of the conversions.
+
+Usage::
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --compare results.json
+
+Every benchmark converts a corpus ``--repeat`` times and reports the best
+throughput in records per second, and the peak memory allocated while
+converting it once more with ``tracemalloc`` (on Python 3 only). The time
+it takes to import the package in a new interpreter is measured as well,
+reported as imports per second. With
+``--compare``, the results are compared to those of a previous run, and
+the exit status is non-zero if any benchmark got slower than
+``--threshold``.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import datetime
+import json
+import platform
+import re
+import subprocess
+import sys
+import timeit
+from collections import OrderedDict
+from functools import partial
+
+from flask import Flask
+
+from dojson.contrib.marc21.utils import create_record
+
+from inspire_dojson.api import RULE_SETS, marcxml2record, record2marcxml
+from inspire_dojson.cache import MemoryCache
+
+from .corpus import SIZES, fixture_corpus, synthetic_corpus
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+# Records with thousands of references or authors take their own code
+# paths, so they are always measured.
+EXTRA_SIZES = ('review', 'collaboration')
+EXTRA_COUNT = 2
+
+CONFIG = {
+    'SERVER_NAME': 'localhost:5000',
+    'LEGACY_BASE_URL': 'http://inspirehep.net',
+}
+
+JSON_RULE_SETS = {
+    'hep2marc': 'hep',
+    'hepnames2marc': 'hepnames',
+}
+
+
+def measure(func, inputs, repeat=3):
+    """Measure the throughput and peak memory of a function.
+
+    Args:
+        func: a callable taking a single record.
+        inputs(list): the records to pass to ``func``.
+        repeat(int): how many times to time the whole list.
+
+    Returns:
+        dict: the number of records, the best time in seconds to process
+        all of them, the corresponding records per second and the peak
+        memory in bytes, or ``None`` if it can't be measured.
+
+    """
+    timings = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        for el in inputs:
+            func(el)
+        timings.append(timeit.default_timer() - start)
+
+    best = min(timings)
+
+    return {
+        'best_time': best,
+        'peak_memory': _peak_memory(func, inputs),
+        'records': len(inputs),
+        'records_per_second': len(inputs) / best if best else None,
+    }
+
+
+def measure_import(module, repeat=3):
+    """Measure how long it takes to import a module in a new interpreter.
+
+    Args:
+        module(str): the name of the module.
+        repeat(int): how many interpreters to start.
+
+    Returns:
+        dict: the same statistics as :func:`measure`, where importing the
+        module once counts as one record.
+
+    """
+    script = (
+        'import timeit\n'
+        'start = timeit.default_timer()\n'
+        'import {}\n'
+        'print(timeit.default_timer() - start)\n'
+    ).format(module)
+
+    best = min(
+        float(subprocess.check_output([sys.executable, '-c', script]))
+        for _ in range(repeat)
+    )
+
+    return {
+        'best_time': best,
+        'peak_memory': None,
+        'records': 1,
+        'records_per_second': 1 / best if best else None,
+    }
+
+
+def get_benchmarks(size='medium', count=10):
+    """Prepare the benchmarks.
+
+    Inputs that fail to convert, like some of the fixtures that test
+    error handling, are left out of the corpora.
+
+    Args:
+        size(str): the size of the synthetic records, one of ``SIZES``.
+        count(int): the number of synthetic records.
+
+    Returns:
+        OrderedDict: a dictionary from the name of each benchmark to the
+        function to measure and the list of its inputs.
+
+    """
+    benchmarks = OrderedDict()
+
+    synthetic = synthetic_corpus(size, count)
+    fixtures = fixture_corpus()
+    corpora = OrderedDict([
+        ('synthetic-' + size, synthetic),
+        ('fixtures', fixtures.get('hep', [])),
+    ])
+    for extra_size in EXTRA_SIZES:
+        if extra_size != size:
+            corpora['synthetic-' + extra_size] = synthetic_corpus(extra_size, EXTRA_COUNT)
+
+    for corpus_name, marcxmls in corpora.items():
+        marcxmls = _convertible(marcxml2record, marcxmls)
+        records = [marcxml2record(marcxml) for marcxml in marcxmls]
+        records = _convertible(record2marcxml, records)
+
+        benchmarks['marcxml2record[{}]'.format(corpus_name)] = (marcxml2record, marcxmls)
+        benchmarks['record2marcxml[{}]'.format(corpus_name)] = (record2marcxml, records)
+        benchmarks['roundtrip[{}]'.format(corpus_name)] = (_roundtrip, records)
+
+    # Every record is a hit, like in a re-harvest where nothing changed.
+    memory_cache = MemoryCache()
+    for marcxml in synthetic:
+        marcxml2record(marcxml, cache=memory_cache)
+    benchmarks['marcxml2record-cached[synthetic-{}]'.format(size)] = (partial(marcxml2record, cache=memory_cache), synthetic)
+
+    marcjsons = {name: [create_record(marcxml) for marcxml in marcxmls] for name, marcxmls in fixtures.items()}
+    marcjsons['hep'] = [create_record(marcxml) for marcxml in synthetic] + marcjsons.get('hep', [])
+
+    for name, rule_set in RULE_SETS.items():
+        if name in JSON_RULE_SETS:
+            source = RULE_SETS[JSON_RULE_SETS[name]]
+            inputs = [source.do(marcjson) for marcjson in _convertible(source.do, marcjsons.get(JSON_RULE_SETS[name], []))]
+        else:
+            inputs = marcjsons.get(name, [])
+
+        inputs = _convertible(rule_set.do, inputs)
+        if inputs:
+            benchmarks['do[{}]'.format(name)] = (rule_set.do, inputs)
+
+    return benchmarks
+
+
+def run(benchmarks, repeat=3, only=None):
+    """Run the benchmarks.
+
+    Args:
+        benchmarks(dict): the benchmarks returned by :func:`get_benchmarks`.
+        repeat(int): how many times to time each benchmark.
+        only(str): a regular expression that selects the benchmarks to
+            run by name. Defaults to all of them.
+
+    Returns:
+        dict: the metadata of this run and the results of each benchmark.
+
+    """
+    results = OrderedDict()
+    if not only or re.search(only, 'import[inspire_dojson]'):
+        results['import[inspire_dojson]'] = measure_import('inspire_dojson', repeat)
+
+    for name, (func, inputs) in benchmarks.items():
+        if only and not re.search(only, name):
+            continue
+        results[name] = measure(func, inputs, repeat)
+
+    return {
+        'meta': _get_meta(),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Compare the results of two runs.
+
+    Args:
+        baseline(dict): the results of a previous run.
+        current(dict): the results of this run.
+        threshold(float): the relative slowdown above which a benchmark
+            is considered a regression.
+
+    Returns:
+        list: a ``(name, baseline, current, change, regressed)`` tuple for
+        each benchmark present in both runs, where ``change`` is the
+        relative change of the records per second.
+
+    """
+    result = []
+    for name, stats in current['results'].items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['records_per_second'] or not stats['records_per_second']:
+            continue
+
+        change = stats['records_per_second'] / previous['records_per_second'] - 1
+        result.append((
+            name,
+            previous['records_per_second'],
+            stats['records_per_second'],
+            change,
+            change < -threshold,
+        ))
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--size', choices=sorted(SIZES), default='medium',
+                        help='size of the synthetic records')
+    parser.add_argument('--count', type=int, default=10,
+                        help='number of synthetic records')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of timings of each benchmark')
+    parser.add_argument('--only', help='regular expression selecting the benchmarks to run')
+    parser.add_argument('--output', help='file where to store the results as JSON')
+    parser.add_argument('--compare', help='file with the results of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    app.config.update(CONFIG)
+    with app.app_context():
+        results = run(get_benchmarks(args.size, args.count), args.repeat, args.only)
+
+    for name, stats in results['results'].items():
+        print('{:40} {:>6} records {:>12.1f} records/s {!s:>12} bytes'.format(
+            name, stats['records'], stats['records_per_second'] or 0, stats['peak_memory']))
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(results, fd, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fd:
+            baseline = json.load(fd)
+
+        comparison = compare(baseline, results, args.threshold)
+        print()
+        for name, previous, current, change, regressed in comparison:
+            print('{:40} {:>12.1f} -> {:>12.1f} records/s {:>+7.1%}{}'.format(
+                name, previous, current, change, ' REGRESSION' if regressed else ''))
+
+        if any(regressed for _, _, _, _, regressed in comparison):
+            return 1
+
+    return 0
+
+
+def _convertible(func, inputs):
+    result = []
+    for el in inputs:
+        try:
+            func(el)
+        except Exception:
+            continue
+        result.append(el)
+
+    return result
+
+
+def _roundtrip(record):
+    return marcxml2record(record2marcxml(record))
+
+
+def _peak_memory(func, inputs):
+    if tracemalloc is None:
+        return None
+
+    tracemalloc.start()
+    try:
+        for el in inputs:
+            func(el)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _get_meta():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD']).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'date': datetime.datetime.utcnow().isoformat(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+    }
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -24,5 +24,12 @@
 
 from __future__ import absolute_import, division, print_function
 
-from . import common  # noqa: F401
-from .api import marcxml2record, record2marcxml  # noqa: F401
+from .api import (  # noqa: F401
+    marcjson2record_incremental,
+    marcjsons2records,
+    marcxml2record,
+    marcxml2records,
+    preload,
+    record2marcxml,
+    records2marcxml_stream,
+)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Conversions for asyncio applications.
+
+The conversions are CPU-bound, so calling them from a coroutine would block
+the event loop. The coroutines of this module run them on an executor
+instead: the default one of the loop, which is a pool of threads, or any
+:class:`concurrent.futures.Executor`, like a pool of processes. The active
+context is looked up when the coroutine is called, possibly in a Flask app
+context, and passed along to the executor, where no app context exists.
+
+Pools of threads share the rule sets of the process, which are loaded on
+the executor before the first conversion, as the worker processes of
+:func:`inspire_dojson.bulk.bulk_marcxml2records` do.
+
+This module requires Python 3.6 or later.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import asyncio
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from . import api
+from .bulk import ConversionResult
+from .context import get_context
+
+DEFAULT_WINDOW = 16
+
+MARCXML2RECORD_RULE_SETS = (
+    'cds2hep_marc',
+    'conferences',
+    'data',
+    'experiments',
+    'hep',
+    'hepnames',
+    'institutions',
+    'jobs',
+    'journals',
+)
+RECORD2MARCXML_RULE_SETS = ('hep2marc', 'hepnames2marc')
+
+_preloaded = set()
+
+
+async def marcxml2record(marcxml, context=None, executor=None):
+    """Convert a MARCXML string to a JSON record on an executor.
+
+    Args:
+        marcxml(str): a string containing MARCXML.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
+        executor(concurrent.futures.Executor): where to convert the
+            record. Defaults to the default executor of the event loop.
+
+    Returns:
+        dict: a JSON record converted from the string.
+
+    """
+    if context is None:
+        context = get_context()
+
+    loop = asyncio.get_event_loop()
+    await _preload(loop, executor, MARCXML2RECORD_RULE_SETS)
+    return await loop.run_in_executor(executor, partial(api.marcxml2record, marcxml, context=context))
+
+
+async def record2marcxml(record, context=None, executor=None):
+    """Convert a JSON record to a MARCXML string on an executor.
+
+    Args:
+        record(dict): a JSON record.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
+        executor(concurrent.futures.Executor): where to convert the
+            record. Defaults to the default executor of the event loop.
+
+    Returns:
+        str: a MARCXML string converted from the record.
+
+    """
+    if context is None:
+        context = get_context()
+
+    loop = asyncio.get_event_loop()
+    await _preload(loop, executor, RECORD2MARCXML_RULE_SETS)
+    return await loop.run_in_executor(executor, partial(api.record2marcxml, record, context=context))
+
+
+async def bulk_marcxml2records(marcxmls, context=None, executor=None, window=DEFAULT_WINDOW):
+    """Convert many MARCXML strings to JSON records on an executor.
+
+    At most ``window`` records are being converted at any time: the next
+    MARCXML string is taken from ``marcxmls`` only once the oldest result
+    has been consumed, so that a slow consumer does not let the results
+    pile up in memory. As in :func:`inspire_dojson.bulk.bulk_marcxml2records`,
+    an exception raised while converting a record is reported in its
+    result instead of interrupting the conversion of the others.
+
+    Args:
+        marcxmls: an iterable, or an asynchronous iterable, of strings
+            containing MARCXML.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
+        executor(concurrent.futures.Executor): where to convert the
+            records. Defaults to the default executor of the event loop.
+        window(int): the maximum number of records being converted.
+
+    Yields:
+        ConversionResult: the position of the MARCXML string in the
+        input, the converted JSON record and, if the conversion failed,
+        the formatted traceback instead of the record, in input order.
+
+    """
+    if window < 1:
+        raise ValueError('The window must contain at least one record.')
+    if context is None:
+        context = get_context()
+
+    loop = asyncio.get_event_loop()
+    await _preload(loop, executor, MARCXML2RECORD_RULE_SETS)
+    pending = deque()
+    try:
+        index = 0
+        async for marcxml in _aiter(marcxmls):
+            pending.append(loop.run_in_executor(executor, _convert, index, marcxml, context))
+            index += 1
+            if len(pending) >= window:
+                yield await pending.popleft()
+
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def _preload(loop, executor, names):
+    if executor is not None and not isinstance(executor, ThreadPoolExecutor):
+        return
+    if _preloaded.issuperset(names):
+        return
+
+    await loop.run_in_executor(executor, partial(api.preload, *names))
+    _preloaded.update(names)
+
+
+async def _aiter(iterable):
+    if hasattr(iterable, '__aiter__'):
+        async for element in iterable:
+            yield element
+    else:
+        for element in iterable:
+            yield element
+
+
+def _convert(index, marcxml, context):
+    try:
+        return ConversionResult(index, api.marcxml2record(marcxml, context=context), None)
+    except Exception:
+        return ConversionResult(index, None, traceback.format_exc())
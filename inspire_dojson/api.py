@@ -26,21 +26,23 @@ from __future__ import absolute_import, division, print_function
 
 import os
 import re
+from collections import OrderedDict
 from itertools import chain
 
+from lxml import etree
 from lxml.builder import E
-from lxml.etree import tostring
+from lxml.etree import iterparse, tostring
 from six import iteritems, text_type, unichr
 from six.moves import urllib
 
-from dojson.contrib.marc21.utils import create_record
-
-from inspire_dojson.utils import create_record_from_dict, force_single_element
+from inspire_dojson.utils import force_single_element
 from inspire_utils.helpers import force_list
 from inspire_utils.record import get_value
 
+from .cache import make_key
 from .cds import cds2hep_marc
 from .conferences import conferences
+from .context import use_context
 from .data import data
 from .experiments import experiments
 from .hep import hep, hep2marc
@@ -48,6 +50,8 @@ from .hepnames import hepnames, hepnames2marc
 from .institutions import institutions
 from .jobs import jobs
 from .journals import journals
+from .marc import _parse_marcxml, create_marc_record
+from .utils import language_detection, languages
 
 try:
     unichr(0x100000)
@@ -57,13 +61,33 @@ except ValueError:  # pragma: no cover
     RE_INVALID_CHARS_FOR_XML = re.compile(
         u'[^\U00000009\U0000000A\U0000000D\U00000020-\U0000D7FF\U0000E000-\U0000FFFD]+')
 
+try:
+    _is_printable = text_type.isprintable
+except AttributeError:  # pragma: no cover
+    def _is_printable(s):
+        return False
+
+RULE_SETS = OrderedDict([
+    ('cds2hep_marc', cds2hep_marc),
+    ('conferences', conferences),
+    ('data', data),
+    ('experiments', experiments),
+    ('hep', hep),
+    ('hep2marc', hep2marc),
+    ('hepnames', hepnames),
+    ('hepnames2marc', hepnames2marc),
+    ('institutions', institutions),
+    ('jobs', jobs),
+    ('journals', journals),
+])
+
 RECORD = E.record
 CONTROLFIELD = E.controlfield
 DATAFIELD = E.datafield
 SUBFIELD = E.subfield
 
 
-def marcxml2record(marcxml):
+def marcxml2record(marcxml, context=None, cache=None, only=None):
     """Convert a MARCXML string to a JSON record.
 
     Tries to guess which set of rules to use by inspecting the contents
@@ -73,34 +97,236 @@ def marcxml2record(marcxml):
 
     Args:
         marcxml(str): a string containing MARCXML.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
+        cache(Cache): where to look up the record before converting it,
+            and to store it after, see :mod:`inspire_dojson.cache`.
+        only(list): the keys of the record to compute. When given, only
+            the rules and filters needed to compute them are run, and the
+            record contains only those keys.
 
     Returns:
         dict: a JSON record converted from the string.
 
     """
-    marcjson = create_record(marcxml, keep_singletons=False)
-    collections = _get_collections(marcjson)
+    if cache is None:
+        marcjson = create_marc_record(marcxml)
+        with use_context(context):
+            return _marcjson2record(marcjson, only)
+
+    tree = _parse_marcxml(marcxml)
+    key = make_key(_get_conversion_name(only), _serialize_record(tree), context)
+    record = cache.get(key)
+    if record is None:
+        marcjson = create_marc_record(tree)
+        with use_context(context):
+            record = _marcjson2record(marcjson, only)
+        cache.set(key, record)
+
+    return record
+
+
+def marcxml2records(stream, context=None, cache=None, only=None):
+    """Convert a MARCXML collection to JSON records, one record at a time.
+
+    The collection is parsed incrementally, and each ``<record>`` element
+    is discarded as soon as it has been converted, so that memory usage
+    does not depend on the size of the collection. The set of rules to use
+    is chosen for each record as in :func:`marcxml2record`.
+
+    Args:
+        stream: a file object or a path to a file containing a
+            ``<collection>`` of MARCXML records.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
+        cache(Cache): where to look up the records before converting them,
+            and to store them after, see :mod:`inspire_dojson.cache`.
+        only(list): the keys of the records to compute, as in
+            :func:`marcxml2record`.
+
+    Yields:
+        dict: a JSON record converted from each record in the collection.
+
+    """
+    for _, element in iterparse(stream, tag='{*}record'):
+        record = None
+        if cache is not None:
+            key = make_key(_get_conversion_name(only), _serialize_record(element), context)
+            record = cache.get(key)
+
+        if record is None:
+            marcjson = create_marc_record(element)
+
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+        if record is None:
+            with use_context(context):
+                record = _marcjson2record(marcjson, only)
+            if cache is not None:
+                cache.set(key, record)
+
+        yield record
+
+
+def marcjsons2records(marcjsons, context=None, only=None):
+    """Convert MARC records to JSON records, one record at a time.
+
+    The set of rules to use is chosen for each record as in
+    :func:`marcxml2record`.
+
+    Args:
+        marcjsons: an iterable of MARC records, like the ones read by
+            :func:`inspire_dojson.marc.read_iso2709` and
+            :func:`inspire_dojson.marc.read_marc_in_json`.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
+        only(list): the keys of the records to compute, as in
+            :func:`marcxml2record`.
+
+    Yields:
+        dict: a JSON record converted from each MARC record.
+
+    """
+    for marcjson in marcjsons:
+        with use_context(context):
+            record = _marcjson2record(marcjson, only)
+
+        yield record
+
+
+def preload(*names):
+    """Load the rules of some rule sets, and the data they depend on.
+
+    Rules are otherwise loaded the first time a record is converted, so
+    preloading them is useful before forking worker processes, which
+    then share them instead of loading them each.
+
+    Args:
+        names: the names of the rule sets to load, like ``hep`` or
+            ``hepnames``. Defaults to all of them.
+
+    """
+    rule_sets = _get_rule_sets(names)
+
+    for rule_set in rule_sets.values():
+        if rule_set.index is None:
+            rule_set.build()
+
+    if 'hep' in rule_sets:
+        language_detection.preload()
+    if set(rule_sets) & {'cds2hep_marc', 'hep', 'hep2marc'}:
+        languages.preload()
+
+
+def _get_rule_sets(names):
+    if not names:
+        return RULE_SETS
+
+    unknown = set(names) - set(RULE_SETS)
+    if unknown:
+        raise ValueError('Unknown rule sets: {}'.format(', '.join(sorted(unknown))))
+
+    return OrderedDict((name, RULE_SETS[name]) for name in names)
+
+
+def marcjson2record_incremental(old_marcjson, new_marcjson, old_record, context=None, verify=False):
+    """Convert a MARC JSON record by updating the conversion of its previous version.
+
+    Only the rules converting the fields that changed between the two
+    versions, and the rules and filters sharing keys of the output with
+    them, are run again; the other keys are taken from ``old_record``.
+    Records from CDS, and records that moved to another collection, are
+    converted in full.
+
+    Args:
+        old_marcjson: the previous version of the record, as returned by
+            :func:`inspire_dojson.marc.create_marc_record`.
+        new_marcjson: the current version of the record.
+        old_record(dict): the conversion of ``old_marcjson``.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
+        verify(bool): whether to also convert ``new_marcjson`` in full,
+            and check that the two conversions are equal.
+
+    Returns:
+        dict: a JSON record converted from ``new_marcjson``.
 
-    if _is_from_cds(marcjson):
-        return hep.do(create_record_from_dict(cds2hep_marc.do(marcjson)))
+    Raises:
+        ValueError: when ``verify`` is set and the two conversions differ.
+
+    """
+    name = _get_rule_set_name(new_marcjson)
+
+    with use_context(context):
+        if name == 'cds2hep_marc' or name != _get_rule_set_name(old_marcjson):
+            return _marcjson2record(new_marcjson)
+
+        record = RULE_SETS[name].do_incremental(old_marcjson, new_marcjson, old_record)
+        if verify:
+            expected = _marcjson2record(new_marcjson)
+            if record != expected:
+                keys = sorted(
+                    key for key in set(record) | set(expected)
+                    if record.get(key) != expected.get(key)
+                )
+                raise ValueError(u'Incremental conversion differs in: {}'.format(', '.join(keys)))
+
+    return record
+
+
+def _marcjson2record(marcjson, only=None):
+    name = _get_rule_set_name(marcjson)
+
+    if name == 'cds2hep_marc':
+        return hep.do_marc(cds2hep_marc.do(marcjson), only=only)
+    return RULE_SETS[name].do(marcjson, only=only)
+
+
+def _get_conversion_name(only):
+    if only is None:
+        return 'marcxml2record'
+    return 'marcxml2record:{}'.format(','.join(sorted(only)))
+
+
+def _serialize_record(node):
+    # Records are cached by the serialization of their ``<record>``
+    # element, which is the same whether they were converted alone or as
+    # part of a collection.
+    if not isinstance(node, etree._Element):
+        node = node.getroot()
+    if etree.QName(node).localname != 'record':
+        node = next(node.iter('{*}record'), node)
+
+    return tostring(node, with_tail=False)
+
+
+def _get_rule_set_name(marcjson):
+    return _get_rule_set_name_from_collections(_get_collections(marcjson), _is_from_cds(marcjson))
+
+
+def _get_rule_set_name_from_collections(collections, is_from_cds):
+    if is_from_cds:
+        return 'cds2hep_marc'
     elif 'conferences' in collections:
-        return conferences.do(marcjson)
+        return 'conferences'
     elif 'data' in collections:
-        return data.do(marcjson)
+        return 'data'
     elif 'experiment' in collections:
-        return experiments.do(marcjson)
+        return 'experiments'
     elif 'hepnames' in collections:
-        return hepnames.do(marcjson)
+        return 'hepnames'
     elif 'institution' in collections:
-        return institutions.do(marcjson)
+        return 'institutions'
     elif 'job' in collections or 'jobhidden' in collections:
-        return jobs.do(marcjson)
+        return 'jobs'
     elif 'journals' in collections or 'journalsnew' in collections:
-        return journals.do(marcjson)
-    return hep.do(marcjson)
+        return 'journals'
+    return 'hep'
 
 
-def record2marcxml(record):
+def record2marcxml(record, context=None):
     """Convert a JSON record to a MARCXML string.
 
     Deduces which set of rules to use by parsing the ``$schema`` key, as
@@ -108,40 +334,118 @@ def record2marcxml(record):
 
     Args:
         record(dict): a JSON record.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
 
     Returns:
         str: a MARCXML string converted from the record.
 
     """
+    with use_context(context):
+        marcjson = _record2marcjson(record)
+
+    record = RECORD()
+
+    for tag, ind1, ind2, value in _get_fields(marcjson):
+        if ind1 is None:
+            record.append(CONTROLFIELD(_strip_invalid_chars_for_xml(value), {'tag': tag}))
+        else:
+            datafield = DATAFIELD({'tag': tag, 'ind1': ind1, 'ind2': ind2})
+            for code, el in value:
+                datafield.append(SUBFIELD(_strip_invalid_chars_for_xml(el), {'code': code}))
+            record.append(datafield)
+
+    return tostring(record, encoding='utf8', pretty_print=True)
+
+
+def records2marcxml_stream(records, stream, pretty_print=False, context=None):
+    """Write JSON records to a stream as a MARCXML collection.
+
+    Unlike :func:`record2marcxml`, no XML tree is built: the MARCXML of
+    each record is escaped and written directly to the stream, so that
+    collections of any size can be exported in constant memory.
+
+    Args:
+        records: an iterable of JSON records.
+        stream: a binary file object.
+        pretty_print(bool): whether to indent the MARCXML like
+            :func:`record2marcxml` does.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context, see :mod:`inspire_dojson.context`.
+
+    """
+    newline = u'\n' if pretty_print else u''
+
+    stream.write((u'<collection>' + newline).encode('utf8'))
+    for record in records:
+        with use_context(context):
+            marcjson = _record2marcjson(record)
+        chunks = _marcjson2marcxml_chunks(marcjson, pretty_print, 1)
+        stream.write(u''.join(chunks).encode('utf8'))
+    stream.write((u'</collection>' + newline).encode('utf8'))
+
+
+def _record2marcjson(record):
     schema_name = _get_schema_name(record)
 
     if schema_name == 'hep':
-        marcjson = hep2marc.do(record)
+        return hep2marc.do(record)
     elif schema_name == 'authors':
-        marcjson = hepnames2marc.do(record)
-    else:
-        raise NotImplementedError(u'JSON -> MARC rules missing for "{}"'.format(schema_name))
+        return hepnames2marc.do(record)
+    raise NotImplementedError(u'JSON -> MARC rules missing for "{}"'.format(schema_name))
 
-    record = RECORD()
 
+def _get_fields(marcjson):
     for key, values in sorted(iteritems(marcjson)):
         tag, ind1, ind2 = _parse_key(key)
         if _is_controlfield(tag, ind1, ind2):
             value = force_single_element(values)
             if not isinstance(value, text_type):
                 value = text_type(value)
-            record.append(CONTROLFIELD(_strip_invalid_chars_for_xml(value), {'tag': tag}))
+            yield tag, None, None, value
         else:
             for value in force_list(values):
-                datafield = DATAFIELD({'tag': tag, 'ind1': ind1, 'ind2': ind2})
+                subfields = []
                 for code, els in sorted(iteritems(value)):
                     for el in force_list(els):
                         if not isinstance(el, text_type):
                             el = text_type(el)
-                        datafield.append(SUBFIELD(_strip_invalid_chars_for_xml(el), {'code': code}))
-                record.append(datafield)
+                        subfields.append((code, el))
+                yield tag, ind1, ind2, subfields
+
+
+def _marcjson2marcxml_chunks(marcjson, pretty_print, depth):
+    indent = u'  ' if pretty_print else u''
+    newline = u'\n' if pretty_print else u''
+    record_indent = indent * depth
+    field_indent = indent * (depth + 1)
+    subfield_indent = indent * (depth + 2)
+
+    chunks = []
+    for tag, ind1, ind2, value in _get_fields(marcjson):
+        if ind1 is None:
+            chunks.append(u'{}<controlfield tag="{}">{}</controlfield>{}'.format(
+                field_indent, _escape_xml_attribute(tag), _escape_xml_text(value), newline))
+        elif value:
+            chunks.append(u'{}<datafield tag="{}" ind1="{}" ind2="{}">{}'.format(
+                field_indent, _escape_xml_attribute(tag), _escape_xml_attribute(ind1),
+                _escape_xml_attribute(ind2), newline))
+            for code, el in value:
+                chunks.append(u'{}<subfield code="{}">{}</subfield>{}'.format(
+                    subfield_indent, _escape_xml_attribute(code), _escape_xml_text(el), newline))
+            chunks.append(u'{}</datafield>{}'.format(field_indent, newline))
+        else:
+            chunks.append(u'{}<datafield tag="{}" ind1="{}" ind2="{}"/>{}'.format(
+                field_indent, _escape_xml_attribute(tag), _escape_xml_attribute(ind1),
+                _escape_xml_attribute(ind2), newline))
 
-    return tostring(record, encoding='utf8', pretty_print=True)
+    if not chunks:
+        return [u'{}<record/>{}'.format(record_indent, newline)]
+
+    chunks.insert(0, u'{}<record>{}'.format(record_indent, newline))
+    chunks.append(u'{}</record>{}'.format(record_indent, newline))
+
+    return chunks
 
 
 def _get_collections(marcjson):
@@ -174,3 +478,15 @@ def _parse_key(key):
 
 def _strip_invalid_chars_for_xml(s):
     return re.sub(RE_INVALID_CHARS_FOR_XML, '', s)
+
+
+def _escape_xml_text(s):
+    # Printable text can't contain characters that are invalid in XML, so
+    # the regex only scans the other strings, typically the multiline ones.
+    if not _is_printable(s) and RE_INVALID_CHARS_FOR_XML.search(s):
+        s = _strip_invalid_chars_for_xml(s)
+    return s.replace(u'&', u'&amp;').replace(u'<', u'&lt;').replace(u'>', u'&gt;').replace(u'\r', u'&#13;')
+
+
+def _escape_xml_attribute(s):
+    return _escape_xml_text(s).replace(u'"', u'&quot;')
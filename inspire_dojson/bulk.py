@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Bulk conversion of MARCXML records on a pool of processes."""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import time
+import traceback
+from collections import namedtuple
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+
+from inspire_utils.helpers import force_list
+from inspire_utils.record import get_value
+
+from .api import _marcjson2record, preload
+from .context import get_context, install_context, use_context
+from .marc import create_marc_record
+from .utils.language_detection import detect_languages
+from .validation import validate_record
+
+ConversionResult = namedtuple('ConversionResult', ['index', 'record', 'error', 'validation_errors'])
+ConversionResult.__new__.__defaults__ = (None,)
+
+
+def bulk_marcxml2records(marcxmls, workers=None, chunk_size=100, ordered=True, context=None, stats=None,
+                         validate=False):
+    """Convert many MARCXML strings to JSON records on a pool of processes.
+
+    The MARCXML strings are sent to the workers in chunks, and every worker
+    builds the rule indices of all collections once, when it starts. An
+    exception raised while converting a record is caught and reported in
+    its result, so that it does not interrupt the conversion of the others.
+
+    Args:
+        marcxmls: an iterable of strings containing MARCXML.
+        workers(int): the number of worker processes. Defaults to the
+            number of CPUs; ``0`` converts the records in this process.
+        chunk_size(int): the number of records sent to a worker at once.
+        ordered(bool): whether to yield the results in input order.
+        context(ConversionContext): the settings used by the rules,
+            installed in every worker. Defaults to the active context.
+        stats(dict): if given, it is filled with the throughput of the
+            whole conversion and the statistics of each worker, once all
+            the results have been consumed.
+        validate(bool): whether to also validate the converted records in
+            the workers, see :func:`inspire_dojson.validation.validate_record`.
+            The time spent validating is reported apart from the time
+            spent converting.
+
+    Yields:
+        ConversionResult: the position of the MARCXML string in the
+        input, the converted JSON record and, if the conversion failed,
+        the formatted traceback instead of the record. When validating,
+        also the validation errors of the record.
+
+    """
+    if workers is None:
+        workers = cpu_count()
+    if context is None:
+        context = get_context()
+
+    chunks = _chunked(enumerate(marcxmls), chunk_size)
+    convert_chunk = partial(_convert_chunk, validate=validate)
+    worker_stats = {}
+    start = time.time()
+
+    if workers:
+        pool = Pool(workers, initializer=_init_worker, initargs=(context,))
+        imap = pool.imap if ordered else pool.imap_unordered
+        try:
+            for results, chunk_stats in imap(convert_chunk, chunks):
+                _update_worker_stats(worker_stats, chunk_stats)
+                for result in results:
+                    yield result
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for chunk in chunks:
+            with use_context(context):
+                results, chunk_stats = convert_chunk(chunk)
+            _update_worker_stats(worker_stats, chunk_stats)
+            for result in results:
+                yield result
+
+    if stats is not None:
+        elapsed = time.time() - start
+        records = sum(el['records'] for el in worker_stats.values())
+        stats.update({
+            'elapsed': elapsed,
+            'errors': sum(el['errors'] for el in worker_stats.values()),
+            'invalid': sum(el['invalid'] for el in worker_stats.values()),
+            'records': records,
+            'records_per_second': records / elapsed if elapsed else None,
+            'validation_elapsed': sum(el['validation_elapsed'] for el in worker_stats.values()),
+            'workers': worker_stats,
+        })
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def _init_worker(context):
+    install_context(context)
+    preload()
+
+
+def _convert_chunk(chunk, validate=False):
+    results = []
+    marcjsons = []
+    start = time.time()
+
+    for index, marcxml in chunk:
+        try:
+            marcjsons.append((index, create_marc_record(marcxml)))
+        except Exception:
+            results.append(ConversionResult(index, None, traceback.format_exc()))
+
+    _detect_title_translation_languages(marcjsons)
+
+    for index, marcjson in marcjsons:
+        try:
+            results.append(ConversionResult(index, _marcjson2record(marcjson), None))
+        except Exception:
+            results.append(ConversionResult(index, None, traceback.format_exc()))
+
+    results.sort(key=lambda result: result.index)
+    errors = sum(1 for result in results if result.error)
+    elapsed = time.time() - start
+
+    invalid = 0
+    validation_elapsed = 0.0
+    if validate:
+        results = [
+            result._replace(validation_errors=validate_record(result.record)) if result.record else result
+            for result in results
+        ]
+        invalid = sum(1 for result in results if result.validation_errors)
+        validation_elapsed = time.time() - start - elapsed
+
+    chunk_stats = {
+        'elapsed': elapsed,
+        'errors': errors,
+        'invalid': invalid,
+        'pid': os.getpid(),
+        'records': len(chunk),
+        'validation_elapsed': validation_elapsed,
+    }
+
+    return results, chunk_stats
+
+
+def _detect_title_translation_languages(marcjsons):
+    titles = []
+    for _, marcjson in marcjsons:
+        for title in force_list(get_value(marcjson, '242__.a')):
+            titles.extend(force_list(title))
+
+    detect_languages(titles)
+
+
+def _update_worker_stats(worker_stats, chunk_stats):
+    stats = worker_stats.setdefault(chunk_stats['pid'], {
+        'chunks': 0,
+        'elapsed': 0.0,
+        'errors': 0,
+        'invalid': 0,
+        'records': 0,
+        'validation_elapsed': 0.0,
+    })
+    stats['chunks'] += 1
+    stats['elapsed'] += chunk_stats['elapsed']
+    stats['errors'] += chunk_stats['errors']
+    stats['invalid'] += chunk_stats['invalid']
+    stats['records'] += chunk_stats['records']
+    stats['validation_elapsed'] += chunk_stats['validation_elapsed']
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Caches of converted records.
+
+Records that are harvested again are often identical to the last time,
+so their conversion can be skipped by looking it up in a cache. Entries
+are keyed by a digest of the parsed ``<record>`` element serialized
+again, the version of the package, the conversion and its context, and
+hold the converted record as JSON, so that every lookup returns a fresh
+copy.
+
+Two backends are provided: :class:`MemoryCache`, which evicts the least
+recently used records above a total size, and :class:`SqliteCache`, which
+keeps them on disk across runs.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from six import text_type
+
+from .context import get_context
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+_version = None
+
+
+class Cache(object):
+    """Base class of the caches, which counts hits and misses.
+
+    Subclasses implement ``_get``, ``_set`` and ``_clear``, which read and
+    write the JSON of a record under a key and remove all the records.
+    They are called holding ``_lock``, which also guards the counters, so
+    that a cache can be shared by threads.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get the record stored under a key.
+
+        Args:
+            key(str): a key returned by :func:`make_key`.
+
+        Returns:
+            dict: a copy of the record, or ``None`` if there is none.
+
+        """
+        with self._lock:
+            value = self._get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return json.loads(value)
+
+    def set(self, key, record):
+        """Store a record under a key.
+
+        Args:
+            key(str): a key returned by :func:`make_key`.
+            record(dict): a JSON record.
+
+        """
+        value = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            self._set(key, value)
+
+    def clear(self):
+        """Remove all the records and reset the counters."""
+        with self._lock:
+            self._clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, value):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(Cache):
+    """Cache in memory, bounded by the total size of the records.
+
+    Args:
+        max_size(int): the maximum total length of the JSON of the
+            records. The least recently used ones are evicted above it.
+
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        super(MemoryCache, self).__init__()
+        self.max_size = max_size
+        self.size = 0
+        self._values = OrderedDict()
+
+    def __len__(self):
+        return len(self._values)
+
+    def _clear(self):
+        self._values.clear()
+        self.size = 0
+
+    def _get(self, key):
+        value = self._values.pop(key, None)
+        if value is not None:
+            self._values[key] = value
+        return value
+
+    def _set(self, key, value):
+        if len(value) > self.max_size:
+            return
+
+        old_value = self._values.pop(key, None)
+        if old_value is not None:
+            self.size -= len(old_value)
+
+        self._values[key] = value
+        self.size += len(value)
+
+        while self.size > self.max_size:
+            _, evicted = self._values.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class SqliteCache(Cache):
+    """Cache in an SQLite database, which persists across runs.
+
+    Args:
+        path(str): the path of the database, created if needed.
+
+    """
+
+    def __init__(self, path):
+        super(SqliteCache, self).__init__()
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self._lock:
+            # Losing the last writes in a crash only costs conversions.
+            self._connection.execute('PRAGMA synchronous = OFF')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS records (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def _clear(self):
+        self._connection.execute('DELETE FROM records')
+        self._connection.commit()
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._connection.close()
+
+    def _get(self, key):
+        row = self._connection.execute('SELECT value FROM records WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key, value):
+        self._connection.execute('INSERT OR REPLACE INTO records (key, value) VALUES (?, ?)', (key, value))
+        self._connection.commit()
+
+
+def make_key(name, source, context=None):
+    """Compute the key of the conversion of a record.
+
+    The key changes with the version of the package, so that records
+    converted by older rules are not returned.
+
+    Args:
+        name(str): the name of the conversion, like ``marcxml2record``.
+        source: the MARCXML of the record, as text or bytes. Line endings
+            and surrounding whitespace, which don't change its meaning,
+            are normalized.
+        context(ConversionContext): the settings used by the rules.
+            Defaults to the active context.
+
+    Returns:
+        str: the key.
+
+    """
+    if context is None:
+        context = get_context()
+    if isinstance(source, text_type):
+        source = source.encode('utf8')
+    source = source.strip().replace(b'\r\n', b'\n')
+
+    digest = hashlib.sha1()
+    for part in (get_version(), name, repr(context)):
+        digest.update(part.encode('utf8'))
+        digest.update(b'\0')
+    digest.update(source)
+
+    return digest.hexdigest()
+
+
+def get_version():
+    """Get the version of the rules.
+
+    It is the version of the installed package followed by a digest of
+    its sources, which changes with the rules even when the version does
+    not, like in a checkout.
+    """
+    global _version
+    if _version is None:
+        try:
+            import pkg_resources
+            version = pkg_resources.get_distribution('inspire-dojson').version
+        except Exception:
+            version = 'unknown'
+        _version = '{}+{}'.format(version, _get_sources_digest())
+    return _version
+
+
+def _get_sources_digest():
+    digest = hashlib.sha1()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                with open(os.path.join(dirpath, filename), 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
@@ -28,9 +28,10 @@ from itertools import chain
 from inspire_utils.record import get_value
 from inspire_utils.helpers import force_list
 
-from ..model import FilterOverdo, clean_record
+from ..model import FilterOverdo, clean_record, filter_keys
 
 
+@filter_keys(['035__', '595__'], blob_keys=['001', '980__'])
 def add_control_number(record, blob):
     if '001' not in blob:
         return record
@@ -51,6 +52,7 @@ def add_control_number(record, blob):
     return record
 
 
+@filter_keys(['980__'])
 def add_collections(record, blob):
     def _add_collection(value):
         record.setdefault('980__', []).append({'a': value})
@@ -61,6 +63,7 @@ def add_collections(record, blob):
     return record
 
 
+@filter_keys(['041__'], blob_keys=['041__'])
 def remove_english_language(record, blob):
     if '041__' not in record:
         return record
@@ -79,4 +82,8 @@ filters = [
     clean_record,
 ]
 
-cds2hep_marc = FilterOverdo(filters=filters)
+rule_modules = [
+    'inspire_dojson.cds.rules',
+]
+
+cds2hep_marc = FilterOverdo(filters=filters, rule_modules=rule_modules)
@@ -28,7 +28,6 @@ import os
 import re
 from itertools import chain
 
-import pycountry
 import six
 
 from idutils import is_arxiv
@@ -40,7 +39,11 @@ from inspire_utils.helpers import force_list
 from inspire_utils.name import normalize_name
 
 from .model import cds2hep_marc
-from ..utils import force_single_element
+from ..marc import MarcDict
+from ..utils import force_single_element, memoize
+from ..utils.languages import get_name_from_alpha_3
+
+normalize_name = memoize(normalize_name)
 
 CATEGORIES = {
     'General Relativity and Cosmology': 'Gravitation and Cosmology',
@@ -95,6 +98,10 @@ def add_source(field, source='CDS'):
 
 
 def vanilla_dict(god):
+    if isinstance(god, (utils.GroupableOrderedDict, MarcDict)):
+        # Reads the tuples stored by the dictionary directly, unwrapping
+        # the single values like its ``__getitem__`` does.
+        return {k: v[0] if len(v) == 1 else v for (k, v) in dict.items(god) if k != '__order__'}
     return {k: v for (k, v) in six.iteritems(god) if k != '__order__'}
 
 
@@ -114,7 +121,7 @@ def external_sytem_identifiers(self, key, value):
         return vanilla_dict(value)
 
 
-@cds2hep_marc.over('037__', '^037..', '^088..')
+@cds2hep_marc.over('037__', '^037..', '^088..', side_effects=['500__', '595__', '980__'])
 def secondary_report_numbers(self, key, value):
     """Populate the ``037`` MARC field.
 
@@ -161,14 +168,9 @@ def languages(self, key, value):
     values = force_list(value.get('a'))
 
     for language in values:
-        alpha_3 = language.strip().lower()
-        try:
-            languages.append({'a': pycountry.languages.get(alpha_3=alpha_3).name})
-        except KeyError:
-            try:
-                languages.append({'a': pycountry.languages.get(bibliographic=alpha_3).name})
-            except KeyError:
-                pass
+        name = get_name_from_alpha_3(language)
+        if name:
+            languages.append({'a': name})
 
     return languages
 
@@ -225,7 +227,7 @@ def first_author(self, key, value):
     return _converted_author(value)
 
 
-@cds2hep_marc.over('700__', '^700..')
+@cds2hep_marc.over('700__', '^700..', side_effects=['701__'])
 def nonfirst_authors(self, key, value):
     """Populate ``700`` MARC field.
 
@@ -371,7 +373,7 @@ def publication_info(self, key, value):
     return vanilla_dict(value)
 
 
-@cds2hep_marc.over('8564_', '^8564.')
+@cds2hep_marc.over('8564_', '^8564.', side_effects=['FFT__'])
 def urls(self, key, value):
     """Populate the ``8564`` MARC field.
 
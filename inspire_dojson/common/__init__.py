@@ -23,5 +23,3 @@
 """DoJSON common rules."""
 
 from __future__ import absolute_import, division, print_function
-
-from . import rules  # noqa: F401
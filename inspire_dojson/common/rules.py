@@ -27,17 +27,13 @@ from __future__ import absolute_import, division, print_function
 import re
 from datetime import datetime
 
-from flask import current_app
-from six.moves import urllib
-
 from dojson import utils
 
-from inspire_schemas.api import load_schema
-from inspire_schemas.utils import classify_field
 from inspire_utils.date import PartialDate, normalize_date
 from inspire_utils.helpers import force_list, maybe_int
 
 from ..conferences.model import conferences
+from ..context import get_context
 from ..data.model import data
 from ..experiments.model import experiments
 from ..hep.model import hep, hep2marc
@@ -50,6 +46,7 @@ from ..utils import (
     get_recid_from_ref,
     get_record_ref,
 )
+from ..utils.enums import INSPIRE_CATEGORY_SOURCES, classify_field
 
 
 IS_INTERNAL_UID = re.compile('^(inspire:uid:)?\d{5}$')
@@ -595,14 +592,14 @@ def control_number(endpoint):
     return _control_number
 
 
-conferences.over('control_number', '^001')(control_number('conferences'))
-data.over('control_number', '^001')(control_number('data'))
-experiments.over('control_number', '^001')(control_number('experiments'))
-hep.over('control_number', '^001')(control_number('literature'))
-hepnames.over('control_number', '^001')(control_number('authors'))
-institutions.over('control_number', '^001')(control_number('institutions'))
-jobs.over('control_number', '^001')(control_number('jobs'))
-journals.over('control_number', '^001')(control_number('journals'))
+conferences.over('control_number', '^001', side_effects=['self'])(control_number('conferences'))
+data.over('control_number', '^001', side_effects=['self'])(control_number('data'))
+experiments.over('control_number', '^001', side_effects=['self'])(control_number('experiments'))
+hep.over('control_number', '^001', side_effects=['self'])(control_number('literature'))
+hepnames.over('control_number', '^001', side_effects=['self'])(control_number('authors'))
+institutions.over('control_number', '^001', side_effects=['self'])(control_number('institutions'))
+jobs.over('control_number', '^001', side_effects=['self'])(control_number('jobs'))
+journals.over('control_number', '^001', side_effects=['self'])(control_number('journals'))
 
 
 @hep2marc.over('001', '^control_number$')
@@ -753,9 +750,6 @@ def _private_notes2marc(self, key, value):
 @jobs.over('inspire_categories', '^65017')
 @journals.over('inspire_categories', '^65017')
 def inspire_categories(self, key, value):
-    schema = load_schema('elements/inspire_field')
-    valid_sources = schema['properties']['source']['enum']
-
     inspire_categories = self.get('inspire_categories', [])
 
     scheme = force_single_element(value.get('2'))
@@ -763,7 +757,7 @@ def inspire_categories(self, key, value):
         return inspire_categories  # we're going to add them later in a filter.
 
     source = force_single_element(value.get('9', '')).lower()
-    if source not in valid_sources:
+    if source not in INSPIRE_CATEGORY_SOURCES:
         if source == 'automatically added based on dcc, ppf, dk':
             source = 'curator'
         elif source == 'submitter':
@@ -827,20 +821,13 @@ def public_notes_680(self, key, value):
 @jobs.over('urls', '^8564.')
 @journals.over('urls', '^8564.')
 def urls(self, key, value):
-    def _is_internal_url(url):
-        base = urllib.parse.urlparse(current_app.config['LEGACY_BASE_URL'])
-        base_netloc = base.netloc or base.path
-        parsed_url = urllib.parse.urlparse(url)
-        url_netloc = parsed_url.netloc or parsed_url.path
-
-        return base_netloc == url_netloc
-
     urls = self.get('urls', [])
+    context = get_context()
 
     description = force_single_element(value.get('y'))
     description = WEBLINKS.get(description, description)
     for url in force_list(value.get('u')):
-        if not _is_internal_url(url):
+        if not context.is_legacy_url(url):
             urls.append({
                 'description': description,
                 'value': url,
@@ -901,12 +888,12 @@ def external_system_identifiers(endpoint):
     return _external_system_identifiers
 
 
-conferences.over('external_system_identifiers', '^970..')(external_system_identifiers('conferences'))
-experiments.over('external_system_identifiers', '^970..')(external_system_identifiers('experiments'))
-hep.over('external_system_identifiers', '^970..')(external_system_identifiers('literature'))
-institutions.over('external_system_identifiers', '^970..')(external_system_identifiers('institutions'))
-jobs.over('external_system_identifiers', '^970..')(external_system_identifiers('jobs'))
-journals.over('external_system_identifiers', '^970..')(external_system_identifiers('journals'))
+conferences.over('external_system_identifiers', '^970..', side_effects=['new_record'])(external_system_identifiers('conferences'))
+experiments.over('external_system_identifiers', '^970..', side_effects=['new_record'])(external_system_identifiers('experiments'))
+hep.over('external_system_identifiers', '^970..', side_effects=['new_record'])(external_system_identifiers('literature'))
+institutions.over('external_system_identifiers', '^970..', side_effects=['new_record'])(external_system_identifiers('institutions'))
+jobs.over('external_system_identifiers', '^970..', side_effects=['new_record'])(external_system_identifiers('jobs'))
+journals.over('external_system_identifiers', '^970..', side_effects=['new_record'])(external_system_identifiers('journals'))
 
 
 @hep2marc.over('970', '^new_record$')
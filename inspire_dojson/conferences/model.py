@@ -24,9 +24,10 @@
 
 from __future__ import absolute_import, division, print_function
 
-from ..model import FilterOverdo, add_schema, add_collection, clean_record
+from ..model import FilterOverdo, add_schema, add_collection, clean_record, filter_keys
 
 
+@filter_keys(['series'])
 def remove_lone_series_number(record, blob):
     def _valid(series):
         return series.get('name')
@@ -43,4 +44,9 @@ filters = [
     clean_record,
 ]
 
-conferences = FilterOverdo(filters=filters)
+rule_modules = [
+    'inspire_dojson.conferences.rules',
+    'inspire_dojson.common.rules',
+]
+
+conferences = FilterOverdo(filters=filters, rule_modules=rule_modules)
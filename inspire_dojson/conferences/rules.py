@@ -30,7 +30,7 @@ from inspire_utils.helpers import force_list, maybe_int
 
 from .model import conferences
 from ..utils import force_single_element
-from ..utils.geo import parse_conference_address
+from ..utils.geo import parse_addresses
 
 
 def _trim_date(date):
@@ -49,7 +49,7 @@ def _trim_date(date):
     return '%d' % year
 
 
-@conferences.over('acronyms', '^111..')
+@conferences.over('acronyms', '^111..', side_effects=['address', 'closing_date', 'cnum', 'opening_date', 'titles'])
 @utils.flatten
 @utils.for_each_value
 def acronyms(self, key, value):
@@ -73,15 +73,12 @@ def acronyms(self, key, value):
 
     if value.get('c'):
         self.setdefault('address', [])
-        raw_addresses = force_list(value.get('c'))
-        for raw_address in raw_addresses:
-            address = parse_conference_address(raw_address)
-            self['address'].append(address)
+        self['address'].extend(parse_addresses(force_list(value.get('c'))))
 
     return force_list(value.get('e'))
 
 
-@conferences.over('contact_details', '^270..')
+@conferences.over('contact_details', '^270..', side_effects=['address'])
 def contact_details(self, key, value):
     if value.get('b'):
         self.setdefault('address', [])
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Settings used by the rules while converting records.
+
+The rules need to know the server that serves the converted records, the
+base URL of the legacy system and where the legacy files are on AFS. These
+settings are parsed once into a :class:`ConversionContext`, which is looked
+up, in order:
+
+1. in the contexts activated with :func:`use_context`,
+2. in the context installed with :func:`install_context`,
+3. in the config of the current Flask app, if there is one,
+4. in the defaults.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context
+from six import string_types
+from six.moves import urllib
+
+CONFIG_KEYS = (
+    'SERVER_NAME',
+    'LEGACY_BASE_URL',
+    'LEGACY_AFS_PATH',
+)
+
+DEFAULT_SERVER_NAME = 'http://inspirehep.net'
+DEFAULT_LEGACY_BASE_URL = 'http://inspirehep.net'
+DEFAULT_LEGACY_AFS_PATH = '/afs/cern.ch/project/inspire/PROD'
+
+LEGACY_FILES_PATH = '/opt/cds-invenio/'
+
+MEMO_SIZE = 100
+
+RE_HTTP_URL = re.compile('^https?://')
+
+
+class ConversionContext(object):
+    """Pre-parsed settings used by the rules.
+
+    Args:
+        server_name(str): the server of the converted records, with or
+            without the scheme. Defaults to ``http://inspirehep.net``.
+        legacy_base_url(str): the base URL of the legacy system, used to
+            recognize its internal URLs. Defaults to
+            ``http://inspirehep.net``.
+        legacy_afs_path(str): the path of the legacy files on AFS.
+            Defaults to ``/afs/cern.ch/project/inspire/PROD``.
+
+    """
+
+    def __init__(self, server_name=None, legacy_base_url=None, legacy_afs_path=None):
+        self.server_name = server_name or DEFAULT_SERVER_NAME
+        self.legacy_base_url = legacy_base_url or DEFAULT_LEGACY_BASE_URL
+        self.legacy_afs_path = legacy_afs_path or DEFAULT_LEGACY_AFS_PATH
+
+        server = self.server_name
+        if not RE_HTTP_URL.match(server):
+            server = u'http://{}'.format(server)
+        parsed_server = urllib.parse.urlparse(server)
+        self._server = server
+        self._server_root = u'{}://{}'.format(parsed_server.scheme, parsed_server.netloc)
+
+        self._legacy_netloc = _get_netloc(self.legacy_base_url)
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a context from the config of a Flask app.
+
+        Args:
+            config(dict): a mapping with the ``SERVER_NAME``,
+                ``LEGACY_BASE_URL`` and ``LEGACY_AFS_PATH`` keys, any of
+                which can be missing.
+
+        Returns:
+            ConversionContext: the context.
+
+        """
+        return cls(*(config.get(key) for key in CONFIG_KEYS))
+
+    def __eq__(self, other):
+        return isinstance(other, ConversionContext) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return '{}(server_name={!r}, legacy_base_url={!r}, legacy_afs_path={!r})'.format(
+            self.__class__.__name__, *self._key())
+
+    def __getstate__(self):
+        return self._key()
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def absolute_url(self, relative_url):
+        """Make a URL relative to the server root absolute."""
+        if _is_root_relative(relative_url):
+            return self._server_root + relative_url
+        return urllib.parse.urljoin(self._server, relative_url)
+
+    def afs_url(self, file_path):
+        """Convert the path of a legacy file to a URL of its path on AFS.
+
+        Paths that don't start with ``/opt/cds-invenio/``, and hence are
+        not on AFS, are returned unchanged.
+        """
+        if file_path is None:
+            return
+
+        if file_path.startswith(LEGACY_FILES_PATH):
+            file_path = os.path.relpath(file_path, LEGACY_FILES_PATH)
+            file_path = os.path.join(self.legacy_afs_path, file_path)
+            return urllib.parse.urljoin('file://', urllib.request.pathname2url(file_path.encode('utf-8')))
+
+        return file_path
+
+    def is_legacy_url(self, url):
+        """Whether a URL points to the legacy system."""
+        return self._legacy_netloc == _get_netloc(url)
+
+    def _key(self):
+        return (self.server_name, self.legacy_base_url, self.legacy_afs_path)
+
+
+_installed_context = None
+_local = threading.local()
+_contexts_by_config = {}
+
+
+def get_context():
+    """Get the context of the current conversion.
+
+    Returns:
+        ConversionContext: the active context.
+
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        return stack[-1]
+    if _installed_context is not None:
+        return _installed_context
+    if has_app_context():
+        return _get_context_from_config(current_app.config)
+    return _get_context_from_config({})
+
+
+@contextmanager
+def use_context(context):
+    """Activate a context in the current thread, for the duration of a block.
+
+    Args:
+        context(ConversionContext): the context, or ``None`` to leave the
+            active context unchanged.
+
+    """
+    if context is None:
+        yield get_context()
+        return
+
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(context)
+    try:
+        yield context
+    finally:
+        stack.pop()
+
+
+def install_context(context):
+    """Install a context for all threads, taking precedence over the app config.
+
+    This is meant for worker processes, which convert records outside of
+    any Flask app.
+
+    Args:
+        context(ConversionContext): the context, or ``None`` to uninstall
+            the current one.
+
+    """
+    global _installed_context
+
+    _installed_context = context
+
+
+def _get_context_from_config(config):
+    key = tuple(config.get(key) for key in CONFIG_KEYS)
+    try:
+        return _contexts_by_config[key]
+    except KeyError:
+        if len(_contexts_by_config) >= MEMO_SIZE:
+            _contexts_by_config.clear()
+        context = _contexts_by_config[key] = ConversionContext(*key)
+        return context
+
+
+def _get_netloc(url):
+    parsed_url = urllib.parse.urlparse(url)
+    return parsed_url.netloc or parsed_url.path
+
+
+def _is_root_relative(url):
+    return (
+        isinstance(url, string_types) and
+        url.startswith('/') and
+        not url.startswith('//') and
+        '/.' not in url
+    )
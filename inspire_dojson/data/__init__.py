@@ -24,5 +24,4 @@
 
 from __future__ import absolute_import, division, print_function
 
-from . import rules  # noqa: F401
 from .model import data  # noqa: F401
@@ -33,4 +33,9 @@ filters = [
     clean_record,
 ]
 
-data = FilterOverdo(filters=filters)
+rule_modules = [
+    'inspire_dojson.data.rules',
+    'inspire_dojson.common.rules',
+]
+
+data = FilterOverdo(filters=filters, rule_modules=rule_modules)
@@ -24,9 +24,10 @@
 
 from __future__ import absolute_import, division, print_function
 
-from ..model import FilterOverdo, add_collection, add_schema, clean_record
+from ..model import FilterOverdo, add_collection, add_schema, clean_record, filter_keys
 
 
+@filter_keys(['project_type'])
 def add_project_type(record, blob):
     if not record.get('project_type'):
         record['project_type'] = ['experiment']
@@ -41,4 +42,9 @@ filters = [
     clean_record,
 ]
 
-experiments = FilterOverdo(filters=filters)
+rule_modules = [
+    'inspire_dojson.experiments.rules',
+    'inspire_dojson.common.rules',
+]
+
+experiments = FilterOverdo(filters=filters, rule_modules=rule_modules)
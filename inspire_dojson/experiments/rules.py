@@ -24,20 +24,18 @@
 
 from __future__ import absolute_import, division, print_function
 
-import re
-
 from dojson import utils
 from dojson.errors import IgnoreKey
 
-from inspire_schemas.api import load_schema
 from inspire_utils.date import normalize_date
 from inspire_utils.helpers import force_list, maybe_int
 
 from .model import experiments
 from ..utils import force_single_element, get_record_ref
+from ..utils.enums import EXPERIMENT_INSPIRE_CLASSIFICATION
 
 
-@experiments.over('_dates', '^046..')
+@experiments.over('_dates', '^046..', side_effects=['date_approved', 'date_cancelled', 'date_completed', 'date_proposed', 'date_started'])
 @utils.for_each_value
 def _dates(self, key, value):
     """Don't populate any key through the return value.
@@ -60,7 +58,7 @@ def _dates(self, key, value):
     raise IgnoreKey
 
 
-@experiments.over('experiment', '^119..')
+@experiments.over('experiment', '^119..', side_effects=['accelerator', 'institutions', 'legacy_name'])
 def experiment(self, key, values):
     """Populate the ``experiment`` key.
 
@@ -108,10 +106,7 @@ def long_name(self, key, value):
 @experiments.over('inspire_classification', '^372..')
 @utils.for_each_value
 def inspire_classification(self, key, value):
-    schema = load_schema('experiments')
-    pattern = schema['properties']['inspire_classification']['items']['pattern']
-
-    if re.match(pattern, value.get('a')):
+    if EXPERIMENT_INSPIRE_CLASSIFICATION.match(value.get('a')):
         return value.get('a')
 
 
@@ -165,7 +160,7 @@ def collaboration(self, key, value):
     }
 
 
-@experiments.over('core', '^980..')
+@experiments.over('core', '^980..', side_effects=['deleted', 'project_type'])
 def core(self, key, value):
     """Populate the ``core`` key.
 
@@ -24,16 +24,4 @@
 
 from __future__ import absolute_import, division, print_function
 
-from .rules import (  # noqa: F401
-    bd0xx,
-    bd1xx,
-    bd2xx,
-    bd3xx,
-    bd4xx,
-    bd5xx,
-    bd6xx,
-    bd7xx,
-    bd9xx,
-    bdFFT,
-)
 from .model import hep, hep2marc  # noqa: F401
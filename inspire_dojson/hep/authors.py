@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Conversion of the ``100``, ``700`` and ``701`` MARC fields to and from ``authors``.
+
+Collaboration papers have thousands of authors, so each author is built
+in a single pass over its subfields, already stripped of empty values and
+duplicates, and collected in an :class:`AuthorList`, which
+``clean_record`` doesn't need to walk again.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import re
+
+from six import iteritems
+
+from dojson.utils import GroupableOrderedDict
+
+from inspire_utils.helpers import force_list, maybe_int
+
+from ..context import get_context
+from ..marc import MarcDict
+from ..utils import CleanList
+
+ORCID = re.compile(r'\d{4}-\d{4}-\d{4}-\d{3}[0-9Xx]')
+
+
+class AuthorList(CleanList):
+    """Authors without duplicates, in the order in which they were added.
+
+    Adding an author that is equal to one already in the list does
+    nothing. Authors are expected to be free of empty values, like the
+    ones built by :func:`marc_to_authors`.
+    """
+
+    def __init__(self, authors=()):
+        super(AuthorList, self).__init__()
+        self._by_full_name = {}
+        self.extend(authors)
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    def append(self, author):
+        same_full_name = self._by_full_name.setdefault(author.get('full_name'), [])
+        if author not in same_full_name:
+            same_full_name.append(author)
+            super(AuthorList, self).append(author)
+
+    def extend(self, authors):
+        for author in authors:
+            self.append(author)
+
+
+def marc_to_authors(key, values, authors=None):
+    """Convert ``100``, ``700`` or ``701`` fields to ``authors``.
+
+    Args:
+        key(str): the MARC key of the fields, like ``700__``.
+        values(list): the fields.
+        authors(AuthorList): the authors converted so far, if any.
+
+    Returns:
+        AuthorList: ``authors`` followed by the new authors.
+
+    """
+    if authors is None:
+        authors = AuthorList()
+
+    context = get_context()
+    is_supervisor = key.startswith('701')
+
+    for value in values:
+        subfields = _get_subfields(value)
+        full_names = subfields.get('a', ())
+        is_single = len(full_names) == 1
+
+        for full_name in full_names:
+            author = _marc_to_author(subfields, context, full_name, is_single, is_supervisor)
+            if author:
+                authors.append(author)
+
+    return authors
+
+
+def author_to_marc(author, supervisor=False):
+    """Convert an author to a ``100``, ``700`` or ``701`` field.
+
+    Args:
+        author(dict): an element of ``authors``.
+        supervisor(bool): whether the field is a ``701``, which has no
+            emails or roles.
+
+    Returns:
+        dict: the field.
+
+    """
+    i_values = []
+    j_values = []
+    for id_ in author.get('ids') or ():
+        schema = id_.get('schema')
+        if schema == 'INSPIRE ID':
+            i_values.append(id_.get('value'))
+        elif schema == 'ORCID':
+            j_values.append('ORCID:' + id_.get('value'))
+        elif schema == 'JACOW':
+            j_values.append(id_.get('value'))
+        elif schema == 'CERN':
+            j_values.append('CCID-' + id_.get('value')[5:])
+
+    field = {
+        'a': author.get('full_name'),
+        'q': author.get('alternative_names'),
+        'i': i_values,
+        'j': j_values,
+        'u': [el.get('value') for el in author.get('affiliations', [])],
+        'v': [el.get('value') for el in author.get('raw_affiliations', [])],
+    }
+    if not supervisor:
+        field['e'] = ['ed.' for el in force_list(author.get('inspire_roles')) if el == 'editor']
+        field['m'] = author.get('emails')
+
+    return field
+
+
+def _get_subfields(value):
+    if isinstance(value, (GroupableOrderedDict, MarcDict)):
+        # Read the tuples of values that it stores, bypassing the
+        # unpacking of single values done by its ``__getitem__``.
+        return dict(dict.items(value))
+    return {code: force_list(els) for code, els in iteritems(value)}
+
+
+def _marc_to_author(subfields, context, full_name, is_single, is_supervisor):
+    # Only fields with a single name carry personal information. Keys are
+    # set only when they have a value, in alphabetical order.
+    author = {}
+
+    affiliations = _get_affiliations(subfields, context)
+    if affiliations:
+        author['affiliations'] = affiliations
+
+    if is_single:
+        alternative_names = _unique(subfields.get('q', ()))
+        if alternative_names:
+            author['alternative_names'] = alternative_names
+
+        y_values = subfields.get('y', ())
+        if len(y_values) == 1 and y_values[0] == '1':
+            author['curated_relation'] = True
+
+        emails = _unique(el[6:] if el.startswith('email:') else el for el in subfields.get('m', ()))
+        if emails:
+            author['emails'] = emails
+
+    if full_name:
+        author['full_name'] = full_name
+
+    if is_single:
+        ids = _get_ids(subfields)
+        if ids:
+            author['ids'] = ids
+
+    inspire_roles = []
+    if any(el.lower().startswith('ed') for el in subfields.get('e', ())):
+        inspire_roles.append('editor')
+    if is_supervisor:
+        inspire_roles.append('supervisor')
+    if inspire_roles:
+        author['inspire_roles'] = inspire_roles
+
+    raw_affiliations = _unique({'value': el} for el in subfields.get('v', ()) if el)
+    if raw_affiliations:
+        author['raw_affiliations'] = raw_affiliations
+
+    if is_single:
+        x_values = subfields.get('x', ())
+        recid = maybe_int(x_values[0]) if x_values else None
+        if recid is not None:
+            author['record'] = {'$ref': context.absolute_url(u'/api/authors/{}'.format(recid))}
+
+    return author
+
+
+def _get_affiliations(subfields, context):
+    u_values = subfields.get('u', ())
+    z_values = subfields.get('z', ())
+
+    # XXX: we zip only when they have the same length, otherwise
+    #      we might match a value with the wrong recid.
+    if len(u_values) != len(z_values):
+        return _unique({'value': el} for el in u_values if el)
+
+    affiliations = []
+    for u_value, z_value in zip(u_values, z_values):
+        affiliation = {'record': {'$ref': context.absolute_url(u'/api/institutions/{}'.format(z_value))}}
+        if u_value:
+            affiliation['value'] = u_value
+        if affiliation not in affiliations:
+            affiliations.append(affiliation)
+
+    return affiliations
+
+
+def _get_ids(subfields):
+    ids = [_make_id('INSPIRE ID', el) for el in subfields.get('i', ())]
+
+    for j_value in subfields.get('j', ()):
+        upper_j_value = j_value.upper()
+        if upper_j_value.startswith('JACOW-'):
+            ids.append(_make_id('JACOW', 'JACoW-' + j_value[6:]))
+        elif upper_j_value.startswith('ORCID:') and len(j_value) > 6:
+            ids.append(_make_id('ORCID', j_value[6:].replace('.', '')))
+        elif ORCID.match(j_value):
+            ids.append(_make_id('ORCID', j_value))
+        elif j_value.startswith('CCID-'):
+            ids.append(_make_id('CERN', 'CERN-' + j_value[5:]))
+
+    ids.extend(_make_id('INSPIRE BAI', el) for el in subfields.get('w', ()))
+
+    return _unique(ids)
+
+
+def _make_id(schema, value):
+    if value:
+        return {'schema': schema, 'value': value}
+    return {'schema': schema}
+
+
+def _unique(elements):
+    result = []
+    for element in elements:
+        if element and element not in result:
+            result.append(element)
+    return result
@@ -20,7 +20,11 @@
 # granted to it by virtue of its status as an Intergovernmental Organization
 # or submit itself to any jurisdiction.
 
-"""DoJSON model definition for HEP."""
+"""DoJSON model definition for HEP.
+
+The filters import ``inspire_schemas`` when they are first called, so
+that importing the model does not pay for it.
+"""
 
 from __future__ import absolute_import, division, print_function
 
@@ -28,21 +32,19 @@ import itertools
 
 import six
 
-from inspire_schemas.utils import (
-    convert_old_publication_info_to_new,
-    normalize_arxiv_category,
-)
-from inspire_schemas.builders.literature import is_citeable
 from inspire_utils.helpers import force_list
 from inspire_utils.record import get_value
 
-from ..model import FilterOverdo, add_schema, clean_record
+from ..model import FilterOverdo, add_schema, clean_record, filter_keys
 
 
+@filter_keys(['arxiv_eprints'], blob_keys=['65017'])
 def add_arxiv_categories(record, blob):
     if not record.get('arxiv_eprints') or not blob.get('65017'):
         return record
 
+    from ..utils.enums import normalize_arxiv_category
+
     for category in force_list(get_value(blob, '65017')):
         if category.get('2') == 'arXiv' and category.get('a'):
             record['arxiv_eprints'][0]['categories'].append(
@@ -52,15 +54,19 @@ def add_arxiv_categories(record, blob):
     return record
 
 
+@filter_keys(['publication_info'])
 def convert_publication_infos(record, blob):
     if not record.get('publication_info'):
         return record
 
+    from inspire_schemas.utils import convert_old_publication_info_to_new
+
     record['publication_info'] = convert_old_publication_info_to_new(record['publication_info'])
 
     return record
 
 
+@filter_keys(['public_notes', 'publication_info'])
 def move_incomplete_publication_infos(record, blob):
     def _keys_with_truthy_values(d):
         return {k for k, v in d.items() if v}
@@ -79,6 +85,7 @@ def move_incomplete_publication_infos(record, blob):
     return record
 
 
+@filter_keys(['document_type'])
 def ensure_document_type(record, blob):
     if not record.get('document_type'):
         record['document_type'] = ['article']
@@ -86,6 +93,7 @@ def ensure_document_type(record, blob):
     return record
 
 
+@filter_keys(['curated'])
 def ensure_curated(record, blob):
     if 'curated' not in record:
         record['curated'] = True
@@ -93,6 +101,7 @@ def ensure_curated(record, blob):
     return record
 
 
+@filter_keys(['500'], blob_keys=['core', 'curated'])
 def convert_curated(record, blob):
     if blob.get('curated') is False:
         a_value = '* Temporary entry *' if blob.get('core') else '* Brief entry *'
@@ -101,6 +110,7 @@ def convert_curated(record, blob):
     return record
 
 
+@filter_keys(['figures'])
 def ensure_ordered_figures(record, blob):
     ordered_figures_dict = {}
     unordered_figures_list = []
@@ -117,6 +127,7 @@ def ensure_ordered_figures(record, blob):
     return record
 
 
+@filter_keys(['documents', 'figures'])
 def ensure_unique_documents_and_figures(record, blob):
     def duplicates(elements):
         duplicate_keys_list = []
@@ -133,6 +144,7 @@ def ensure_unique_documents_and_figures(record, blob):
     return record
 
 
+@filter_keys(['035', 'id_dict'])
 def write_ids(record, blob):
     result_035 = record.get('035')
     id_dict = record.get('id_dict', {})
@@ -156,6 +168,7 @@ def write_ids(record, blob):
     return record
 
 
+@filter_keys(['abstracts'])
 def reorder_abstracts(record, blob):
     abstracts = record.get('abstracts', [])
 
@@ -167,14 +180,21 @@ def reorder_abstracts(record, blob):
     return record
 
 
+@filter_keys(['authors', 'authors_second'])
 def merge_authors(record, blob):
     authors_second = record.pop('authors_second', [])
-    record.setdefault('authors', []).extend(authors_second)
+    if 'authors' in record:
+        record['authors'].extend(authors_second)
+    else:
+        record['authors'] = authors_second
 
     return record
 
 
+@filter_keys(['citeable', 'publication_info'])
 def set_citeable(record, blob):
+    from inspire_schemas.builders.literature import is_citeable
+
     if is_citeable(record.get('publication_info', [])):
         record['citeable'] = True
 
@@ -202,5 +222,19 @@ hep2marc_filters = [
     clean_record,
 ]
 
-hep = FilterOverdo(filters=hep_filters)
-hep2marc = FilterOverdo(filters=hep2marc_filters)
+rule_modules = [
+    'inspire_dojson.hep.rules.bd0xx',
+    'inspire_dojson.hep.rules.bd1xx',
+    'inspire_dojson.hep.rules.bd2xx',
+    'inspire_dojson.hep.rules.bd3xx',
+    'inspire_dojson.hep.rules.bd4xx',
+    'inspire_dojson.hep.rules.bd5xx',
+    'inspire_dojson.hep.rules.bd6xx',
+    'inspire_dojson.hep.rules.bd7xx',
+    'inspire_dojson.hep.rules.bd9xx',
+    'inspire_dojson.hep.rules.bdFFT',
+    'inspire_dojson.common.rules',
+]
+
+hep = FilterOverdo(filters=hep_filters, rule_modules=rule_modules)
+hep2marc = FilterOverdo(filters=hep2marc_filters, rule_modules=rule_modules)
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Conversion of the ``999C5`` MARC field to and from ``references``.
+
+Review articles have thousands of references, so the whole list is
+converted in one pass: the builder methods are looked up once, only the
+subfields present in each reference are dispatched, and the parsing of
+author names and arXiv identifiers doesn't load anything per reference.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+from idutils import is_arxiv_post_2007
+
+from inspire_schemas.api import ReferenceBuilder
+from inspire_schemas.utils import (
+    build_pubnote,
+    convert_new_publication_info_to_old,
+    normalize_arxiv,
+)
+from inspire_utils.helpers import force_list, maybe_int
+from inspire_utils.name import normalize_name
+
+from ..utils import get_recid_from_ref, get_record_ref, memoize
+from ..utils.enums import is_arxiv
+
+normalize_name = memoize(normalize_name)
+
+
+class _ReferenceBuilder(ReferenceBuilder):
+    """``ReferenceBuilder`` with cheaper name and arXiv identifier parsing.
+
+    Identifiers are classified before calling the public methods of
+    ``ReferenceBuilder``, whose ``is_arxiv`` loads the arXiv categories
+    from the schema for each identifier that looks like an arXiv one.
+    Writing the parsed values relies on ``obj`` and
+    ``_ensure_reference_field`` of inspire-schemas 57, which the tests
+    check by comparing the output of both builders.
+    """
+
+    def add_author(self, full_name, role=None):
+        author = {'full_name': normalize_name(full_name)}
+        if role is not None:
+            author['inspire_role'] = 'editor' if role == 'ed.' else role
+
+        self._ensure_reference_field('authors', [])
+        self.obj['reference']['authors'].append(author)
+
+    def add_report_number(self, repno):
+        repno = repno or ''
+        if is_arxiv(repno):
+            self._ensure_reference_field('arxiv_eprint', normalize_arxiv(repno))
+        else:
+            self._ensure_reference_field('report_numbers', [])
+            if repno not in self.obj['reference']['report_numbers']:
+                self.obj['reference']['report_numbers'].append(repno)
+
+    def add_uid(self, uid):
+        # Other identifiers don't match the arXiv regexes, so the ``is_arxiv``
+        # of ``ReferenceBuilder`` rejects them without loading the schema.
+        uid = uid or ''
+        if is_arxiv(uid):
+            self._ensure_reference_field('arxiv_eprint', normalize_arxiv(uid))
+        else:
+            super(_ReferenceBuilder, self).add_uid(uid)
+
+
+def _set_record(builder, el):
+    builder.set_record(get_record_ref(maybe_int(el), 'literature'))
+
+
+def _add_editor(builder, el):
+    builder.add_author(el, role='ed.')
+
+
+# The order matters: for example, a ``cnum`` in ``b`` prevents ``s`` from
+# being parsed as a pubnote.
+SUBFIELDS = [
+    ('0', _set_record),
+    ('a', _ReferenceBuilder.add_uid),
+    ('b', _ReferenceBuilder.add_uid),
+    ('c', _ReferenceBuilder.add_collaboration),
+    ('e', _add_editor),
+    ('h', _ReferenceBuilder.add_refextract_authors_str),
+    ('i', _ReferenceBuilder.add_uid),
+    ('k', _ReferenceBuilder.set_texkey),
+    ('m', _ReferenceBuilder.add_misc),
+    ('o', _ReferenceBuilder.set_label),
+    ('p', _ReferenceBuilder.set_publisher),
+    ('q', _ReferenceBuilder.add_parent_title),
+    ('r', _ReferenceBuilder.add_report_number),
+    ('s', _ReferenceBuilder.set_pubnote),
+    ('t', _ReferenceBuilder.add_title),
+    ('u', _ReferenceBuilder.add_url),
+    ('x', _ReferenceBuilder.add_raw_reference),
+    ('y', _ReferenceBuilder.set_year),
+]
+
+_SUBFIELD_POSITIONS = {code: position for position, (code, _) in enumerate(SUBFIELDS)}
+_SUBFIELD_METHODS = dict(SUBFIELDS)
+
+
+def marc_to_references(values):
+    """Convert a list of ``999C5`` fields to ``references``.
+
+    Args:
+        values(list): the ``999C5`` fields of a record.
+
+    Returns:
+        list: the ``references``, in the same order.
+
+    """
+    return [_marc_to_reference(value) for value in values]
+
+
+def references_to_marc(references):
+    """Convert a list of ``references`` to ``999C5`` fields.
+
+    The references are not modified.
+
+    Args:
+        references(list): the ``references`` of a record.
+
+    Returns:
+        list: the ``999C5`` fields, in the same order.
+
+    """
+    return [_reference_to_marc(value) for value in references]
+
+
+def _marc_to_reference(value):
+    builder = _ReferenceBuilder()
+
+    codes = sorted(
+        (code for code in value if code in _SUBFIELD_POSITIONS),
+        key=_SUBFIELD_POSITIONS.get,
+    )
+    for code in codes:
+        method = _SUBFIELD_METHODS[code]
+        for el in force_list(value.get(code)):
+            if el:
+                method(builder, el)
+
+    nine_values = [el.upper() for el in force_list(value.get('9'))]
+    if 'CURATOR' in nine_values:
+        if value.get('z') == '1':
+            builder.curate()
+        builder.obj['legacy_curated'] = True
+
+    return builder.obj
+
+
+def _reference_to_marc(value):
+    reference = value.get('reference', {})
+
+    pids = force_list(reference.get('persistent_identifiers'))
+    a_values = ['doi:' + el for el in force_list(reference.get('dois'))]
+    a_values.extend(['hdl:' + el['value'] for el in pids if el.get('schema') == 'HDL'])
+    a_values.extend(['urn:' + el['value'] for el in pids if el.get('schema') == 'URN'])
+
+    authors = force_list(reference.get('authors'))
+    e_values = [el['full_name'] for el in authors if el.get('inspire_role') == 'editor']
+    h_values = [el['full_name'] for el in authors if el.get('inspire_role') != 'editor']
+
+    r_values = force_list(reference.get('report_numbers'))
+    if reference.get('arxiv_eprint'):
+        arxiv_eprint = reference['arxiv_eprint']
+        r_values.append('arXiv:' + arxiv_eprint if is_arxiv_post_2007(arxiv_eprint) else arxiv_eprint)
+
+    publication_info = reference.get('publication_info') or {}
+    if publication_info:
+        publication_info = convert_new_publication_info_to_old([publication_info])[0]
+    s_value = build_pubnote(
+        publication_info.get('journal_title'),
+        publication_info.get('journal_volume'),
+        publication_info.get('page_start'),
+        publication_info.get('page_end'),
+        publication_info.get('artid'),
+    )
+
+    m_value = ' / '.join(force_list(reference.get('misc')))
+
+    return {
+        '0': get_recid_from_ref(value.get('record')),
+        '9': 'CURATOR' if value.get('legacy_curated') else None,
+        'a': a_values,
+        'b': publication_info.get('cnum'),
+        'c': reference.get('collaborations'),
+        'e': e_values,
+        'h': h_values,
+        'i': reference.get('isbn'),
+        'k': reference.get('texkey'),
+        'm': m_value,
+        'o': reference.get('label'),
+        'p': _get_nested(reference, 'imprint', 'publisher'),
+        'q': publication_info.get('parent_title'),
+        'r': r_values,
+        's': s_value,
+        't': _get_nested(reference, 'title', 'title'),
+        'u': _get_each(reference.get('urls'), 'value'),
+        'x': _get_each(value.get('raw_refs'), 'value'),
+        'y': publication_info.get('year'),
+        'z': 1 if value.get('curated_relation') else 0,
+    }
+
+
+def _get_nested(obj, key, subkey):
+    value = obj.get(key)
+    if isinstance(value, dict):
+        return value.get(subkey)
+
+
+def _get_each(elements, key):
+    if elements is None:
+        return None
+    return [el[key] for el in force_list(elements) if key in el]
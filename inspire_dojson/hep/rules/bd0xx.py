@@ -27,17 +27,15 @@ from __future__ import absolute_import, division, print_function
 import re
 from collections import defaultdict
 
-import pycountry
-
 from dojson import utils
 from idutils import is_arxiv_post_2007, is_doi, is_handle, normalize_doi
 
-from inspire_schemas.api import load_schema
-from inspire_schemas.utils import normalize_arxiv_category
 from inspire_utils.helpers import force_list
 
 from ..model import hep, hep2marc
 from ...utils import force_single_element, normalize_isbn
+from ...utils.enums import ISBN_MEDIA, normalize_arxiv_category
+from ...utils.languages import get_alpha_2_from_name, get_name_from_alpha_2
 
 
 RE_LANGUAGE = re.compile('\/| or | and |,|=|\s+')
@@ -49,11 +47,8 @@ def isbns(self, key, value):
     """Populate the ``isbns`` key."""
     def _get_medium(value):
         def _normalize(medium):
-            schema = load_schema('hep')
-            valid_media = schema['properties']['isbns']['items']['properties']['medium']['enum']
-
             medium = medium.lower().replace('-', '').replace(' ', '')
-            if medium in valid_media:
+            if medium in ISBN_MEDIA:
                 return medium
             elif medium == 'ebook':
                 return 'online'
@@ -89,7 +84,7 @@ def isbns2marc(self, key, value):
     }
 
 
-@hep.over('dois', '^0247.')
+@hep.over('dois', '^0247.', side_effects=['persistent_identifiers'])
 def dois(self, key, value):
     """Populate the ``dois`` key.
 
@@ -170,7 +165,7 @@ def persistent_identifiers2marc(self, key, value):
     }
 
 
-@hep.over('texkeys', '^035..')
+@hep.over('texkeys', '^035..', side_effects=['_desy_bookkeeping', 'external_system_identifiers'])
 def texkeys(self, key, value):
     """Populate the ``texkeys`` key.
 
@@ -256,7 +251,7 @@ def texkeys2marc(self, key, value):
     return result
 
 
-@hep2marc.over('035', '^external_system_identifiers$')
+@hep2marc.over('035', '^external_system_identifiers$', side_effects=['970', 'id_dict'])
 def external_system_identifiers2marc(self, key, value):
     """Populate the ``035`` MARC field.
 
@@ -296,7 +291,7 @@ def external_system_identifiers2marc(self, key, value):
     return result_035
 
 
-@hep.over('arxiv_eprints', '^037..')
+@hep.over('arxiv_eprints', '^037..', side_effects=['report_numbers'])
 def arxiv_eprints(self, key, value):
     """Populate the ``arxiv_eprints`` key.
 
@@ -348,7 +343,7 @@ def arxiv_eprints(self, key, value):
     return arxiv_eprints
 
 
-@hep2marc.over('037', '^arxiv_eprints$')
+@hep2marc.over('037', '^arxiv_eprints$', side_effects=['035', '65017'])
 def arxiv_eprints2marc(self, key, values):
     """Populate the ``037`` MARC field.
 
@@ -415,11 +410,9 @@ def languages(self, key, value):
     values = force_list(value.get('a'))
     for value in values:
         for language in RE_LANGUAGE.split(value):
-            try:
-                name = language.strip().capitalize()
-                languages.append(pycountry.languages.get(name=name).alpha_2)
-            except KeyError:
-                pass
+            alpha_2 = get_alpha_2_from_name(language)
+            if alpha_2:
+                languages.append(alpha_2)
 
     return languages
 
@@ -428,4 +421,4 @@ def languages(self, key, value):
 @utils.for_each_value
 def languages2marc(self, key, value):
     """Populate the ``041`` MARC field."""
-    return {'a': pycountry.languages.get(alpha_2=value).name.lower()}
+    return {'a': get_name_from_alpha_2(value).lower()}
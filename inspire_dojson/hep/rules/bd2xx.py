@@ -24,14 +24,13 @@
 
 from __future__ import absolute_import, division, print_function
 
-import langdetect
-
 from dojson import utils
 
 from inspire_utils.helpers import force_list
 
 from ..model import hep, hep2marc
 from ...utils import normalize_date_aggressively
+from ...utils.language_detection import detect_language
 
 
 @hep.over('titles', '^(210|245|246|247)..')
@@ -57,14 +56,14 @@ def titles(self, key, value):
 def title_translations(self, key, value):
     """Populate the ``title_translations`` key."""
     return {
-        'language': langdetect.detect(value.get('a')),
+        'language': detect_language(value.get('a')),
         'source': value.get('9'),
         'subtitle': value.get('b'),
         'title': value.get('a'),
     }
 
 
-@hep2marc.over('246', '^titles$')
+@hep2marc.over('246', '^titles$', side_effects=['245'])
 def titles2marc(self, key, values):
     """Populate the ``246`` MARC field.
 
@@ -38,7 +38,7 @@ from ...utils import force_single_element, get_record_ref
 IS_DEFENSE_DATE = re.compile('Presented (on )?(?P<defense_date>.*)', re.IGNORECASE)
 
 
-@hep.over('public_notes', '^500..')
+@hep.over('public_notes', '^500..', side_effects=['curated', 'thesis_info'])
 def public_notes(self, key, value):
     """Populate the ``public_notes`` key.
 
@@ -129,7 +129,7 @@ def thesis_info(self, key, value):
     return thesis_info
 
 
-@hep2marc.over('502', '^thesis_info$')
+@hep2marc.over('502', '^thesis_info$', side_effects=['500'])
 def thesis_info2marc(self, key, value):
     """Populate the ``502`` MARC field.
 
@@ -302,7 +302,7 @@ def copyright2marc(self, key, value):
     }
 
 
-@hep.over('_private_notes', '^595.[^DH]')
+@hep.over('_private_notes', '^595.[^DH]', side_effects=['_export_to'])
 def _private_notes(self, key, value):
     """Populate the ``_private_notes`` key.
 
@@ -343,7 +343,7 @@ def _private_notes(self, key, value):
     return _private_notes
 
 
-@hep2marc.over('595', '^_private_notes$')
+@hep2marc.over('595', '^_private_notes$', side_effects=['595_H'])
 @utils.for_each_value
 def _private_notes2marc(self, key, value):
     """Populate the ``595`` MARC key.
@@ -398,7 +398,7 @@ def _desy_bookkeeping(self, key, value):
     }
 
 
-@hep2marc.over('595_D', '^_desy_bookkeeping$')
+@hep2marc.over('595_D', '^_desy_bookkeeping$', side_effects=['035'])
 @utils.for_each_value
 def _desy_bookkeeping2marc(self, key, value):
     """Populate the ``595_D`` MARC field.
@@ -86,7 +86,7 @@ def accelerator_experiments2marc(self, key, value):
     }
 
 
-@hep.over('keywords', '^(084|653|695)..')
+@hep.over('keywords', '^(084|653|695)..', side_effects=['energy_ranges'])
 def keywords(self, key, values):
     """Populate the ``keywords`` key.
 
@@ -128,7 +128,7 @@ def energy_ranges2marc(self, key, value):
         }
 
 
-@hep2marc.over('695', '^keywords$')
+@hep2marc.over('695', '^keywords$', side_effects=['084', '6531'])
 def keywords2marc(self, key, values):
     """Populate the ``695`` MARC field.
 
@@ -26,7 +26,6 @@ from __future__ import absolute_import, division, print_function
 
 from dojson import utils
 
-from inspire_schemas.api import load_schema
 from inspire_schemas.utils import (
     convert_new_publication_info_to_old,
     normalize_collaboration,
@@ -41,6 +40,7 @@ from ...utils import (
     get_record_ref,
     normalize_isbn,
 )
+from ...utils.enums import MATERIALS
 
 
 @hep.over('collaborations', '^710..')
@@ -79,13 +79,10 @@ def publication_info(self, key, value):
         return normalized_w_value
 
     def _get_material(value):
-        schema = load_schema('elements/material')
-        valid_materials = schema['enum']
-
         m_value = force_single_element(value.get('m', ''))
         normalized_m_value = m_value.lower()
 
-        if normalized_m_value in valid_materials:
+        if normalized_m_value in MATERIALS:
             return normalized_m_value
 
     def _get_parent_isbn(value):
@@ -125,7 +122,7 @@ def publication_info(self, key, value):
     }
 
 
-@hep2marc.over('773', '^publication_info$')
+@hep2marc.over('773', '^publication_info$', side_effects=['7731'])
 def publication_info2marc(self, key, values):
     """Populate the ``773`` MARC field.
 
@@ -193,7 +190,7 @@ def related_records_78708(self, key, value):
         }
 
 
-@hep2marc.over('78002', '^related_records$')
+@hep2marc.over('78002', '^related_records$', side_effects=['78708'])
 @utils.for_each_value
 def related_records2marc(self, key, value):
     """Populate the ``78002`` MARC field.
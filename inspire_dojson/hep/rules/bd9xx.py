@@ -24,21 +24,14 @@
 
 from __future__ import absolute_import, division, print_function
 
-from functools import partial
-
 from dojson import utils
-from idutils import is_arxiv_post_2007
 
-from inspire_schemas.api import ReferenceBuilder, load_schema
-from inspire_schemas.utils import (
-    build_pubnote,
-    convert_new_publication_info_to_old,
-)
-from inspire_utils.helpers import force_list, maybe_int
-from inspire_utils.record import get_value
+from inspire_utils.helpers import force_list
 
 from ..model import hep, hep2marc
-from ...utils import force_single_element, get_recid_from_ref, get_record_ref
+from ..references import marc_to_references, references_to_marc
+from ...utils import force_single_element, get_record_ref
+from ...utils.enums import PUBLICATION_TYPES
 
 COLLECTIONS_MAP = {
     'babar-analysisdocument': 'BABAR Analysis Documents',
@@ -129,7 +122,7 @@ def record_affiliations2marc(self, key, value):
     return {'a': value.get('value')}
 
 
-@hep.over('document_type', '^980..')
+@hep.over('document_type', '^980..', side_effects=['_collections', 'citeable', 'core', 'deleted', 'publication_type', 'refereed', 'withdrawn'])
 def document_type(self, key, value):
     """Populate the ``document_type`` key.
 
@@ -137,10 +130,6 @@ def document_type(self, key, value):
     ``refereed``, ``publication_type``, and ``withdrawn`` keys through side
     effects.
     """
-    schema = load_schema('hep')
-    publication_type_schema = schema['properties']['publication_type']
-    valid_publication_types = publication_type_schema['items']['enum']
-
     document_type = self.get('document_type', [])
     publication_type = self.get('publication_type', [])
 
@@ -164,7 +153,7 @@ def document_type(self, key, value):
             self.setdefault('_collections', []).append(COLLECTIONS_MAP[normalized_a_value])
         elif normalized_a_value in DOCUMENT_TYPE_MAP:
             document_type.append(DOCUMENT_TYPE_MAP[normalized_a_value])
-        elif normalized_a_value in valid_publication_types:
+        elif normalized_a_value in PUBLICATION_TYPES:
             publication_type.append(normalized_a_value)
 
     c_value = force_single_element(value.get('c', ''))
@@ -243,107 +232,14 @@ def publication_type2marc(self, key, value):
 
 
 @hep.over('references', '^999C5')
-@utils.for_each_value
-def references(self, key, value):
+def references(self, key, values):
     """Populate the ``references`` key."""
-    def _has_curator_flag(value):
-        normalized_nine_values = [el.upper() for el in force_list(value.get('9'))]
-        return 'CURATOR' in normalized_nine_values
-
-    def _is_curated(value):
-        return value.get('z') == '1' and _has_curator_flag(value)
-
-    def _set_record(el):
-        recid = maybe_int(el)
-        record = get_record_ref(recid, 'literature')
-        rb.set_record(record)
-
-    rb = ReferenceBuilder()
-    mapping = [
-        ('0', _set_record),
-        ('a', rb.add_uid),
-        ('b', rb.add_uid),
-        ('c', rb.add_collaboration),
-        ('e', partial(rb.add_author, role='ed.')),
-        ('h', rb.add_refextract_authors_str),
-        ('i', rb.add_uid),
-        ('k', rb.set_texkey),
-        ('m', rb.add_misc),
-        ('o', rb.set_label),
-        ('p', rb.set_publisher),
-        ('q', rb.add_parent_title),
-        ('r', rb.add_report_number),
-        ('s', rb.set_pubnote),
-        ('t', rb.add_title),
-        ('u', rb.add_url),
-        ('x', rb.add_raw_reference),
-        ('y', rb.set_year),
-    ]
-
-    for field, method in mapping:
-        for el in force_list(value.get(field)):
-            if el:
-                method(el)
-
-    if _is_curated(value):
-        rb.curate()
-
-    if _has_curator_flag(value):
-        rb.obj['legacy_curated'] = True
-
-    return rb.obj
+    references = self.get('references', [])
+    references.extend(marc_to_references(force_list(values)))
+    return references
 
 
 @hep2marc.over('999C5', '^references$')
-@utils.for_each_value
-def references2marc(self, key, value):
+def references2marc(self, key, values):
     """Populate the ``999C5`` MARC field."""
-    reference = value.get('reference', {})
-
-    pids = force_list(reference.get('persistent_identifiers'))
-    a_values = ['doi:' + el for el in force_list(reference.get('dois'))]
-    a_values.extend(['hdl:' + el['value'] for el in pids if el.get('schema') == 'HDL'])
-    a_values.extend(['urn:' + el['value'] for el in pids if el.get('schema') == 'URN'])
-
-    authors = force_list(reference.get('authors'))
-    e_values = [el['full_name'] for el in authors if el.get('inspire_role') == 'editor']
-    h_values = [el['full_name'] for el in authors if el.get('inspire_role') != 'editor']
-
-    r_values = force_list(reference.get('report_numbers'))
-    if reference.get('arxiv_eprint'):
-        arxiv_eprint = reference['arxiv_eprint']
-        r_values.append('arXiv:' + arxiv_eprint if is_arxiv_post_2007(arxiv_eprint) else arxiv_eprint)
-
-    if reference.get('publication_info'):
-        reference['publication_info'] = convert_new_publication_info_to_old([reference['publication_info']])[0]
-    journal_title = get_value(reference, 'publication_info.journal_title')
-    journal_volume = get_value(reference, 'publication_info.journal_volume')
-    page_start = get_value(reference, 'publication_info.page_start')
-    page_end = get_value(reference, 'publication_info.page_end')
-    artid = get_value(reference, 'publication_info.artid')
-    s_value = build_pubnote(journal_title, journal_volume, page_start, page_end, artid)
-
-    m_value = ' / '.join(force_list(reference.get('misc')))
-
-    return {
-        '0': get_recid_from_ref(value.get('record')),
-        '9': 'CURATOR' if value.get('legacy_curated') else None,
-        'a': a_values,
-        'b': get_value(reference, 'publication_info.cnum'),
-        'c': reference.get('collaborations'),
-        'e': e_values,
-        'h': h_values,
-        'i': reference.get('isbn'),
-        'k': reference.get('texkey'),
-        'm': m_value,
-        'o': reference.get('label'),
-        'p': get_value(reference, 'imprint.publisher'),
-        'q': get_value(reference, 'publication_info.parent_title'),
-        'r': r_values,
-        's': s_value,
-        't': get_value(reference, 'title.title'),
-        'u': get_value(reference, 'urls.value'),
-        'x': get_value(value, 'raw_refs.value'),
-        'y': get_value(reference, 'publication_info.year'),
-        'z': 1 if value.get('curated_relation') else 0,
-    }
+    return references_to_marc(force_list(values))
@@ -34,7 +34,7 @@ from ..model import hep, hep2marc
 from ...utils import absolute_url, afs_url
 
 
-@hep.over('documents', '^FFT[^%][^%]')
+@hep.over('documents', '^FFT[^%][^%]', side_effects=['figures'])
 @utils.for_each_value
 def documents(self, key, value):
     """Populate the ``documents`` key.
@@ -37,5 +37,10 @@ hepnames2marc_filters = [
     clean_record,
 ]
 
-hepnames = FilterOverdo(filters=hepnames_filters)
-hepnames2marc = FilterOverdo(filters=hepnames2marc_filters)
+rule_modules = [
+    'inspire_dojson.hepnames.rules',
+    'inspire_dojson.common.rules',
+]
+
+hepnames = FilterOverdo(filters=hepnames_filters, rule_modules=rule_modules)
+hepnames2marc = FilterOverdo(filters=hepnames2marc_filters, rule_modules=rule_modules)
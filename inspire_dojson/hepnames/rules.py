@@ -28,11 +28,6 @@ import re
 
 from dojson import utils
 
-from inspire_schemas.api import load_schema
-from inspire_schemas.utils import (
-    normalize_arxiv_category,
-    valid_arxiv_categories,
-)
 from inspire_utils.date import normalize_date
 from inspire_utils.helpers import force_list, maybe_int
 from inspire_utils.name import normalize_name
@@ -44,6 +39,13 @@ from ..utils import (
     get_recid_from_ref,
     normalize_rank
 )
+from ..utils.enums import (
+    ARXIV_CATEGORIES,
+    ARXIV_CATEGORIES_BY_LOWERCASE,
+    INSPIRE_CATEGORIES,
+    INSPIRE_CATEGORIES_BY_LOWERCASE,
+    normalize_arxiv_category,
+)
 
 
 INSPIRE_BAI = re.compile('(\w+\.)+\d+')
@@ -107,7 +109,7 @@ def ids(self, key, value):
         }
 
 
-@hepnames2marc.over('035', '^ids$')
+@hepnames2marc.over('035', '^ids$', side_effects=['970'])
 @utils.for_each_value
 def ids2marc(self, key, value):
     """Populate the ``035`` MARC field.
@@ -145,7 +147,7 @@ def ids2marc(self, key, value):
         }
 
 
-@hepnames.over('name', '^100..')
+@hepnames.over('name', '^100..', side_effects=['status'])
 def name(self, key, value):
     """Populate the ``name`` key.
 
@@ -272,32 +274,24 @@ def other_names2marc(self, key, value):
     return {'a': value}
 
 
-@hepnames.over('arxiv_categories', '^65017')
+@hepnames.over('arxiv_categories', '^65017', side_effects=['inspire_categories'])
 def arxiv_categories(self, key, value):
     """Populate the ``arxiv_categories`` key.
 
     Also populates the ``inspire_categories`` key through side effects.
     """
     def _is_arxiv(category):
-        return category in valid_arxiv_categories()
+        return category in ARXIV_CATEGORIES
 
     def _is_inspire(category):
-        schema = load_schema('elements/inspire_field')
-        valid_inspire_categories = schema['properties']['term']['enum']
-
-        return category in valid_inspire_categories
+        return category in INSPIRE_CATEGORIES
 
     def _normalize(a_value):
-        for category in valid_arxiv_categories():
-            if a_value.lower() == category.lower():
-                return normalize_arxiv_category(category)
-
-        schema = load_schema('elements/inspire_field')
-        valid_inspire_categories = schema['properties']['term']['enum']
+        if a_value.lower() in ARXIV_CATEGORIES_BY_LOWERCASE:
+            return normalize_arxiv_category(ARXIV_CATEGORIES_BY_LOWERCASE[a_value.lower()])
 
-        for category in valid_inspire_categories:
-            if a_value.lower() == category.lower():
-                return category
+        if a_value.lower() in INSPIRE_CATEGORIES_BY_LOWERCASE:
+            return INSPIRE_CATEGORIES_BY_LOWERCASE[a_value.lower()]
 
         field_codes_to_inspire_categories = {
             'a': 'Astrophysics',
@@ -508,7 +502,7 @@ def native_name2marc(self, key, value):
     return {'a': value}
 
 
-@hepnames.over('new_record', '^970..')
+@hepnames.over('new_record', '^970..', side_effects=['ids'])
 def new_record(self, key, value):
     """Populate the ``new_record`` key.
 
@@ -532,7 +526,7 @@ def new_record(self, key, value):
     return new_record
 
 
-@hepnames.over('deleted', '^980..')
+@hepnames.over('deleted', '^980..', side_effects=['stub'])
 def deleted(self, key, value):
     """Populate the ``deleted`` key.
 
@@ -24,9 +24,10 @@
 
 from __future__ import absolute_import, division, print_function
 
-from ..model import FilterOverdo, add_schema, add_collection, clean_record
+from ..model import FilterOverdo, add_schema, add_collection, clean_record, filter_keys
 
 
+@filter_keys(['addresses', '_location'])
 def combine_addresses_and_location(record, blob):
     if not record.get('addresses') or not record.get('_location'):
         return record
@@ -45,4 +46,9 @@ filters = [
     clean_record,
 ]
 
-institutions = FilterOverdo(filters=filters)
+rule_modules = [
+    'inspire_dojson.institutions.rules',
+    'inspire_dojson.common.rules',
+]
+
+institutions = FilterOverdo(filters=filters, rule_modules=rule_modules)
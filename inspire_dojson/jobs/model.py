@@ -33,4 +33,9 @@ filters = [
     clean_record,
 ]
 
-jobs = FilterOverdo(filters=filters)
+rule_modules = [
+    'inspire_dojson.jobs.rules',
+    'inspire_dojson.common.rules',
+]
+
+jobs = FilterOverdo(filters=filters, rule_modules=rule_modules)
@@ -44,7 +44,7 @@ from ..utils import (
 COMMA_OR_SLASH = re.compile('\s*[/,]\s*')
 
 
-@jobs.over('closed_date', '^046..')
+@jobs.over('closed_date', '^046..', side_effects=['deadline_date', 'reference_email', 'urls'])
 def date_closed(self, key, value):
     def _contains_email(val):
         return '@' in val
@@ -33,4 +33,9 @@ filters = [
     clean_record,
 ]
 
-journals = FilterOverdo(filters=filters)
+rule_modules = [
+    'inspire_dojson.journals.rules',
+    'inspire_dojson.common.rules',
+]
+
+journals = FilterOverdo(filters=filters, rule_modules=rule_modules)
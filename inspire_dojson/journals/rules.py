@@ -174,7 +174,7 @@ def public_notes_680(self, key, value):
         }
 
 
-@journals.over('proceedings', '^690..')
+@journals.over('proceedings', '^690..', side_effects=['refereed'])
 def proceedings(self, key, value):
     """Populate the ``proceedings`` key.
 
@@ -199,7 +199,7 @@ def proceedings(self, key, value):
     return proceedings
 
 
-@journals.over('short_title', '^711..')
+@journals.over('short_title', '^711..', side_effects=['title_variants'])
 def short_title(self, key, value):
     """Populate the ``short_title`` key.
 
@@ -225,7 +225,7 @@ def title_variants(self, key, value):
     return value.get('a')
 
 
-@journals.over('deleted', '^980..')
+@journals.over('deleted', '^980..', side_effects=['book_series'])
 def deleted(self, key, value):
     """Populate the ``deleted`` key.
 
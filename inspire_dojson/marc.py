@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Compact, read-only representation of MARC records.
+
+:func:`create_marc_record` parses MARCXML like
+:func:`dojson.contrib.marc21.utils.create_record`, but builds every record
+and field once, as a :class:`MarcDict`: a ``dict`` without per-instance
+attributes that stores, for each key, the tuple of its values, and under
+``__order__`` the keys in the order in which they appear. This is the same
+data that a ``GroupableOrderedDict`` stores, so the rules read it through
+the same interface, without the linked list of an ``OrderedDict`` and
+without copying each field when the record is built.
+
+:func:`read_iso2709` and :func:`read_marc_in_json` read records in the
+binary format of MARC 21 and in MARC-in-JSON, giving the same records that
+:func:`create_marc_record` gives for the corresponding MARCXML.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+from collections import Counter
+from io import BytesIO
+
+from lxml import etree
+from six import StringIO, binary_type, iteritems, text_type
+
+from dojson.utils import GroupableOrderedDict
+
+FIELD_TERMINATOR = b'\x1e'
+SUBFIELD_DELIMITER = u'\x1f'
+
+
+class MarcDict(dict):
+    """Immutable mapping from MARC keys to their values, in order.
+
+    Reading it behaves like reading a ``GroupableOrderedDict``: a key with
+    a single value returns the value, a repeated key returns the tuple of
+    its values, and ``iteritems(repeated=True)`` yields the values in the
+    order in which they were given.
+
+    Args:
+        pairs: the ``(key, value)`` pairs, where a repeated key appears
+            once for each of its values.
+
+    """
+
+    __slots__ = ()
+
+    def __init__(self, pairs=()):
+        values = {}
+        order = []
+        for key, value in pairs:
+            order.append(key)
+            try:
+                values[key].append(value)
+            except KeyError:
+                values[key] = [value]
+
+        for key in order:
+            if key not in self:
+                dict.__setitem__(self, key, tuple(values[key]))
+        dict.__setitem__(self, '__order__', tuple(order))
+
+    def __repr__(self):
+        out = ('({!r}, {!r})'.format(k, v) for k, v in self.iteritems(with_order=False, repeated=True))
+        return 'MarcDict(({}))'.format(', '.join(out))
+
+    __str__ = __repr__
+
+    def __reduce__(self):
+        return self.__class__, (self.items(with_order=False, repeated=True),)
+
+    def __getitem__(self, key):
+        item = dict.__getitem__(self, key)
+        if len(item) == 1 and key != '__order__':
+            return item[0]
+        return item
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, *args, **kwargs):
+        raise TypeError('MarcDict object does not support item assignment')
+
+    def __delitem__(self, *args, **kwargs):
+        raise TypeError('MarcDict object does not support item deletion')
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('MarcDict object is immutable')
+
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __iter__(self):
+        yield '__order__'
+        for key in self.keys():
+            yield key
+
+    def keys(self, repeated=False):
+        order = dict.__getitem__(self, '__order__')
+        if repeated:
+            return list(order)
+
+        seen = set()
+        return [key for key in order if not (key in seen or seen.add(key))]
+
+    def values(self, expand=False):
+        if expand:
+            return [value for _, value in self.iteritems(with_order=False, repeated=True)]
+        return [self[key] for key in self.keys()]
+
+    def items(self, with_order=True, repeated=False):
+        return tuple(self.iteritems(with_order, repeated))
+
+    def iteritems(self, with_order=True, repeated=False):
+        order = dict.__getitem__(self, '__order__')
+        if with_order:
+            yield '__order__', order
+
+        if not repeated:
+            for key in self.keys():
+                yield key, self[key]
+        elif len(order) == len(self) - 1:
+            # No key is repeated, so each key has a single value.
+            for key in order:
+                yield key, dict.__getitem__(self, key)[0]
+        else:
+            occurrences = Counter()
+            for key in order:
+                yield key, dict.__getitem__(self, key)[occurrences[key]]
+                occurrences[key] += 1
+
+    def to_groupable(self):
+        """Return a copy of this record as a ``GroupableOrderedDict``.
+
+        The fields are copied too, for the code that expects them to be
+        instances of ``GroupableOrderedDict``.
+        """
+        return GroupableOrderedDict([
+            (key, value.to_groupable() if isinstance(value, MarcDict) else value)
+            for key, value in self.iteritems(with_order=False, repeated=True)
+        ])
+
+
+def create_marc_record(marcxml):
+    """Create a :class:`MarcDict` from a MARCXML record.
+
+    Gives a record equal to
+    ``create_record(marcxml, keep_singletons=False)``, with its fields
+    also being instances of :class:`MarcDict`.
+
+    Args:
+        marcxml: a string, or bytes encoded in UTF-8, containing MARCXML,
+            or an already parsed element or tree.
+
+    Returns:
+        MarcDict: the record.
+
+    """
+    if isinstance(marcxml, (binary_type, text_type)):
+        marcxml = _parse_marcxml(marcxml)
+
+    return _create_record(
+        [leader.text or '' for leader in marcxml.iter('{*}leader')],
+        [(controlfield.get('tag', '!'), controlfield.text) for controlfield in marcxml.iter('{*}controlfield')],
+        (
+            (
+                datafield.get('tag', '!'),
+                datafield.get('ind1', '!'),
+                datafield.get('ind2', '!'),
+                [(subfield.get('code', '!'), subfield.text) for subfield in datafield.iter('{*}subfield')],
+            )
+            for datafield in marcxml.iter('{*}datafield')
+        ),
+    )
+
+
+def _parse_marcxml(marcxml):
+    if isinstance(marcxml, binary_type):
+        marcxml = marcxml.decode('utf-8')
+    return etree.parse(StringIO(marcxml), etree.XMLParser(recover=True))
+
+
+def read_iso2709(stream):
+    """Read MARC 21 records in the ISO 2709 format, one record at a time.
+
+    The records must be encoded in UTF-8, MARC-8 is not supported.
+    Whitespace between records, like a newline after each one, is skipped.
+
+    Args:
+        stream: a binary file object, like an open file or a memory-mapped
+            file, or bytes.
+
+    Yields:
+        MarcDict: each record, like :func:`create_marc_record` creates it
+        from the corresponding MARCXML.
+
+    Raises:
+        ValueError: when a record is malformed or truncated.
+
+    """
+    if isinstance(stream, binary_type):
+        stream = BytesIO(stream)
+
+    while True:
+        data = _read_iso2709_record(stream)
+        if not data:
+            return
+        yield _parse_iso2709_record(data)
+
+
+def read_marc_in_json(stream):
+    """Read MARC records in line-delimited MARC-in-JSON, one record at a time.
+
+    Each line is a record like
+    ``{"leader": "...", "fields": [{"001": "..."}, {"245": {"ind1": " ",
+    "ind2": " ", "subfields": [{"a": "..."}]}}]}``. Empty lines are skipped.
+
+    Args:
+        stream: a file object, like an open file or a memory-mapped file,
+            or an iterable of lines.
+
+    Yields:
+        MarcDict: each record, like :func:`create_marc_record` creates it
+        from the corresponding MARCXML.
+
+    """
+    readline = getattr(stream, 'readline', None)
+    lines = stream if readline is None else iter(readline, stream.read(0))
+
+    for line in lines:
+        if isinstance(line, binary_type):
+            line = line.decode('utf-8')
+        if line.strip():
+            yield _parse_marc_in_json_record(json.loads(line))
+
+
+def _read_iso2709_record(stream):
+    head = stream.read(5).lstrip()
+    while head and len(head) < 5:
+        chunk = stream.read(5 - len(head))
+        if not chunk:
+            break
+        head = (head + chunk).lstrip()
+
+    if not head:
+        return None
+    if not head.isdigit() or len(head) < 5:
+        raise ValueError('Invalid record length: {!r}'.format(head))
+
+    length = int(head)
+    data = head + stream.read(length - 5)
+    if len(data) < length:
+        raise ValueError('Truncated record of length {}: {!r}'.format(length, data[:24]))
+
+    return data
+
+
+def _parse_iso2709_record(data):
+    try:
+        leader = data[:24].decode('ascii')
+        base_address = int(leader[12:17])
+        indicator_count = int(leader[10])
+        length_size = int(leader[20])
+        start_size = int(leader[21])
+        directory = data[24:data.index(FIELD_TERMINATOR, 24)]
+    except ValueError:
+        raise ValueError('Invalid leader: {!r}'.format(data[:24]))
+
+    entry_size = 3 + length_size + start_size
+    controlfields = []
+    datafields = []
+    for position in range(0, len(directory) - entry_size + 1, entry_size):
+        entry = directory[position:position + entry_size].decode('ascii')
+        length = int(entry[3:3 + length_size])
+        start = base_address + int(entry[3 + length_size:])
+
+        tag = entry[:3]
+        value = data[start:start + length]
+        if value.endswith(FIELD_TERMINATOR):
+            value = value[:-1]
+        value = value.decode('utf-8')
+
+        if tag.startswith('00'):
+            controlfields.append((tag, value))
+        else:
+            datafields.append((
+                tag,
+                value[:1],
+                value[1:2],
+                [(subfield[:1], subfield[1:]) for subfield in value[indicator_count:].split(SUBFIELD_DELIMITER)[1:]],
+            ))
+
+    return _create_record([leader], controlfields, datafields)
+
+
+def _parse_marc_in_json_record(record):
+    leaders = [record['leader']] if 'leader' in record else []
+    controlfields = []
+    datafields = []
+    for field in record.get('fields', []):
+        for tag, value in iteritems(field):
+            if isinstance(value, dict):
+                datafields.append((
+                    tag,
+                    value.get('ind1', ' '),
+                    value.get('ind2', ' '),
+                    [pair for subfield in value.get('subfields', []) for pair in iteritems(subfield)],
+                ))
+            else:
+                controlfields.append((tag, value))
+
+    return _create_record(leaders, controlfields, datafields)
+
+
+def _create_record(leaders, controlfields, datafields):
+    # Builds the record like ``create_record(keep_singletons=False)``: the
+    # leaders, then the control fields and then the data fields, skipping
+    # the empty values and the fields without values.
+    fields = [('leader', leader) for leader in leaders]
+    fields.extend((tag, text) for tag, text in controlfields if text)
+
+    for tag, ind1, ind2, subfields in datafields:
+        subfields = [(code.lower(), text) for code, text in subfields if text]
+        if subfields:
+            fields.append((tag + _get_indicator(ind1) + _get_indicator(ind2), MarcDict(subfields)))
+
+    return MarcDict(fields)
+
+
+def _get_indicator(indicator):
+    if indicator in ('', '#'):
+        return '_'
+    return indicator.replace(' ', '_')
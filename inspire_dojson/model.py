@@ -24,31 +24,494 @@
 
 Allows for a list of filters to be passed during instantiation,
 which are applied in succession to the result of the DoJSON rules.
+
+The modules defining the rules are imported the first time the rules are
+needed, so that importing a model is cheap.
+
+Rules and filters can declare which keys of the output they share with
+others, so that a record can be converted again incrementally, running
+only the rules and filters affected by the keys that changed, or can be
+converted only in part, running only those needed by the requested keys.
 """
 
 from __future__ import absolute_import, division, print_function
 
+import re
+import threading
+import timeit
+from collections import defaultdict, namedtuple
+from functools import wraps
+from importlib import import_module
+
+from six import iteritems
+
 from dojson import Overdo
+from dojson.errors import IgnoreKey
+from dojson.overdo import Index
+from dojson.utils import GroupableOrderedDict
+
+from .marc import MarcDict
+from .utils import strip_empty_values_and_dedupe_lists
+
+
+RE_LITERAL_KEY = re.compile(r'^\^?([0-9A-Za-z_]+)\$?$')
+
+FilterKeys = namedtuple('FilterKeys', ['keys', 'blob_keys', 'per_key'])
+
+
+class MemoizedIndex(Index):
+    """Index that remembers which rule matches each key.
+
+    Keys are matched against the rule regexes only the first time they are
+    seen, every following lookup is a dictionary access. Keys that appear
+    literally in a regex, like ``^65017`` or ``^control_number$``, are
+    looked up in advance.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(MemoizedIndex, self).__init__(*args, **kwargs)
+        self._cache = {}
+
+        for regex, _ in self.rules:
+            match = RE_LITERAL_KEY.match(regex)
+            if match:
+                self.query(match.group(1))
+
+    def query(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            result = self._cache[key] = super(MemoizedIndex, self).query(key)
+            return result
+
+
+class RuleProfiler(object):
+    """Call counts and wall times of the rules and filters of a rule set.
+
+    Rules are reported by the module and name of their function, followed
+    by the regex of the keys they convert, like
+    ``inspire_dojson.hep.rules.bd2xx.titles:^(210|245|246|247)..``, as
+    different rules can have the same name.
+    """
+
+    def __init__(self):
+        self.rules = {}
+        self.filters = {}
+
+    def call(self, stats, name, func, *args):
+        start = timeit.default_timer()
+        try:
+            return func(*args)
+        except IgnoreKey:
+            raise
+        except Exception:
+            self._get_entry(stats, name)['exceptions'] += 1
+            raise
+        finally:
+            elapsed = timeit.default_timer() - start
+            entry = self._get_entry(stats, name)
+            entry['calls'] += 1
+            entry['total_time'] += elapsed
+            entry['max_time'] = max(entry['max_time'], elapsed)
+
+    def wrap_rule(self, regex, creator):
+        name = '{}.{}:{}'.format(creator.__module__, creator.__name__, regex)
+
+        @wraps(creator)
+        def _profiled(*args):
+            return self.call(self.rules, name, creator, *args)
+
+        return _profiled
+
+    def report(self):
+        return {
+            'filters': _copy_entries(self.filters),
+            'rules': _copy_entries(self.rules),
+        }
+
+    def reset(self):
+        self.rules.clear()
+        self.filters.clear()
+
+    @staticmethod
+    def _get_entry(stats, name):
+        try:
+            return stats[name]
+        except KeyError:
+            entry = stats[name] = {
+                'calls': 0,
+                'exceptions': 0,
+                'max_time': 0.0,
+                'total_time': 0.0,
+            }
+            return entry
+
 
-from .utils import dedupe_all_lists, strip_empty_values
+def _copy_entries(stats):
+    return {name: dict(entry) for name, entry in stats.items()}
 
 
 class FilterOverdo(Overdo):
 
-    def __init__(self, filters=None, *args, **kwargs):
+    def __init__(self, filters=None, rule_modules=None, *args, **kwargs):
         super(FilterOverdo, self).__init__(*args, **kwargs)
         self.filters = filters or []
+        self.rule_modules = rule_modules or []
+        self.profiler = None
+        self.side_effects = defaultdict(set)
+        self._groups = None
+        self._build_lock = threading.Lock()
+
+    def over(self, name, *source_tags, **kwargs):
+        """Register a rule.
+
+        Args:
+            name(str): the key of the output populated by the rule.
+            source_tags: the regexes of the keys of the input it converts.
+            side_effects(list): the other keys of the output that the rule
+                reads or writes, if any.
+
+        """
+        self.side_effects[name].update(kwargs.pop('side_effects', ()))
+        return super(FilterOverdo, self).over(name, *source_tags, **kwargs)
+
+    def _collect_entry_points(self):
+        for name in self.rule_modules:
+            import_module(name)
+
+        super(FilterOverdo, self)._collect_entry_points()
+
+    def build(self):
+        # Threads converting their first records all try to build the
+        # index, only the first one does it, while the others wait for it.
+        # The rules and the index are replaced only once they are complete,
+        # as the rules may be in use by a thread dispatching against them.
+        with self._build_lock:
+            if self.index is not None:
+                return
+
+            self._collect_entry_points()
+
+            # Rules are matched in order, which must not depend on the order
+            # in which the rule modules happened to be imported.
+            positions = {name: position for position, name in enumerate(self.rule_modules)}
+            rules = sorted(
+                self.rules,
+                key=lambda rule: positions.get(getattr(rule[1][1], '__module__', None), len(positions)),
+            )
+
+            indexed_rules = rules
+            if self.profiler is not None:
+                indexed_rules = [
+                    (regex, (name, self.profiler.wrap_rule(regex, creator)))
+                    for regex, (name, creator) in rules
+                ]
+
+            index = MemoizedIndex(indexed_rules)
+
+            self.rules = rules
+            self._groups = None
+            self.index = index
 
     def do(self, blob, **kwargs):
-        result = super(FilterOverdo, self).do(blob, **kwargs)
+        """Convert a blob.
 
-        for filter_ in self.filters:
-            result = filter_(result, blob)
+        Args:
+            blob: the blob to convert.
+            only(list): the keys of the output to compute. Only the rules
+                and filters needed to compute them are run, see
+                :meth:`get_required_keys`. It can't be combined with the
+                other options of ``Overdo.do``.
+
+        Returns:
+            dict: the converted record.
+
+        """
+        only = kwargs.pop('only', None)
+        if only is not None:
+            if kwargs:
+                raise TypeError('only cannot be combined with other options')
+            return self._do_only(_iter_fields(blob), blob, only)
+
+        if isinstance(blob, MarcDict):
+            if kwargs:
+                return self.do(blob.to_groupable(), **kwargs)
+            if self.index is None:
+                self.build()
+            result = self._do_fields(blob.iteritems(with_order=False, repeated=True))
+        else:
+            result = super(FilterOverdo, self).do(blob, **kwargs)
+        return self._apply_filters(self.filters, result, blob)
+
+    def do_marc(self, marc, only=None):
+        """Convert the MARC output of another rule set.
+
+        Gives the same result as
+        ``self.do(create_record_from_dict(marc))``, but the fields are
+        passed to the rules as they are, without building a
+        ``GroupableOrderedDict`` first: each element of a list is a
+        repeated field, like ``create_record_from_dict`` interprets it.
+
+        Args:
+            marc(dict): MARC fields, like the ones produced by
+                :data:`inspire_dojson.cds.cds2hep_marc`.
+            only(list): the keys of the output to compute, as in :meth:`do`.
+
+        Returns:
+            dict: the converted record.
+
+        """
+        if only is not None:
+            return self._do_only(_iter_marc_fields(marc), marc, only)
+
+        if self.index is None:
+            self.build()
+
+        result = self._do_fields(_iter_marc_fields(marc))
+        return self._apply_filters(self.filters, result, marc)
+
+    def get_required_keys(self, keys):
+        """Return the keys of the output needed to compute some keys.
+
+        These are the keys that some rule or filter uses together with the
+        requested ones, as declared with the ``side_effects`` of the rules
+        and with :func:`filter_keys`.
+
+        Args:
+            keys(list): keys of the output.
+
+        Returns:
+            set: the keys whose rules must be run, or ``None`` when a
+            filter doesn't declare its keys, and the blob must be
+            converted in full.
+
+        """
+        groups = self._get_cached_groups()
+        if not groups:
+            return None
+
+        names = set()
+        for key in keys:
+            names.update(name for name in groups.get(key, (key,)) if not isinstance(name, tuple))
+
+        return names
+
+    def do_incremental(self, old_blob, new_blob, old_record):
+        """Convert a blob by updating the conversion of a previous version.
+
+        The keys of the output are partitioned into groups of keys that
+        some rule or filter uses together. Only the groups whose fields
+        changed between the two blobs are converted again, by running
+        their rules on ``new_blob`` and then the filters that use them.
+        When a filter doesn't declare its keys with :func:`filter_keys`,
+        the blob is converted in full.
+
+        Args:
+            old_blob: the previous version of the blob.
+            new_blob: the current version of the blob.
+            old_record(dict): the conversion of ``old_blob``.
+
+        Returns:
+            dict: the conversion of ``new_blob``. The values that did not
+            change are shared with ``old_record``.
+
+        """
+        if not self._get_cached_groups():
+            return self.do(new_blob)
+
+        old_fields = self._get_fields_by_group(old_blob)
+        new_fields = self._get_fields_by_group(new_blob)
+        changed_groups = {
+            group for group in set(old_fields) | set(new_fields)
+            if old_fields.get(group) != new_fields.get(group)
+        }
+
+        names = set()
+        for group in changed_groups:
+            names.update(name for name in group if not isinstance(name, tuple))
+
+        filters = self._get_filters(names)
+        result = self._apply_filters(filters, self._do_fields(_iter_fields(new_blob), names), new_blob) or {}
+
+        record = {key: value for key, value in iteritems(old_record) if key not in names}
+        record.update(result)
+
+        return record
+
+    def enable_profiling(self):
+        """Record call counts and wall times of the rules and filters.
+
+        Returns:
+            RuleProfiler: the profiler collecting the statistics.
+
+        """
+        if self.profiler is None:
+            self.profiler = RuleProfiler()
+            self.index = None
+
+        return self.profiler
+
+    def disable_profiling(self):
+        """Stop recording, so that rules and filters are called directly."""
+        if self.profiler is not None:
+            self.profiler = None
+            self.index = None
+
+    def _apply_filters(self, filters, result, blob):
+        profiler = self.profiler
+        for filter_ in filters:
+            if profiler is None:
+                result = filter_(result, blob)
+            else:
+                name = getattr(filter_, '__name__', repr(filter_))
+                result = profiler.call(profiler.filters, name, filter_, result, blob)
 
         return result
 
+    def _do_only(self, fields, blob, keys):
+        keys = set(keys)
+        names = self.get_required_keys(keys)
+        if names is None:
+            result = self._apply_filters(self.filters, self._do_fields(fields), blob)
+        else:
+            result = self._apply_filters(self._get_filters(names), self._do_fields(fields, names), blob)
+
+        return {key: value for key, value in iteritems(result or {}) if key in keys}
+
+    def _get_filters(self, names):
+        return [
+            filter_ for filter_ in self.filters
+            if filter_.filter_keys.per_key or filter_.filter_keys.keys & names
+        ]
+
+    def _do_fields(self, fields, names=None):
+        output = {}
+        for key, value in fields:
+            rule = self.index.query(key)
+            if not rule or (names is not None and rule[0] not in names):
+                continue
+
+            name, creator = rule
+            try:
+                data = creator(output, key, value)
+            except IgnoreKey:
+                continue
+
+            if getattr(creator, '__extend__', False):
+                existing = output.get(name, [])
+                existing.extend(data)
+                output[name] = existing
+            else:
+                output[name] = data
+
+        return output
+
+    def _get_cached_groups(self):
+        if self.index is None:
+            self.build()
+        if self._groups is None:
+            self._groups = self._get_groups()
+
+        return self._groups
+
+    def _get_groups(self):
+        # Maps each key of the output, and each ``('blob', key)`` read by a
+        # filter, to the group of keys used together with it. It is empty
+        # when a filter doesn't declare its keys.
+        parents = {}
+
+        def _find(name):
+            parents.setdefault(name, name)
+            while parents[name] != name:
+                name = parents[name]
+            return name
+
+        def _union(names):
+            roots = [_find(name) for name in names]
+            for root in roots[1:]:
+                parents[root] = roots[0]
+
+        for _, (name, _) in self.rules:
+            _union([name] + sorted(self.side_effects.get(name, ())))
+
+        for filter_ in self.filters:
+            declared = getattr(filter_, 'filter_keys', None)
+            if declared is None:
+                return {}
+            if declared.per_key:
+                continue
+
+            names = sorted(declared.keys)
+            for blob_key in declared.blob_keys:
+                names.append(('blob', blob_key))
+                rule = self.index.query(blob_key)
+                if rule:
+                    names.append(rule[0])
+            _union(names)
+
+        members = defaultdict(set)
+        for name in parents:
+            members[_find(name)].add(name)
+
+        return {name: frozenset(members[_find(name)]) for name in parents}
+
+    def _get_fields_by_group(self, blob):
+        groups = self._groups
+        group_by_key = {}
+
+        fields = defaultdict(list)
+        for key, value in _iter_fields(blob):
+            try:
+                group = group_by_key[key]
+            except KeyError:
+                rule = self.index.query(key)
+                name = rule[0] if rule else ('blob', key)
+                group = group_by_key[key] = groups.get(name)
+
+            if group is not None:
+                if isinstance(value, (GroupableOrderedDict, MarcDict)):
+                    # Compares the tuples stored by the dictionary, which
+                    # is much faster than iterating over its subfields.
+                    value = tuple(dict.items(value))
+                fields[group].append((key, value))
+
+        return fields
+
+
+def _iter_fields(blob):
+    if isinstance(blob, (GroupableOrderedDict, MarcDict)):
+        return blob.iteritems(with_order=False, repeated=True)
+    return iteritems(blob)
+
+
+def _iter_marc_fields(marc):
+    for key, values in iteritems(marc):
+        if isinstance(values, (list, tuple)):
+            for value in values:
+                yield key, value
+        else:
+            yield key, values
+
+
+def filter_keys(keys=(), blob_keys=(), per_key=False):
+    """Declare the keys used by a filter, for incremental conversions.
+
+    Args:
+        keys(list): the keys of the output that the filter reads or writes.
+        blob_keys(list): the keys of the blob that it reads.
+        per_key(bool): whether it transforms every key of the output
+            independently of the others, in which case it is always run.
+
+    """
+    def _filter_keys(filter_):
+        filter_.filter_keys = FilterKeys(frozenset(keys), frozenset(blob_keys), per_key)
+        return filter_
+
+    return _filter_keys
+
 
 def add_schema(schema):
+    @filter_keys(['$schema'])
     def _add_schema(record, blob):
         record['$schema'] = schema
         return record
@@ -57,6 +520,7 @@ def add_schema(schema):
 
 
 def add_collection(name):
+    @filter_keys(['_collections'])
     def _add_collection(record, blob):
         record['_collections'] = [name]
         return record
@@ -64,5 +528,6 @@ def add_collection(name):
     return _add_collection
 
 
+@filter_keys(per_key=True)
 def clean_record(record, blob):
-    return dedupe_all_lists(strip_empty_values(record))
+    return strip_empty_values_and_dedupe_lists(record)
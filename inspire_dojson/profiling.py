@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Per-rule profiling of the conversions.
+
+Profiling is off by default, in which case rules and filters are called
+directly. Once enabled, every call of a rule or filter is timed and counted,
+and the statistics are reported per rule set.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+
+from .api import _get_rule_sets
+
+
+def enable_profiling(*names):
+    """Start profiling some rule sets.
+
+    Args:
+        names: the names of the rule sets to profile, like ``hep`` or
+            ``hep2marc``. Defaults to all of them.
+
+    """
+    for rule_set in _get_rule_sets(names).values():
+        rule_set.enable_profiling()
+
+
+def disable_profiling(*names):
+    """Stop profiling some rule sets, discarding their statistics.
+
+    Args:
+        names: the names of the rule sets. Defaults to all of them.
+
+    """
+    for rule_set in _get_rule_sets(names).values():
+        rule_set.disable_profiling()
+
+
+def reset_profiling(*names):
+    """Reset the statistics of some rule sets, without disabling profiling.
+
+    Args:
+        names: the names of the rule sets. Defaults to all of them.
+
+    """
+    for rule_set in _get_rule_sets(names).values():
+        if rule_set.profiler is not None:
+            rule_set.profiler.reset()
+
+
+def get_profiling_report(*names):
+    """Get the statistics of the profiled rule sets.
+
+    Args:
+        names: the names of the rule sets. Defaults to all of them.
+
+    Returns:
+        dict: for every profiled rule set, the call count, the number of
+        exceptions raised, and the total and maximum wall time in seconds
+        of each rule and filter that was called. Rules are reported as
+        described in :class:`inspire_dojson.model.RuleProfiler`.
+
+    """
+    return {
+        name: rule_set.profiler.report()
+        for name, rule_set in _get_rule_sets(names).items()
+        if rule_set.profiler is not None
+    }
+
+
+def dump_profiling_report(fp, *names):
+    """Write the statistics of the profiled rule sets as JSON.
+
+    Args:
+        fp: a file-like object open for writing text.
+        names: the names of the rule sets. Defaults to all of them.
+
+    """
+    json.dump(get_profiling_report(*names), fp, indent=2, sort_keys=True)
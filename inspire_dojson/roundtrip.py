@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Check that records survive a round trip through MARC.
+
+The HEP and HEPNames rules are meant to be lossless: a record converted to
+JSON, back to MARC and again to JSON is expected to be unchanged. This
+module runs that round trip over a corpus, on a pool of processes, and
+reports which MARC tags and which JSON keys were lost, and which records
+took the longest. Run it on MARCXML collections with::
+
+    $ python -m inspire_dojson.roundtrip records.xml
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import heapq
+import json
+import sys
+import time
+from collections import defaultdict
+from multiprocessing import Pool, cpu_count
+
+from lxml.etree import iterparse, tostring
+from six import iteritems, string_types, text_type
+
+from inspire_utils.helpers import force_list
+
+from .api import _get_rule_set_name, record2marcxml
+from .bulk import _chunked, _init_worker
+from .context import get_context, use_context
+from .hep import hep
+from .hepnames import hepnames
+from .marc import MarcDict, create_marc_record
+
+RULE_SETS = {
+    'hep': hep,
+    'hepnames': hepnames,
+}
+
+SLOWEST = 10
+
+
+def check_roundtrips(marcxmls, workers=None, chunk_size=100, slowest=SLOWEST, context=None):
+    """Convert MARCXML records to JSON, back to MARC and again to JSON.
+
+    Only records of the HEP and HEPNames collections are checked, the
+    others are counted as skipped. A JSON key is lost when its value
+    differs between the two conversions to JSON, ignoring the order of
+    lists; a MARC tag is lost when its fields differ between the input
+    and the MARC generated from the first conversion, ignoring the order
+    of fields and subfields.
+
+    Args:
+        marcxmls: an iterable of strings containing MARCXML.
+        workers(int): the number of worker processes. Defaults to the
+            number of CPUs; ``0`` checks the records in this process.
+        chunk_size(int): the number of records sent to a worker at once.
+        slowest(int): the number of slowest records to report.
+        context(ConversionContext): the settings used by the rules,
+            installed in every worker. Defaults to the active context.
+
+    Returns:
+        dict: the number of records checked, skipped, failed, and lossless
+        (whose JSON survived the round trip), the number of records having
+        and losing each JSON key and each MARC tag, the slowest records
+        with what they lost, and the throughput.
+
+    """
+    if workers is None:
+        workers = cpu_count()
+    if context is None:
+        context = get_context()
+
+    chunks = _chunked(enumerate(marcxmls), chunk_size)
+    report = _empty_report()
+    start = time.time()
+
+    if workers:
+        pool = Pool(workers, initializer=_init_worker, initargs=(context,))
+        try:
+            for chunk_report in pool.imap_unordered(_check_chunk, ((chunk, slowest) for chunk in chunks)):
+                _merge_reports(report, chunk_report, slowest)
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for chunk in chunks:
+            with use_context(context):
+                _merge_reports(report, _check_chunk((chunk, slowest)), slowest)
+
+    elapsed = time.time() - start
+    report['slowest'].sort(key=lambda el: el['elapsed'], reverse=True)
+    report.update({
+        'elapsed': elapsed,
+        'records_per_second': report['records'] / elapsed if elapsed else None,
+    })
+
+    return report
+
+
+def _empty_report():
+    return {
+        'errors': {},
+        'json_keys': {},
+        'lossless': 0,
+        'marc_tags': {},
+        'records': 0,
+        'skipped': 0,
+        'slowest': [],
+    }
+
+
+def _check_chunk(args):
+    chunk, slowest = args
+    report = _empty_report()
+
+    for index, marcxml in chunk:
+        start = time.time()
+        try:
+            result = _check_record(marcxml)
+        except Exception as e:
+            name = type(e).__name__
+            report['errors'][name] = report['errors'].get(name, 0) + 1
+            continue
+
+        if result is None:
+            report['skipped'] += 1
+            continue
+
+        json_keys, lost_json_keys, marc_tags, lost_marc_tags, recid = result
+        report['records'] += 1
+        if not lost_json_keys:
+            report['lossless'] += 1
+        _count(report['json_keys'], json_keys, lost_json_keys)
+        _count(report['marc_tags'], marc_tags, lost_marc_tags)
+        report['slowest'].append({
+            'control_number': recid,
+            'elapsed': time.time() - start,
+            'index': index,
+            'json_keys': sorted(lost_json_keys),
+            'marc_tags': sorted(lost_marc_tags),
+        })
+
+    report['slowest'] = heapq.nlargest(slowest, report['slowest'], key=lambda el: el['elapsed'])
+
+    return report
+
+
+def _check_record(marcxml):
+    marcjson = create_marc_record(marcxml)
+    rule_set = RULE_SETS.get(_get_rule_set_name(marcjson))
+    if rule_set is None:
+        return None
+
+    record = rule_set.do(marcjson)
+    new_marcjson = create_marc_record(record2marcxml(record))
+    new_record = rule_set.do(new_marcjson)
+
+    json_keys = set(record) | set(new_record)
+    lost_json_keys = {
+        key for key in json_keys
+        if _normalize_json(record.get(key)) != _normalize_json(new_record.get(key))
+    }
+
+    fields = _get_fields_by_tag(marcjson)
+    new_fields = _get_fields_by_tag(new_marcjson)
+    lost_marc_tags = {tag for tag in fields if fields[tag] != new_fields.get(tag)}
+
+    return json_keys, lost_json_keys, set(fields), lost_marc_tags, record.get('control_number')
+
+
+def _normalize_json(obj):
+    if isinstance(obj, dict):
+        return {key: _normalize_json(value) for key, value in iteritems(obj)}
+    elif isinstance(obj, (list, tuple)):
+        return sorted((_normalize_json(value) for value in obj), key=_sort_key)
+    return obj
+
+
+def _sort_key(obj):
+    return json.dumps(obj, sort_keys=True)
+
+
+def _get_fields_by_tag(marcjson):
+    fields = defaultdict(list)
+    for key, value in marcjson.iteritems(with_order=False, repeated=True):
+        if isinstance(value, MarcDict):
+            subfields = sorted(
+                (code, text_type(subfield))
+                for code, subfields in value.iteritems(with_order=False, repeated=True)
+                for subfield in force_list(subfields)
+            )
+        elif isinstance(value, string_types):
+            subfields = [('', value)]
+        else:
+            subfields = [('', text_type(value))]
+        fields[key[:3]].append((key, tuple(subfields)))
+
+    return {tag: sorted(values) for tag, values in iteritems(fields)}
+
+
+def _count(stats, keys, lost_keys):
+    for key in keys:
+        entry = stats.setdefault(key, {'lost': 0, 'records': 0})
+        entry['records'] += 1
+        if key in lost_keys:
+            entry['lost'] += 1
+
+
+def _merge_reports(report, chunk_report, slowest):
+    for key in ('lossless', 'records', 'skipped'):
+        report[key] += chunk_report[key]
+
+    for name, count in iteritems(chunk_report['errors']):
+        report['errors'][name] = report['errors'].get(name, 0) + count
+
+    for key in ('json_keys', 'marc_tags'):
+        for name, entry in iteritems(chunk_report[key]):
+            total = report[key].setdefault(name, {'lost': 0, 'records': 0})
+            total['lost'] += entry['lost']
+            total['records'] += entry['records']
+
+    report['slowest'] = heapq.nlargest(
+        slowest, report['slowest'] + chunk_report['slowest'], key=lambda el: el['elapsed'])
+
+
+def _iter_marcxmls(paths):
+    for path in paths:
+        for _, element in iterparse(path, tag='{*}record'):
+            yield tostring(element)
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('paths', nargs='+', help='files containing MARCXML collections')
+    parser.add_argument('--workers', type=int, help='number of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=100,
+                        help='number of records sent to a worker at once')
+    parser.add_argument('--slowest', type=int, default=SLOWEST,
+                        help='number of slowest records to report')
+    parser.add_argument('--output', help='file where to store the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = check_roundtrips(_iter_marcxmls(args.paths), args.workers, args.chunk_size, args.slowest)
+
+    print('{records} records checked, {lossless} lossless, {skipped} skipped in {elapsed:.1f}s'.format(**report))
+    for name, count in sorted(iteritems(report['errors'])):
+        print('{:>8} {}'.format(count, name))
+    for key in ('json_keys', 'marc_tags'):
+        for name, entry in sorted(iteritems(report[key])):
+            if entry['lost']:
+                print('{:>8} of {:>8} records lost {} {}'.format(entry['lost'], entry['records'], key[:-1], name))
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(report, fd, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
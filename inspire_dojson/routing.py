@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Routing of MARCXML records to the rule sets that convert them.
+
+:func:`marcxml2record` parses the whole record before choosing its rule set
+from the ``003`` and ``980__a`` fields. :func:`sniff_rule_set_name` reads
+only those fields, scanning the text of the record without parsing it, so
+that records can be sent to the workers of each rule set before paying for
+the parsing, as :func:`route_marcxml_records` does for a collection.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import re
+from collections import Counter
+
+from lxml import etree
+from lxml.etree import iterparse, tostring
+from six import StringIO, binary_type, text_type
+
+from .api import _get_rule_set_name_from_collections
+
+ELEMENT = r'<(?:[\w.-]+:)?{name}\b([^>]*?)(?:/>|>(.*?)</(?:[\w.-]+:)?{name}\s*>)'
+CONTROLFIELD = ELEMENT.format(name='controlfield')
+DATAFIELD = ELEMENT.format(name='datafield')
+SUBFIELD = ELEMENT.format(name='subfield')
+ATTRIBUTE = r'([\w.:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')'
+COMMENT = r'<!--.*?-->'
+
+
+def _compile(pattern):
+    return {
+        binary_type: re.compile(pattern.encode('ascii'), re.DOTALL),
+        text_type: re.compile(pattern, re.DOTALL),
+    }
+
+
+RE_CONTROLFIELD = _compile(CONTROLFIELD)
+RE_DATAFIELD = _compile(DATAFIELD)
+RE_SUBFIELD = _compile(SUBFIELD)
+RE_ATTRIBUTE = _compile(ATTRIBUTE)
+RE_COMMENT = _compile(COMMENT)
+
+
+class _NeedsParsing(Exception):
+    """The fields can't be read without parsing the record."""
+
+
+def sniff_rule_set_name(marcxml):
+    """Choose the rule set converting a record without parsing it.
+
+    Gives the same name that :func:`inspire_dojson.api.marcxml2record`
+    chooses, like ``hep``, ``hepnames`` or ``cds2hep_marc`` for records
+    from CDS, by looking only at the ``003`` and ``980__a`` fields. When
+    these contain entities or CDATA sections, the record is parsed.
+
+    Args:
+        marcxml: a string, or bytes encoded in UTF-8, containing MARCXML,
+            or an already parsed element or tree.
+
+    Returns:
+        str: the name of the rule set, a key of
+        :data:`inspire_dojson.api.RULE_SETS`.
+
+    """
+    if isinstance(marcxml, (binary_type, text_type)):
+        try:
+            sources, collections = _scan_text(marcxml)
+        except _NeedsParsing:
+            if isinstance(marcxml, binary_type):
+                marcxml = marcxml.decode('utf-8')
+            tree = etree.parse(StringIO(marcxml), etree.XMLParser(recover=True))
+            sources, collections = _scan_element(tree)
+    else:
+        sources, collections = _scan_element(marcxml)
+
+    is_from_cds = len(sources) == 1 and sources[0].lower() == 'szgecern'
+    return _get_rule_set_name_from_collections([el.lower() for el in collections], is_from_cds)
+
+
+def route_marcxml_records(stream, sinks, default=None):
+    """Send each record of a MARCXML collection to the sink of its rule set.
+
+    The collection is parsed incrementally, as in
+    :func:`inspire_dojson.api.marcxml2records`, but the records are not
+    converted: each one is serialized again and passed to the sink of the
+    rule set chosen by :func:`sniff_rule_set_name`.
+
+    Args:
+        stream: a file object or a path to a file containing a
+            ``<collection>`` of MARCXML records.
+        sinks(dict): a mapping from the names of the rule sets to
+            callables taking the MARCXML of a record, as bytes, like the
+            ``put`` method of a queue.
+        default: the sink of the records whose rule set has no sink.
+            Those records are skipped when it is ``None``.
+
+    Returns:
+        dict: the number of records of each rule set.
+
+    """
+    counts = Counter()
+    for _, element in iterparse(stream, tag='{*}record'):
+        name = sniff_rule_set_name(element)
+        sink = sinks.get(name, default)
+        if sink is not None:
+            sink(tostring(element))
+        counts[name] += 1
+
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+    return dict(counts)
+
+
+def _scan_text(marcxml):
+    kind = type(marcxml)
+    if _literal('<!--', kind) in marcxml:
+        marcxml = RE_COMMENT[kind].sub(_literal('', kind), marcxml)
+
+    sources = []
+    for attributes, text in _find_elements(marcxml, RE_CONTROLFIELD[kind], _literal('003', kind)):
+        if _get_attributes(attributes).get('tag', '!') == '003' and text:
+            sources.append(_get_text(text))
+
+    collections = []
+    for attributes, subfields in _find_elements(marcxml, RE_DATAFIELD[kind], _literal('980', kind)):
+        attributes = _get_attributes(attributes)
+        if (
+            attributes.get('tag', '!') == '980' and
+            _is_blank(attributes.get('ind1', '!')) and
+            _is_blank(attributes.get('ind2', '!'))
+        ):
+            for subfield_attributes, text in RE_SUBFIELD[kind].findall(subfields):
+                if _get_attributes(subfield_attributes).get('code', '!').lower() == 'a' and text:
+                    collections.append(_get_text(text))
+
+    return sources, collections
+
+
+def _find_elements(marcxml, regex, tag):
+    # Looks for the tag, which is much faster than matching the regex
+    # everywhere, and then matches it from the start of the element.
+    start_of_element = _literal('<', type(marcxml))
+    position = marcxml.find(tag)
+    while position != -1:
+        match = regex.match(marcxml, max(marcxml.rfind(start_of_element, 0, position), 0))
+        if match and match.end() > position:
+            yield match.groups(marcxml[:0])
+            position = match.end()
+        else:
+            position += 1
+        position = marcxml.find(tag, position)
+
+
+def _scan_element(element):
+    sources = [
+        controlfield.text
+        for controlfield in element.iter('{*}controlfield')
+        if controlfield.get('tag', '!') == '003' and controlfield.text
+    ]
+    collections = [
+        subfield.text
+        for datafield in element.iter('{*}datafield')
+        if (
+            datafield.get('tag', '!') == '980' and
+            _is_blank(datafield.get('ind1', '!')) and
+            _is_blank(datafield.get('ind2', '!'))
+        )
+        for subfield in datafield.iter('{*}subfield')
+        if subfield.get('code', '!').lower() == 'a' and subfield.text
+    ]
+
+    return sources, collections
+
+
+def _get_attributes(attributes):
+    result = {}
+    for name, double_quoted, single_quoted in RE_ATTRIBUTE[type(attributes)].findall(attributes):
+        result[_get_text(name)] = _get_text(double_quoted or single_quoted)
+
+    return result
+
+
+def _get_text(text):
+    if isinstance(text, binary_type):
+        text = text.decode('utf-8')
+    if '&' in text or '<' in text:
+        raise _NeedsParsing
+    return text
+
+
+def _is_blank(indicator):
+    return indicator in ('', '#', ' ')
+
+
+def _literal(text, kind):
+    if kind is binary_type:
+        return text.encode('ascii')
+    return text
@@ -24,13 +24,11 @@
 
 from __future__ import absolute_import, division, print_function
 
-import os
-import re
+import functools
+from itertools import islice
 
-from flask import current_app
 from isbn import ISBN
 from six import iteritems
-from six.moves import urllib
 
 from dojson.utils import GroupableOrderedDict
 
@@ -38,6 +36,10 @@ from inspire_utils.date import normalize_date
 from inspire_utils.dedupers import dedupe_list, dedupe_list_of_dicts
 from inspire_utils.helpers import force_list, maybe_int
 
+from ..context import get_context
+
+MEMO_SIZE = 10000
+
 
 def normalize_isbn(isbn):
     """Normalize an ISBN in order to be schema-compliant."""
@@ -98,14 +100,10 @@ def get_recid_from_ref(ref_obj):
 def absolute_url(relative_url):
     """Returns an absolute URL from a URL relative to the server root.
 
-    The base URL is taken from the Flask app config if present, otherwise it
-    falls back to ``http://inspirehep.net``.
+    The base URL is taken from the active conversion context, see
+    :mod:`inspire_dojson.context`, and falls back to ``http://inspirehep.net``.
     """
-    default_server = 'http://inspirehep.net'
-    server = current_app.config.get('SERVER_NAME', default_server)
-    if not re.match('^https?://', server):
-        server = u'http://{}'.format(server)
-    return urllib.parse.urljoin(server, relative_url)
+    return get_context().absolute_url(relative_url)
 
 
 def afs_url(file_path):
@@ -114,21 +112,11 @@ def afs_url(file_path):
     If ``file_path`` doesn't start with ``/opt/cds-invenio/``, and hence is not on
     AFS, it returns it unchanged.
 
-    The base AFS path is taken from the Flask app config if present, otherwise
-    it falls back to ``/afs/cern.ch/project/inspire/PROD``.
+    The base AFS path is taken from the active conversion context, see
+    :mod:`inspire_dojson.context`, and falls back to
+    ``/afs/cern.ch/project/inspire/PROD``.
     """
-    default_afs_path = '/afs/cern.ch/project/inspire/PROD'
-    afs_path = current_app.config.get('LEGACY_AFS_PATH', default_afs_path)
-
-    if file_path is None:
-        return
-
-    if file_path.startswith('/opt/cds-invenio/'):
-        file_path = os.path.relpath(file_path, '/opt/cds-invenio/')
-        file_path = os.path.join(afs_path, file_path)
-        return urllib.parse.urljoin('file://', urllib.request.pathname2url(file_path.encode('utf-8')))
-
-    return file_path
+    return get_context().afs_url(file_path)
 
 
 def get_record_ref(recid, endpoint='record'):
@@ -183,6 +171,91 @@ def dedupe_all_lists(obj):
         return obj
 
 
+class CleanList(list):
+    """List known to contain no empty values and no duplicates.
+
+    :func:`strip_empty_values_and_dedupe_lists` trusts it instead of
+    walking its elements again.
+    """
+
+
+def strip_empty_values_and_dedupe_lists(obj):
+    """Recursively strip empty values and remove duplicates from all lists.
+
+    Gives the same result as ``dedupe_all_lists(strip_empty_values(obj))``,
+    but walks ``obj`` only once and returns containers unchanged, without
+    copying them, when there is nothing to strip or dedupe in them.
+    Instances of :class:`CleanList` are returned as plain lists.
+    """
+    if isinstance(obj, CleanList):
+        return list(obj) or None
+    elif isinstance(obj, dict):
+        new_obj = None if type(obj) is dict else {}
+        for index, (key, val) in enumerate(iteritems(obj)):
+            new_val = strip_empty_values_and_dedupe_lists(val)
+            if new_obj is None:
+                if new_val is not None and new_val is val:
+                    continue
+                new_obj = dict(islice(iteritems(obj), index))
+            if new_val is not None:
+                new_obj[key] = new_val
+        return (obj if new_obj is None else new_obj) or None
+    elif isinstance(obj, (list, tuple, set)):
+        new_elements = None
+        for index, val in enumerate(obj):
+            new_val = strip_empty_values_and_dedupe_lists(val)
+            if new_elements is None:
+                if new_val is not None and new_val is val:
+                    continue
+                new_elements = list(islice(obj, index))
+            if new_val is not None:
+                new_elements.append(new_val)
+        elements = obj if new_elements is None else new_elements
+        if not elements:
+            return None
+        deduped_elements = _dedupe_elements(elements)
+        if deduped_elements is obj:
+            return obj
+        return type(obj)(deduped_elements)
+    elif obj or obj is False or obj == 0:
+        return obj
+    else:
+        return None
+
+
+def _dedupe_elements(elements):
+    seen = set()
+    result = None
+    try:
+        for index, element in enumerate(elements):
+            frozen_element = _freeze(element)
+            if frozen_element in seen:
+                if result is None:
+                    result = list(islice(elements, index))
+            else:
+                seen.add(frozen_element)
+                if result is not None:
+                    result.append(element)
+    except TypeError:
+        return dedupe_list(elements)
+
+    return elements if result is None else result
+
+
+def _freeze(obj):
+    # Each container is tagged with its kind, so that only values that
+    # are equal have the same frozen form: ``[1]`` and ``(1,)`` differ.
+    if isinstance(obj, dict):
+        return dict, frozenset((key, _freeze(val)) for key, val in iteritems(obj))
+    elif isinstance(obj, list):
+        return list, tuple(_freeze(val) for val in obj)
+    elif isinstance(obj, tuple):
+        return tuple, tuple(_freeze(val) for val in obj)
+    elif isinstance(obj, (set, frozenset)):
+        return set, frozenset(_freeze(val) for val in obj)
+    return obj
+
+
 def normalize_date_aggressively(date):
     """Normalize date, stripping date parts until a valid date is obtained."""
     def _strip_last_part(date):
@@ -205,3 +278,26 @@ def normalize_date_aggressively(date):
 def create_record_from_dict(dictionary):
     """Create an input record for dojson from a dict."""
     return GroupableOrderedDict(iteritems(dictionary))
+
+
+def memoize(func):
+    """Memoize a function of one hashable argument.
+
+    At most ``MEMO_SIZE`` results are remembered; when the memo is full it
+    is emptied. Unhashable arguments are passed to the function directly.
+    """
+    memo = {}
+
+    @functools.wraps(func)
+    def _memoized(value):
+        try:
+            return memo[value]
+        except KeyError:
+            if len(memo) >= MEMO_SIZE:
+                memo.clear()
+            result = memo[value] = func(value)
+            return result
+        except TypeError:
+            return func(value)
+
+    return _memoized
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Valid values taken from the INSPIRE schemas.
+
+The schemas are loaded once, when this module is imported, so that rules
+never have to load them while converting a record. This is the only module
+used by the rules that is allowed to call ``load_schema``; the other one is
+:mod:`inspire_dojson.validation`, which validates the converted records.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import re
+
+from inspire_schemas.api import load_schema
+from inspire_schemas.utils import (
+    RE_ARXIV_POST_2007_CLASS,
+    RE_ARXIV_PRE_2007_CLASS,
+    classify_field as _classify_field,
+    normalize_arxiv_category as _normalize_arxiv_category,
+    valid_arxiv_categories,
+)
+
+from . import memoize
+
+
+def _get_enum(schema_name, *path):
+    schema = load_schema(schema_name)
+    for key in path:
+        schema = schema[key]
+
+    return schema['enum']
+
+
+def _by_lowercase(values):
+    result = {}
+    for value in values:
+        result.setdefault(value.lower(), value)
+
+    return result
+
+
+ARXIV_CATEGORIES = frozenset(valid_arxiv_categories())
+
+EXPERIMENT_INSPIRE_CLASSIFICATION = re.compile(
+    load_schema('experiments')['properties']['inspire_classification']['items']['pattern']
+)
+
+INSPIRE_CATEGORIES = frozenset(_get_enum('elements/inspire_field', 'properties', 'term'))
+
+INSPIRE_CATEGORY_SOURCES = frozenset(_get_enum('elements/inspire_field', 'properties', 'source'))
+
+ISBN_MEDIA = frozenset(_get_enum('hep', 'properties', 'isbns', 'items', 'properties', 'medium'))
+
+MATERIALS = frozenset(_get_enum('elements/material'))
+
+PUBLICATION_TYPES = frozenset(_get_enum('hep', 'properties', 'publication_type', 'items'))
+
+ARXIV_CATEGORIES_BY_LOWERCASE = _by_lowercase(valid_arxiv_categories())
+
+INSPIRE_CATEGORIES_BY_LOWERCASE = _by_lowercase(
+    _get_enum('elements/inspire_field', 'properties', 'term')
+)
+
+classify_field = memoize(_classify_field)
+
+normalize_arxiv_category = memoize(_normalize_arxiv_category)
+
+
+def is_arxiv(obj):
+    """Whether a string starts with an arXiv identifier.
+
+    Same as ``inspire_schemas.utils.is_arxiv``, which loads the arXiv
+    categories from the schema every time an identifier has a category.
+    """
+    arxiv_test = obj.split()
+    if not arxiv_test:
+        return False
+
+    matched_arxiv = (RE_ARXIV_PRE_2007_CLASS.match(arxiv_test[0]) or
+                     RE_ARXIV_POST_2007_CLASS.match(arxiv_test[0]))
+    if not matched_arxiv:
+        return False
+
+    category = matched_arxiv.group('category')
+    if not category:
+        return True
+
+    category = category.lower()
+    return (category in ARXIV_CATEGORIES_BY_LOWERCASE or
+            category.replace('-', '.') in ARXIV_CATEGORIES_BY_LOWERCASE)
@@ -451,17 +451,31 @@ south_korean_cities = ['SEOUL', 'DAEJON', 'DAEJEON', 'MT SORAK', 'POHANG',
                        'PHOENIX PARK', 'CHEJU ISLAND']
 
 
+def _invert(alternatives):
+    return {
+        alternative: code
+        for code, spellings in alternatives.items()
+        for alternative in spellings
+    }
+
+
+_country_codes_by_code = _invert(countries_alternative_codes)
+_country_codes_by_code.update((code, code) for code in iso_code_to_country_name)
+
+_country_codes_by_name = _invert(countries_alternative_spellings)
+_country_codes_by_name.update(country_to_iso_code)
+
+_us_state_codes_by_name = _invert(us_states_alternative_spellings)
+_us_state_codes_by_name.update(us_state_to_iso_code)
+
+_us_state_codes = frozenset(us_state_to_iso_code.values())
+
+_south_korean_cities = frozenset(south_korean_cities)
+
+
 def match_country_code(original_code):
     if isinstance(original_code, six.string_types):
-        original_code = original_code.upper()
-        if iso_code_to_country_name.get(original_code):
-            return original_code
-        else:
-            for country_code, alternatives in countries_alternative_codes.items():
-                for alternative in alternatives:
-                    if original_code == alternative:
-                        return country_code
-            return None
+        return _country_codes_by_code.get(original_code.upper())
     else:
         return None
 
@@ -474,16 +488,11 @@ def match_country_name_to_its_code(country_name, city=''):
     if country_name:
         country_name = country_name.upper().replace('.', '').strip()
 
-        if country_to_iso_code.get(country_name):
-            return country_to_iso_code.get(country_name)
+        if country_name in _country_codes_by_name:
+            return _country_codes_by_name[country_name]
         elif country_name == 'KOREA':
-            if city.upper() in south_korean_cities:
+            if city.upper() in _south_korean_cities:
                 return 'KR'
-        else:
-            for c_code, spellings in countries_alternative_spellings.items():
-                for spelling in spellings:
-                    if country_name == spelling:
-                        return c_code
 
     return None
 
@@ -492,16 +501,35 @@ def match_us_state(state_string):
     """Try to match a string with one of the states in the US."""
     if state_string:
         state_string = state_string.upper().replace('.', '').strip()
-        if us_state_to_iso_code.get(state_string):
-            return us_state_to_iso_code.get(state_string)
-        else:
-            for code, state_spellings in us_states_alternative_spellings.items():
-                for spelling in state_spellings:
-                    if state_string == spelling:
-                        return code
+        return _us_state_codes_by_name.get(state_string)
     return None
 
 
+def parse_addresses(address_strings):
+    """Parse many conference addresses at once.
+
+    Repeated addresses are parsed only once, but each of them gets its
+    own copy of the result.
+
+    Args:
+        address_strings(list): a list of conference addresses.
+
+    Returns:
+        list: the parsed addresses, in the same order.
+
+    """
+    parsed = {}
+    result = []
+
+    for address_string in address_strings:
+        if address_string not in parsed:
+            parsed[address_string] = parse_conference_address(address_string)
+        address = parsed[address_string]
+        result.append(dict(address, cities=list(address['cities'])))
+
+    return result
+
+
 def parse_conference_address(address_string):
     """Parse a conference address.
 
@@ -561,7 +589,7 @@ def parse_institution_address(address, city, state_province,
     if not country_code and country:
         country_code = match_country_name_to_its_code(country)
 
-    if not country_code and state_province and state_province in us_state_to_iso_code.values():
+    if not country_code and state_province and state_province in _us_state_codes:
         country_code = 'US'
 
     return {
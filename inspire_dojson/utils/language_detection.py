@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Language detection of titles and abstracts.
+
+Detected languages are memoized by normalized text. The default backend
+is ``langdetect`` with a fixed seed, so that the same text is always
+classified the same way; another backend can be installed with
+:func:`set_backend`. The memo is shared by all threads.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import threading
+from collections import OrderedDict
+
+from six import text_type
+
+DEFAULT_SEED = 0
+MEMO_SIZE = 10000
+
+_backend = None
+_factory = None
+_memo = OrderedDict()
+_lock = threading.Lock()
+
+
+def detect_language(text):
+    """Detect the language of a text.
+
+    Args:
+        text(str): a text.
+
+    Returns:
+        str: the ISO 639-1 code of the language of the text, or ``None``
+        if it can't be detected.
+
+    """
+    return detect_languages([text])[0]
+
+
+def detect_languages(texts):
+    """Detect the languages of many texts with a single backend call.
+
+    Args:
+        texts(list): a list of texts.
+
+    Returns:
+        list: the ISO 639-1 code of the language of each text, or
+        ``None`` for texts whose language can't be detected.
+
+    """
+    keys = [_normalize(text) for text in texts]
+
+    # The memoized languages are copied before remembering the new ones,
+    # which may evict them.
+    detected, missing = {}, []
+    with _lock:
+        for key in keys:
+            if key and key not in detected:
+                try:
+                    detected[key] = _recall(key)
+                except KeyError:
+                    detected[key] = None
+                    missing.append(key)
+
+    if missing:
+        backend = _backend or _langdetect_backend
+        detected.update(zip(missing, backend(missing)))
+        with _lock:
+            for key in missing:
+                _remember(key, detected[key])
+
+    return [detected.get(key) for key in keys]
+
+
+def set_backend(backend):
+    """Install a language detection backend.
+
+    Args:
+        backend: a callable that takes a list of texts and returns the
+            list of their languages, or ``None`` to restore the default
+            ``langdetect`` backend.
+
+    """
+    global _backend
+
+    _backend = backend
+    clear_memo()
+
+
+def preload():
+    """Load the language profiles of the default backend."""
+    _get_factory()
+
+
+def clear_memo():
+    """Forget all detected languages."""
+    with _lock:
+        _memo.clear()
+
+
+def _normalize(text):
+    if not text:
+        return None
+    return u' '.join(text_type(text).split())
+
+
+def _remember(key, language):
+    _memo[key] = language
+    while len(_memo) > MEMO_SIZE:
+        _memo.popitem(last=False)
+
+
+def _recall(key):
+    language = _memo.pop(key)
+    _memo[key] = language
+
+    return language
+
+
+def _get_factory():
+    global _factory
+
+    if _factory is None:
+        from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+
+        factory = DetectorFactory()
+        factory.load_profile(PROFILES_DIRECTORY)
+        factory.set_seed(DEFAULT_SEED)
+        _factory = factory
+
+    return _factory
+
+
+def _langdetect_backend(texts):
+    from langdetect.lang_detect_exception import LangDetectException
+
+    factory = _get_factory()
+
+    result = []
+    for text in texts:
+        detector = factory.create()
+        detector.append(text)
+        try:
+            result.append(detector.detect())
+        except LangDetectException:
+            result.append(None)
+
+    return result
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Resolution of language names and codes.
+
+The pycountry database is loaded and indexed the first time a language is
+resolved, and the index is shared by all rule sets. Tokens that don't
+match any language are remembered as well, so that they are looked up
+only once.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+MEMO_SIZE = 10000
+
+_index = None
+_memo = {}
+
+
+def get_alpha_2_from_name(name):
+    """Get the ISO 639-1 code of a language from its English name.
+
+    Args:
+        name(str): the name of a language, in any case and possibly
+            surrounded by whitespace, like ``english``.
+
+    Returns:
+        str: the ISO 639-1 code of the language, or ``None`` if it has no
+        such code or the name is unknown.
+
+    """
+    try:
+        return _memo[name]
+    except KeyError:
+        if len(_memo) >= MEMO_SIZE:
+            _memo.clear()
+        result = _memo[name] = _get_index()['alpha_2_by_name'].get(name.strip().capitalize())
+        return result
+
+
+def get_name_from_alpha_2(alpha_2):
+    """Get the English name of a language from its ISO 639-1 code.
+
+    Args:
+        alpha_2(str): the ISO 639-1 code of a language.
+
+    Returns:
+        str: the name of the language.
+
+    Raises:
+        KeyError: if the code is unknown.
+
+    """
+    return _get_index()['name_by_alpha_2'][alpha_2]
+
+
+def get_name_from_alpha_3(alpha_3):
+    """Get the English name of a language from its ISO 639-2 code.
+
+    Both the terminological and the bibliographic codes are recognized.
+
+    Args:
+        alpha_3(str): the ISO 639-2 code of a language, in any case.
+
+    Returns:
+        str: the name of the language, or ``None`` if the code is unknown.
+
+    """
+    alpha_3 = alpha_3.strip().lower()
+    index = _get_index()
+
+    return index['name_by_alpha_3'].get(alpha_3) or index['name_by_bibliographic'].get(alpha_3)
+
+
+def preload():
+    """Load and index the pycountry languages."""
+    _get_index()
+
+
+def _get_index():
+    global _index
+
+    if _index is None:
+        import pycountry
+
+        index = {
+            'alpha_2_by_name': {},
+            'name_by_alpha_2': {},
+            'name_by_alpha_3': {},
+            'name_by_bibliographic': {},
+        }
+        for language in pycountry.languages:
+            alpha_2 = getattr(language, 'alpha_2', None)
+            if alpha_2:
+                index['alpha_2_by_name'][language.name] = alpha_2
+                index['name_by_alpha_2'][alpha_2] = language.name
+
+            alpha_3 = getattr(language, 'alpha_3', None)
+            if alpha_3:
+                index['name_by_alpha_3'][alpha_3] = language.name
+
+            bibliographic = getattr(language, 'bibliographic', None)
+            if bibliographic:
+                index['name_by_bibliographic'][bibliographic] = language.name
+
+        _index = index
+
+    return _index
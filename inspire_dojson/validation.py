@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Validation of converted records against the INSPIRE schemas.
+
+Validating with :func:`inspire_schemas.api.validate` loads the schema and
+builds a validator every time. Here the validator of each schema is built
+once per process, from the schema with its ``$ref`` already resolved, and
+the errors of each record are collected instead of raised, so that a batch
+of records is validated in full.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import time
+from collections import namedtuple
+
+from jsonschema.validators import validator_for
+from six import text_type
+
+from inspire_schemas.errors import SchemaNotFound
+from inspire_schemas.utils import inspire_format_checker, load_schema
+
+from .api import _get_schema_name
+from .context import get_context
+
+SCHEMA_URL_PREFIXES = ('http://', 'https://')
+
+ValidationResult = namedtuple('ValidationResult', ['index', 'errors'])
+
+_validators = {}
+
+
+def get_validator(schema_name):
+    """Get the validator of a schema, building it the first time.
+
+    Args:
+        schema_name(str): the name of the schema, like ``hep`` or ``authors``.
+
+    Returns:
+        jsonschema.IValidator: the validator.
+
+    """
+    try:
+        return _validators[schema_name]
+    except KeyError:
+        schema = load_schema(schema_name, resolved=True)
+        validator = _validators[schema_name] = validator_for(schema)(
+            schema, format_checker=inspire_format_checker)
+        return validator
+
+
+def validate_record(record):
+    """Validate a record against the schema named in its ``$schema`` key.
+
+    A relative ``$schema``, as set by the rules, is made absolute with the
+    active context before validating, as it is when INSPIRE stores the
+    record; the record itself is not modified.
+
+    Args:
+        record(dict): a JSON record.
+
+    Returns:
+        list: the validation errors, as dictionaries with the ``path`` of
+        the invalid value, the ``schema_path`` of the failed check, the
+        name of its ``validator`` and a ``message``. It is empty when
+        the record is valid.
+
+    """
+    if '$schema' not in record:
+        return [_make_error([], [], '$schema', u"'$schema' is a required property")]
+
+    schema_name = _get_schema_name(record)
+    try:
+        validator = get_validator(schema_name)
+    except SchemaNotFound:
+        return [_make_error(['$schema'], [], '$schema', u'Unknown schema {!r}'.format(schema_name))]
+
+    if not record['$schema'].startswith(SCHEMA_URL_PREFIXES):
+        record = dict(record)
+        record['$schema'] = get_context().absolute_url(u'/schemas/records/{}.json'.format(schema_name))
+
+    errors = [
+        _make_error(list(error.absolute_path), list(error.absolute_schema_path), error.validator, error.message)
+        for error in validator.iter_errors(record)
+    ]
+    errors.sort(key=lambda error: [text_type(el) for el in error['path']])
+
+    return errors
+
+
+def validate_records(records, stats=None):
+    """Validate many records, collecting the errors of each.
+
+    Args:
+        records: an iterable of JSON records.
+        stats(dict): if given, it is filled with the number of records,
+            of invalid records and of errors, and with the time spent
+            validating, once all the results have been consumed.
+
+    Yields:
+        ValidationResult: the position of the record in the input and its
+        validation errors, see :func:`validate_record`.
+
+    """
+    count = invalid = errors = 0
+    elapsed = 0.0
+
+    for index, record in enumerate(records):
+        start = time.time()
+        result = ValidationResult(index, validate_record(record))
+        elapsed += time.time() - start
+
+        count += 1
+        if result.errors:
+            invalid += 1
+            errors += len(result.errors)
+
+        yield result
+
+    if stats is not None:
+        stats.update({
+            'elapsed': elapsed,
+            'errors': errors,
+            'invalid': invalid,
+            'records': count,
+            'records_per_second': count / elapsed if elapsed else None,
+        })
+
+
+def _make_error(path, schema_path, validator, message):
+    return {
+        'message': message,
+        'path': path,
+        'schema_path': schema_path,
+        'validator': validator,
+    }
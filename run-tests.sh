@@ -22,5 +22,5 @@
 
 set -e
 
-flake8 inspire_dojson tests
+flake8 inspire_dojson tests benchmarks
 py.test tests
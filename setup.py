@@ -67,7 +67,7 @@ extras_require['all'] = []
 for name, reqs in extras_require.items():
     extras_require['all'].extend(reqs)
 
-packages = find_packages(exclude=['docs'])
+packages = find_packages(exclude=['benchmarks', 'docs'])
 
 setup(
     name='inspire-dojson',
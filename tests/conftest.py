@@ -21,11 +21,17 @@
 
 from __future__ import absolute_import, division, print_function
 
+import sys
+
 import pytest
 from langdetect import DetectorFactory
 from flask import Flask
 
 
+collect_ignore = []
+if sys.version_info < (3, 6):
+    collect_ignore.append('test_aio.py')
+
 CONFIG = {
     'SERVER_NAME': 'localhost:5000',
     'LEGACY_BASE_URL': 'http://inspirehep.net',
@@ -52,3 +58,27 @@ def stable_langdetect(app):
     yield
 
     DetectorFactory.seed = seed
+
+
+@pytest.fixture
+def hep_marcxml():
+    """Build the MARCXML of a HEP record with a title and a control number.
+
+    The returned function takes the control number and, optionally, the
+    MARCXML of other fields to add to the record.
+    """
+    def _hep_marcxml(recid, fields=''):
+        return (
+            '<record>'
+            '  <controlfield tag="001">{}</controlfield>'
+            '  <datafield tag="245" ind1=" " ind2=" ">'
+            '    <subfield code="a">Partial Symmetries of Weak Interactions</subfield>'
+            '  </datafield>'
+            '{}'
+            '  <datafield tag="980" ind1=" " ind2=" ">'
+            '    <subfield code="a">HEP</subfield>'
+            '  </datafield>'
+            '</record>'
+        ).format(recid, fields)
+
+    return _hep_marcxml
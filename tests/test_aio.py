@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from inspire_dojson import aio, api
+from inspire_dojson.aio import bulk_marcxml2records, marcxml2record, record2marcxml
+from inspire_dojson.context import ConversionContext
+from inspire_dojson.hep import hep
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def _collect(results):
+    return [result async for result in results]
+
+
+def test_marcxml2record_uses_the_context_of_the_caller(hep_marcxml):
+    expected = 'http://localhost:5000/api/literature/1'
+    result = _run(marcxml2record(hep_marcxml(1)))
+
+    assert expected == result['self']['$ref']
+
+
+def test_marcxml2record_uses_the_given_context(hep_marcxml):
+    context = ConversionContext(server_name='https://example.org')
+
+    expected = 'https://example.org/api/literature/1'
+    result = _run(marcxml2record(hep_marcxml(1), context=context))
+
+    assert expected == result['self']['$ref']
+
+
+def test_record2marcxml():
+    record = {
+        '$schema': 'http://localhost:5000/schemas/records/hep.json',
+        'control_number': 1,
+    }
+
+    expected = b'<controlfield tag="001">1</controlfield>'
+    result = _run(record2marcxml(record))
+
+    assert expected in result
+
+
+def test_bulk_marcxml2records_preserves_order_and_isolates_errors(hep_marcxml):
+    marcxmls = [hep_marcxml(1), hep_marcxml('foo'), hep_marcxml(3)]
+
+    results = _run(_collect(bulk_marcxml2records(marcxmls, window=2)))
+
+    assert [0, 1, 2] == [result.index for result in results]
+    assert 1 == results[0].record['control_number']
+    assert results[1].record is None
+    assert 'ValueError' in results[1].error
+    assert 3 == results[2].record['control_number']
+
+
+def test_bulk_marcxml2records_accepts_asynchronous_iterables(hep_marcxml):
+    async def _marcxmls():
+        for recid in range(1, 4):
+            yield hep_marcxml(recid)
+
+    expected = [1, 2, 3]
+    result = [el.record['control_number'] for el in _run(_collect(bulk_marcxml2records(_marcxmls())))]
+
+    assert expected == result
+
+
+def test_bulk_marcxml2records_bounds_the_records_in_flight(hep_marcxml):
+    consumed = []
+
+    def _marcxmls():
+        for recid in range(1, 11):
+            consumed.append(recid)
+            yield hep_marcxml(recid)
+
+    async def _first(results):
+        first = await results.__anext__()
+        await results.aclose()
+        return first
+
+    result = _run(_first(bulk_marcxml2records(_marcxmls(), window=3)))
+
+    assert 1 == result.record['control_number']
+    assert [1, 2, 3] == consumed
+
+
+def test_bulk_marcxml2records_on_a_process_pool(hep_marcxml):
+    marcxmls = [hep_marcxml(recid) for recid in range(1, 6)]
+
+    with ProcessPoolExecutor(2) as executor:
+        results = _run(_collect(bulk_marcxml2records(marcxmls, executor=executor)))
+
+    expected = ['http://localhost:5000/api/literature/{}'.format(recid) for recid in range(1, 6)]
+    result = [el.record['self']['$ref'] for el in results]
+
+    assert expected == result
+
+
+def test_bulk_marcxml2records_raises_on_empty_window():
+    with pytest.raises(ValueError):
+        _run(_collect(bulk_marcxml2records([], window=0)))
+
+
+@pytest.fixture
+def cold_hep(monkeypatch):
+    monkeypatch.setattr(aio, '_preloaded', set())
+    monkeypatch.setattr(hep, 'index', None)
+
+    built = []
+    convert = api.marcxml2record
+
+    def _marcxml2record(marcxml, context=None):
+        built.append(hep.index is not None)
+        return convert(marcxml, context=context)
+
+    monkeypatch.setattr(api, 'marcxml2record', _marcxml2record)
+
+    return built
+
+
+def test_marcxml2record_loads_the_rules_before_converting_concurrently(cold_hep, hep_marcxml):
+    async def _convert():
+        return await asyncio.gather(*[marcxml2record(hep_marcxml(recid)) for recid in range(1, 9)])
+
+    expected = list(range(1, 9))
+    result = [el['control_number'] for el in _run(_convert())]
+
+    assert expected == result
+    assert [True] * 8 == cold_hep
+
+
+def test_bulk_marcxml2records_loads_the_rules_before_converting(cold_hep, hep_marcxml):
+    marcxmls = [hep_marcxml(recid) for recid in range(1, 9)]
+
+    expected = list(range(1, 9))
+    result = [el.record['control_number'] for el in _run(_collect(bulk_marcxml2records(marcxmls)))]
+
+    assert expected == result
+    assert [True] * 8 == cold_hep
@@ -22,9 +22,28 @@
 
 from __future__ import absolute_import, division, print_function
 
-import pytest
+import subprocess
+import sys
 
-from inspire_dojson.api import marcxml2record, record2marcxml
+import pytest
+from six import BytesIO
+
+from dojson.contrib.marc21.utils import create_record
+
+from inspire_dojson.api import (
+    RULE_SETS,
+    marcjson2record_incremental,
+    marcjsons2records,
+    marcxml2record,
+    marcxml2records,
+    preload,
+    record2marcxml,
+    records2marcxml_stream,
+)
+from inspire_dojson.context import ConversionContext
+from inspire_dojson.hep import hep
+from inspire_dojson.hepnames import hepnames
+from inspire_dojson.marc import create_marc_record
 
 
 def test_marcxml2record_handles_data():
@@ -120,6 +139,251 @@ def test_marcxml2record_handles_cds():
     assert expected == result['external_system_identifiers']
 
 
+def test_marcxml2record_computes_only_the_requested_keys():
+    snippet = (
+        '<record>'
+        '  <controlfield tag="001">4328</controlfield>'
+        '  <datafield tag="024" ind1="7" ind2=" ">'
+        '    <subfield code="2">DOI</subfield>'
+        '    <subfield code="a">10.1016/0029-5582(61)90469-2</subfield>'
+        '  </datafield>'
+        '  <datafield tag="245" ind1=" " ind2=" ">'
+        '    <subfield code="a">Partial Symmetries of Weak Interactions</subfield>'
+        '  </datafield>'
+        '  <datafield tag="100" ind1=" " ind2=" ">'
+        '    <subfield code="a">Glashow, S.L.</subfield>'
+        '  </datafield>'
+        '</record>'
+    )  # record/4328
+
+    only = ['$schema', 'control_number', 'dois', 'titles']
+
+    expected = {key: value for key, value in marcxml2record(snippet).items() if key in only}
+    result = marcxml2record(snippet, only=only)
+
+    assert expected == result
+    assert sorted(only) == sorted(result)
+
+
+def test_marcjsons2records_chooses_the_rule_set_of_each_record():
+    snippets = [
+        '<record>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">HEPNAMES</subfield>'
+        '  </datafield>'
+        '</record>',
+        '<record>'
+        '  <controlfield tag="001">4328</controlfield>'
+        '</record>',
+    ]
+
+    expected = [marcxml2record(snippet) for snippet in snippets]
+    result = list(marcjsons2records(create_marc_record(snippet) for snippet in snippets))
+
+    assert expected == result
+
+
+def test_import_does_not_load_rules_or_heavy_dependencies():
+    script = (
+        'import sys\n'
+        'import inspire_dojson\n'
+        'print("\\n".join(sorted(sys.modules)))\n'
+    )
+    modules = subprocess.check_output([sys.executable, '-c', script]).decode('utf-8').split()
+
+    assert not [module for module in modules if module.startswith('inspire_dojson.') and 'rules' in module.split('.')]
+    assert not {'idutils', 'inspire_schemas', 'langdetect', 'pycountry'} & {module.split('.')[0] for module in modules}
+
+
+def test_preload():
+    hepnames.index = None
+
+    preload('hepnames')
+
+    assert hepnames.index is not None
+
+
+def test_preload_raises_on_unknown_rule_sets():
+    with pytest.raises(ValueError):
+        preload('foo')
+
+
+def test_preload_loads_all_rule_sets_by_default():
+    preload()
+
+    assert all(rule_set.index is not None for rule_set in RULE_SETS.values())
+
+
+def test_marcxml2record_uses_the_given_context():
+    snippet = (
+        '<record>'
+        '  <controlfield tag="001">4328</controlfield>'
+        '  <datafield tag="856" ind1="4" ind2=" ">'
+        '    <subfield code="u">http://legacy.example.org/record/4328</subfield>'
+        '  </datafield>'
+        '  <datafield tag="856" ind1="4" ind2=" ">'
+        '    <subfield code="u">http://example.com/4328</subfield>'
+        '  </datafield>'
+        '</record>'
+    )
+    context = ConversionContext(server_name='https://example.org', legacy_base_url='http://legacy.example.org')
+
+    result = marcxml2record(snippet, context=context)
+
+    assert 'https://example.org/api/literature/4328' == result['self']['$ref']
+    assert [{'value': 'http://example.com/4328'}] == result['urls']
+
+
+def test_marcxml2records_handles_a_collection():
+    snippet = BytesIO(
+        b'<collection>'
+        b'  <record>'
+        b'    <controlfield tag="001">4328</controlfield>'
+        b'    <datafield tag="980" ind1=" " ind2=" ">'
+        b'      <subfield code="a">HEP</subfield>'
+        b'    </datafield>'
+        b'  </record>'
+        b'  <record>'
+        b'    <controlfield tag="001">1010819</controlfield>'
+        b'    <datafield tag="980" ind1=" " ind2=" ">'
+        b'      <subfield code="a">HEPNAMES</subfield>'
+        b'    </datafield>'
+        b'  </record>'
+        b'</collection>'
+    )
+
+    expected = [
+        ('hep.json', 4328),
+        ('authors.json', 1010819),
+    ]
+    result = [(el['$schema'], el['control_number']) for el in marcxml2records(snippet)]
+
+    assert expected == result
+
+
+def test_marcxml2records_handles_namespaced_collections():
+    snippet = BytesIO(
+        b'<collection xmlns="http://www.loc.gov/MARC21/slim">'
+        b'  <record>'
+        b'    <controlfield tag="001">2270264</controlfield>'
+        b'    <controlfield tag="003">SzGeCERN</controlfield>'
+        b'  </record>'
+        b'</collection>'
+    )  # cds.cern.ch/record/2270264
+
+    expected = [
+        [
+            {
+                'schema': 'CDS',
+                'value': '2270264',
+            },
+        ],
+    ]
+    result = [el['external_system_identifiers'] for el in marcxml2records(snippet)]
+
+    assert expected == result
+
+
+def test_marcxml2records_is_lazy():
+    snippet = BytesIO(
+        b'<collection>'
+        b'  <record>'
+        b'    <controlfield tag="001">4328</controlfield>'
+        b'  </record>'
+        b'  <record>'
+        b'    <controlfield tag="001">'
+    )
+
+    result = marcxml2records(snippet)
+
+    assert 4328 == next(result)['control_number']
+
+
+def test_marcjson2record_incremental_only_converts_changed_fields():
+    fields = (
+        '  <controlfield tag="001">4328</controlfield>'
+        '  <datafield tag="100" ind1=" " ind2=" ">'
+        '    <subfield code="a">Glashow, S.L.</subfield>'
+        '  </datafield>'
+        '  <datafield tag="700" ind1=" " ind2=" ">'
+        '    <subfield code="a">Weinberg, S.</subfield>'
+        '  </datafield>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">HEP</subfield>'
+        '  </datafield>'
+    )
+    old_marcjson = create_record(u'<record>{}</record>'.format(fields), keep_singletons=False)
+    new_marcjson = create_record(
+        u'<record>{}'
+        '  <datafield tag="650" ind1="1" ind2="7">'
+        '    <subfield code="2">INSPIRE</subfield>'
+        '    <subfield code="a">Theory-HEP</subfield>'
+        '  </datafield>'
+        '</record>'.format(fields),
+        keep_singletons=False,
+    )
+    old_record = hep.do(old_marcjson)
+
+    profiler = hep.enable_profiling()
+    try:
+        result = marcjson2record_incremental(old_marcjson, new_marcjson, old_record)
+        report = profiler.report()
+    finally:
+        hep.disable_profiling()
+
+    assert hep.do(new_marcjson) == result
+    assert [{'term': 'Theory-HEP'}] == result['inspire_categories']
+    assert result['authors'] is old_record['authors']
+    assert ['inspire_dojson.common.rules.inspire_categories:^65017'] == list(report['rules'])
+
+
+def test_marcjson2record_incremental_converts_records_changing_collection():
+    old_marcjson = create_record(
+        '<datafield tag="980" ind1=" " ind2=" ">'
+        '  <subfield code="a">HEP</subfield>'
+        '</datafield>',
+        keep_singletons=False,
+    )
+    new_marcjson = create_record(
+        '<datafield tag="980" ind1=" " ind2=" ">'
+        '  <subfield code="a">DATA</subfield>'
+        '</datafield>',
+        keep_singletons=False,
+    )
+
+    expected = 'data.json'
+    result = marcjson2record_incremental(old_marcjson, new_marcjson, hep.do(old_marcjson))
+
+    assert expected == result['$schema']
+
+
+def test_marcjson2record_incremental_verifies_against_a_full_conversion():
+    old_marcjson = create_record(
+        '<datafield tag="245" ind1=" " ind2=" ">'
+        '  <subfield code="a">Partial Symmetries of Weak Interactions</subfield>'
+        '</datafield>',
+        keep_singletons=False,
+    )
+    new_marcjson = create_record(
+        '<datafield tag="245" ind1=" " ind2=" ">'
+        '  <subfield code="a">Broken Symmetries</subfield>'
+        '</datafield>',
+        keep_singletons=False,
+    )
+    old_record = hep.do(old_marcjson)
+
+    result = marcjson2record_incremental(old_marcjson, new_marcjson, old_record, verify=True)
+
+    assert [{'title': 'Broken Symmetries'}] == result['titles']
+
+    old_record['control_number'] = 4328
+
+    with pytest.raises(ValueError) as excinfo:
+        marcjson2record_incremental(old_marcjson, new_marcjson, old_record, verify=True)
+
+    assert 'control_number' in str(excinfo.value)
+
+
 def test_record2marcxml_generates_controlfields():
     record = {
         '$schema': 'http://localhost:5000/schemas/records/hep.json',
@@ -325,9 +589,105 @@ def test_record2marcxml_strips_control_characters():
     assert expected == result
 
 
+def test_record2marcxml_strips_invalid_characters_from_non_printable_text():
+    record = {
+        '$schema': 'http://localhost:5000/schemas/records/hep.json',
+        'abstracts': [
+            {
+                'value': u'Modi\u001Ccations\nof\ufffe two-point\u2028functions\xa0at K\xe4tlne\ud800',
+            },
+        ],
+    }
+
+    expected = (
+        b'<record>\n'
+        b'  <datafield tag="520" ind1=" " ind2=" ">\n'
+        b'    <subfield code="a">Modications\nof two-point\xe2\x80\xa8functions\xc2\xa0at K\xc3\xa4tlne</subfield>\n'
+        b'  </datafield>\n'
+        b'</record>\n'
+    )
+    result = record2marcxml(record)
+
+    assert expected == result
+
+
 def test_record2marcxml_raises_when_rules_were_not_implemented():
     record = {'$schema': 'http://localhost:5000/schemas/records/data.json'}
 
     with pytest.raises(NotImplementedError) as excinfo:
         record2marcxml(record)
     assert 'missing' in str(excinfo.value)
+
+
+def test_records2marcxml_stream_writes_a_collection():
+    records = [
+        {
+            '$schema': 'http://localhost:5000/schemas/records/hep.json',
+            'control_number': 4328,
+            'authors': [
+                {'full_name': 'Glashow, S.L.'},
+            ],
+        },
+        {
+            '$schema': 'http://localhost:5000/schemas/records/authors.json',
+            'control_number': 1010819,
+        },
+    ]
+    stream = BytesIO()
+
+    expected = (
+        b'<collection>'
+        b'<record>'
+        b'<controlfield tag="001">4328</controlfield>'
+        b'<datafield tag="100" ind1=" " ind2=" ">'
+        b'<subfield code="a">Glashow, S.L.</subfield>'
+        b'</datafield>'
+        b'</record>'
+        b'<record>'
+        b'<controlfield tag="001">1010819</controlfield>'
+        b'</record>'
+        b'</collection>'
+    )
+    records2marcxml_stream(records, stream)
+    result = stream.getvalue()
+
+    assert expected == result
+
+
+def test_records2marcxml_stream_matches_record2marcxml():
+    record = {
+        '$schema': 'http://localhost:5000/schemas/records/hep.json',
+        'control_number': 4328,
+        'abstracts': [
+            {
+                'source': 'submitter',
+                'value': u'Modi\u001Ccations of <two-point> functions & K\xe4tlne\r',
+            },
+        ],
+        'authors': [
+            {
+                'affiliations': [
+                    {'value': 'SISSA, Trieste'},
+                    {'value': 'Meudon Observ.'},
+                ],
+                'full_name': 'Puy, Denis',
+            },
+        ],
+        'inspire_categories': [
+            {'term': 'Accelerators'},
+        ],
+        'publication_info': [
+            {'year': 1975},
+        ],
+    }
+    stream = BytesIO()
+
+    expected = b''.join([
+        b'<collection>\n',
+        b''.join(b'  ' + line + b'\n' for line in record2marcxml(record).splitlines()),
+        b'</collection>\n',
+    ])
+    records2marcxml_stream([record], stream, pretty_print=True)
+    result = stream.getvalue()
+
+    assert expected == result
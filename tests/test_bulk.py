@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from inspire_dojson.bulk import bulk_marcxml2records
+from inspire_dojson.context import ConversionContext
+
+
+def test_bulk_marcxml2records_in_process(hep_marcxml):
+    marcxmls = [hep_marcxml(recid) for recid in range(1, 6)]
+
+    expected = [1, 2, 3, 4, 5]
+    result = [el.record['control_number'] for el in bulk_marcxml2records(marcxmls, workers=0, chunk_size=2)]
+
+    assert expected == result
+
+
+def test_bulk_marcxml2records_on_a_pool_preserves_order(hep_marcxml):
+    marcxmls = [hep_marcxml(recid) for recid in range(1, 21)]
+
+    expected = [
+        (index, 'http://localhost:5000/api/literature/{}'.format(index + 1))
+        for index in range(20)
+    ]
+    result = [
+        (el.index, el.record['self']['$ref'])
+        for el in bulk_marcxml2records(marcxmls, workers=2, chunk_size=3)
+    ]
+
+    assert expected == result
+
+
+def test_bulk_marcxml2records_isolates_errors(hep_marcxml):
+    marcxmls = [
+        hep_marcxml(1),
+        hep_marcxml('foo'),
+        hep_marcxml(3),
+    ]
+
+    results = list(bulk_marcxml2records(marcxmls, workers=0))
+
+    assert results[0].record['control_number'] == 1
+    assert results[1].record is None
+    assert 'ValueError' in results[1].error
+    assert results[2].record['control_number'] == 3
+
+
+def test_bulk_marcxml2records_reports_stats(hep_marcxml):
+    marcxmls = [hep_marcxml(1), hep_marcxml('foo'), hep_marcxml(3)]
+    stats = {}
+
+    list(bulk_marcxml2records(marcxmls, workers=2, chunk_size=1, ordered=False, stats=stats))
+
+    assert stats['records'] == 3
+    assert stats['errors'] == 1
+    assert stats['records_per_second'] > 0
+    assert sum(el['records'] for el in stats['workers'].values()) == 3
+
+
+def test_bulk_marcxml2records_installs_the_context_in_the_workers(hep_marcxml):
+    marcxmls = [hep_marcxml(recid) for recid in range(1, 4)]
+    context = ConversionContext(server_name='https://example.org')
+
+    expected = ['https://example.org/api/literature/{}'.format(recid) for recid in range(1, 4)]
+    result = [el.record['self']['$ref'] for el in bulk_marcxml2records(marcxmls, workers=2, context=context)]
+
+    assert expected == result
+
+
+def test_bulk_marcxml2records_validates_the_records(hep_marcxml):
+    url = (
+        '<datafield tag="856" ind1="4" ind2=" ">'
+        '  <subfield code="u">not a url</subfield>'
+        '</datafield>'
+    )
+    marcxmls = [hep_marcxml(1), hep_marcxml('foo'), hep_marcxml(3, url)]
+    stats = {}
+
+    results = list(bulk_marcxml2records(marcxmls, workers=2, chunk_size=2, stats=stats, validate=True))
+
+    assert [] == results[0].validation_errors
+    assert results[1].validation_errors is None
+    assert ["'not a url' is not a 'uri'"] == [el['message'] for el in results[2].validation_errors]
+    assert 1 == stats['invalid']
+    assert stats['validation_elapsed'] > 0
+
+
+def test_bulk_marcxml2records_does_not_validate_by_default(hep_marcxml):
+    results = list(bulk_marcxml2records([hep_marcxml(1)], workers=0))
+
+    assert results[0].validation_errors is None
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import io
+from multiprocessing.pool import ThreadPool
+
+from mock import patch
+
+from inspire_dojson import cache
+from inspire_dojson.api import marcxml2record, marcxml2records
+from inspire_dojson.cache import MemoryCache, SqliteCache, make_key
+from inspire_dojson.context import ConversionContext
+
+SNIPPET = (
+    '<record>'
+    '  <controlfield tag="001">1</controlfield>'
+    '  <datafield tag="245" ind1=" " ind2=" ">'
+    '    <subfield code="a">Superconductivity</subfield>'
+    '  </datafield>'
+    '  <datafield tag="980" ind1=" " ind2=" ">'
+    '    <subfield code="a">HEP</subfield>'
+    '  </datafield>'
+    '</record>'
+)
+
+
+def test_memory_cache_counts_hits_and_misses():
+    memory_cache = MemoryCache()
+
+    assert memory_cache.get('foo') is None
+    memory_cache.set('foo', {'bar': ['baz']})
+
+    expected = {'bar': ['baz']}
+    result = memory_cache.get('foo')
+
+    assert expected == result
+    assert 1 == memory_cache.hits
+    assert 1 == memory_cache.misses
+
+
+def test_memory_cache_counts_hits_and_misses_from_many_threads():
+    memory_cache = MemoryCache()
+    memory_cache.set('foo', {'bar': 'baz'})
+
+    def _get(index):
+        for _ in range(100):
+            memory_cache.get('foo' if index % 2 else 'qux')
+
+    pool = ThreadPool(8)
+    try:
+        pool.map(_get, range(40))
+    finally:
+        pool.close()
+
+    assert 2000 == memory_cache.hits
+    assert 2000 == memory_cache.misses
+
+
+def test_memory_cache_returns_copies():
+    memory_cache = MemoryCache()
+    memory_cache.set('foo', {'bar': ['baz']})
+
+    memory_cache.get('foo')['bar'].append('qux')
+
+    assert {'bar': ['baz']} == memory_cache.get('foo')
+
+
+def test_memory_cache_evicts_least_recently_used_records():
+    memory_cache = MemoryCache(max_size=30)
+    memory_cache.set('foo', {'a': 'foo'})
+    memory_cache.set('bar', {'a': 'bar'})
+    memory_cache.get('foo')
+    memory_cache.set('baz', {'a': 'baz'})
+
+    assert 2 == len(memory_cache)
+    assert 22 == memory_cache.size
+    assert memory_cache.get('foo') is not None
+    assert memory_cache.get('bar') is None
+    assert memory_cache.get('baz') is not None
+
+
+def test_memory_cache_ignores_records_larger_than_max_size():
+    memory_cache = MemoryCache(max_size=10)
+    memory_cache.set('foo', {'a': 'foobarbaz'})
+
+    assert 0 == len(memory_cache)
+    assert 0 == memory_cache.size
+
+
+def test_sqlite_cache_persists_records(tmpdir):
+    path = str(tmpdir.join('cache.db'))
+
+    sqlite_cache = SqliteCache(path)
+    sqlite_cache.set('foo', {'bar': ['baz']})
+    sqlite_cache.set('foo', {'bar': ['qux']})
+    sqlite_cache.close()
+
+    sqlite_cache = SqliteCache(path)
+
+    expected = {'bar': ['qux']}
+    result = sqlite_cache.get('foo')
+
+    assert expected == result
+    assert 1 == len(sqlite_cache)
+
+    sqlite_cache.clear()
+
+    assert sqlite_cache.get('foo') is None
+    assert 0 == sqlite_cache.hits
+    assert 1 == sqlite_cache.misses
+
+
+def test_make_key_ignores_line_endings_and_surrounding_whitespace():
+    context = ConversionContext()
+
+    expected = make_key('marcxml2record', SNIPPET, context)
+
+    assert expected == make_key('marcxml2record', SNIPPET.encode('utf8'), context)
+    assert expected == make_key('marcxml2record', '\n' + SNIPPET + '\r\n', context)
+    assert expected != make_key('marcxml2record', SNIPPET.replace('HEP', 'CORE'), context)
+
+
+def test_make_key_depends_on_the_conversion_the_context_and_the_version():
+    context = ConversionContext()
+    key = make_key('marcxml2record', SNIPPET, context)
+
+    assert key != make_key('record2marcxml', SNIPPET, context)
+    assert key != make_key('marcxml2record', SNIPPET, ConversionContext(server_name='example.com'))
+    with patch.object(cache, '_version', 'foo'):
+        assert key != make_key('marcxml2record', SNIPPET, context)
+
+
+def test_marcxml2record_with_cache():
+    memory_cache = MemoryCache()
+
+    expected = marcxml2record(SNIPPET)
+
+    assert expected == marcxml2record(SNIPPET, cache=memory_cache)
+    with patch('inspire_dojson.api._marcjson2record') as mock_marcjson2record:
+        assert expected == marcxml2record(SNIPPET, cache=memory_cache)
+
+    assert not mock_marcjson2record.called
+    assert 1 == memory_cache.hits
+    assert 1 == memory_cache.misses
+
+
+def test_marcxml2record_with_cache_depends_on_the_context():
+    memory_cache = MemoryCache()
+    snippet = SNIPPET.replace(
+        '</record>',
+        '<datafield tag="999" ind1="C" ind2="5"><subfield code="0">2</subfield></datafield></record>',
+    )
+
+    first = marcxml2record(snippet, context=ConversionContext(server_name='first.example.com'), cache=memory_cache)
+    second = marcxml2record(snippet, context=ConversionContext(server_name='second.example.com'), cache=memory_cache)
+
+    assert 'http://first.example.com/api/literature/2' == first['references'][0]['record']['$ref']
+    assert 'http://second.example.com/api/literature/2' == second['references'][0]['record']['$ref']
+    assert 2 == memory_cache.misses
+
+
+def test_marcxml2records_with_cache():
+    memory_cache = MemoryCache()
+    collection = u'<collection>{0}{0}{1}</collection>'.format(SNIPPET, SNIPPET.replace('HEP', 'CORE'))
+
+    expected = list(marcxml2records(io.BytesIO(collection.encode('utf8'))))
+    result = list(marcxml2records(io.BytesIO(collection.encode('utf8')), cache=memory_cache))
+
+    assert expected == result
+    assert 1 == memory_cache.hits
+    assert 2 == memory_cache.misses
+
+
+def test_marcxml2record_and_marcxml2records_share_their_cache():
+    memory_cache = MemoryCache()
+    collection = u'<?xml version="1.0"?>\n<collection>\n{}\n</collection>'.format(SNIPPET)
+
+    expected = marcxml2record(SNIPPET, cache=memory_cache)
+    result = list(marcxml2records(io.BytesIO(collection.encode('utf8')), cache=memory_cache))
+
+    assert [expected] == result
+    assert 1 == memory_cache.hits
+
+    memory_cache.clear()
+    list(marcxml2records(io.BytesIO(collection.encode('utf8')), cache=memory_cache))
+    marcxml2record(collection, cache=memory_cache)
+
+    assert 1 == memory_cache.hits
@@ -22,6 +22,11 @@
 
 from __future__ import absolute_import, division, print_function
 
+import ast
+import inspect
+import sys
+
+import pytest
 from dojson.contrib.marc21.utils import create_record
 
 from inspire_dojson.cds import cds2hep_marc
@@ -1360,3 +1365,64 @@ def test_document_type_from_multiple_980_a():
 
     assert validate(result['document_type'], subschema) is None
     assert expected == result['document_type']
+
+
+def _get_snippets():
+    # The MARCXML assigned to ``snippet`` in every test of this module.
+    tree = ast.parse(inspect.getsource(sys.modules[__name__]))
+    nodes = sorted(
+        (node for node in ast.walk(tree) if isinstance(node, ast.Assign) and any(
+            getattr(target, 'id', None) == 'snippet' for target in node.targets
+        )),
+        key=lambda node: node.lineno,
+    )
+
+    return [pytest.param(ast.literal_eval(node.value), id='line{}'.format(node.lineno)) for node in nodes]
+
+
+@pytest.mark.parametrize('snippet', _get_snippets())
+def test_hep_do_marc_matches_the_two_stage_conversion(snippet):
+    marc = cds2hep_marc.do(create_record(snippet))
+
+    expected = hep.do(create_record_from_dict(marc))
+    result = hep.do_marc(marc)
+
+    assert expected == result
+
+
+def test_hep_do_marc_converts_authors():
+    snippet = (
+        '<record>'
+        '  <controlfield tag="001">2270264</controlfield>'
+        '  <datafield tag="037" ind1=" " ind2=" ">'
+        '    <subfield code="a">CMS-PAS-SMP-15-001</subfield>'
+        '  </datafield>'
+        '  <datafield tag="100" ind1=" " ind2=" ">'
+        '    <subfield code="a">Glashow, S L</subfield>'
+        '    <subfield code="0">AUTHOR|(CDS)2068765</subfield>'
+        '  </datafield>'
+        '  <datafield tag="700" ind1=" " ind2=" ">'
+        '    <subfield code="a">Weinberg, S</subfield>'
+        '  </datafield>'
+        '  <datafield tag="700" ind1=" " ind2=" ">'
+        '    <subfield code="a">Salam, A</subfield>'
+        '    <subfield code="e">dir.</subfield>'
+        '  </datafield>'
+        '  <datafield tag="245" ind1=" " ind2=" ">'
+        '    <subfield code="a">Partial Symmetries of Weak Interactions</subfield>'
+        '  </datafield>'
+        '  <datafield tag="650" ind1="1" ind2="7">'
+        '    <subfield code="2">SzGeCERN</subfield>'
+        '    <subfield code="a">Particle Physics - Phenomenology</subfield>'
+        '  </datafield>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">ARTICLE</subfield>'
+        '  </datafield>'
+        '</record>'
+    )
+    result = hep.do_marc(cds2hep_marc.do(create_record(snippet)))
+
+    assert [{'full_name': 'Glashow, S.L.'}, {'full_name': 'Weinberg, S.'}] == [
+        {'full_name': author['full_name']} for author in result['authors']
+        if 'supervisor' not in author.get('inspire_roles', [])
+    ]
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import pickle
+
+import pytest
+from flask import current_app
+from mock import patch
+from six.moves import urllib
+
+from inspire_dojson.context import (
+    ConversionContext,
+    get_context,
+    install_context,
+    use_context,
+)
+
+
+@pytest.fixture
+def installed_context():
+    context = ConversionContext(server_name='installed.example.com')
+    install_context(context)
+    yield context
+    install_context(None)
+
+
+@pytest.mark.parametrize('relative_url', [
+    '/api/literature/1',
+    '/api/literature/1?format=json#foo',
+    '/api/../literature/1',
+    'api/literature/1',
+    '//example.org/api/literature/1',
+    'https://example.org/api/literature/1',
+])
+def test_absolute_url_is_the_same_as_urljoin(relative_url):
+    context = ConversionContext(server_name='https://example.com/inspire/')
+
+    expected = urllib.parse.urljoin('https://example.com/inspire/', relative_url)
+    result = context.absolute_url(relative_url)
+
+    assert expected == result
+
+
+def test_absolute_url_adds_scheme_to_server_name():
+    context = ConversionContext(server_name='localhost:5000')
+
+    expected = 'http://localhost:5000/api/literature/1'
+    result = context.absolute_url('/api/literature/1')
+
+    assert expected == result
+
+
+def test_is_legacy_url():
+    context = ConversionContext(legacy_base_url='http://inspirehep.net')
+
+    assert context.is_legacy_url('http://inspirehep.net')
+    assert context.is_legacy_url('inspirehep.net')
+    assert not context.is_legacy_url('http://example.com')
+
+
+def test_from_config_uses_defaults_for_missing_keys():
+    expected = ConversionContext('localhost:5000', 'http://inspirehep.net', '/afs/cern.ch/project/inspire/PROD')
+    result = ConversionContext.from_config({'SERVER_NAME': 'localhost:5000'})
+
+    assert expected == result
+
+
+def test_get_context_follows_the_app_config():
+    config = {'SERVER_NAME': 'example.com'}
+
+    with patch.dict(current_app.config, config):
+        assert ConversionContext(server_name='example.com') == get_context()
+        assert get_context() is get_context()
+
+    assert ConversionContext(server_name='localhost:5000') == get_context()
+
+
+def test_installed_context_takes_precedence_over_the_app_config(installed_context):
+    assert installed_context is get_context()
+
+
+def test_use_context_takes_precedence_over_the_installed_context(installed_context):
+    outer = ConversionContext(server_name='outer.example.com')
+    inner = ConversionContext(server_name='inner.example.com')
+
+    with use_context(outer):
+        with use_context(inner):
+            assert inner is get_context()
+        with use_context(None):
+            assert outer is get_context()
+        assert outer is get_context()
+
+    assert installed_context is get_context()
+
+
+def test_context_can_be_pickled():
+    context = ConversionContext('example.com', 'http://example.org', '/afs/foo')
+
+    result = pickle.loads(pickle.dumps(context))
+
+    assert context == result
+    assert 'http://example.com/foo' == result.absolute_url('/foo')
@@ -22,9 +22,12 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pickle
+
 from dojson.contrib.marc21.utils import create_record
 
 from inspire_dojson.hep import hep, hep2marc
+from inspire_dojson.hep.authors import AuthorList
 from inspire_schemas.api import load_schema, validate
 
 
@@ -1704,6 +1707,66 @@ def test_authors_from_700__a_double_e_handles_multiple_roles():
     assert expected == result['authors']
 
 
+def test_authors_from_100__a_u_and_double_700__a_u_removes_duplicates():
+    snippet = (
+        '<record>'
+        '  <datafield tag="100" ind1=" " ind2=" ">'
+        '    <subfield code="a">Aad, Georges</subfield>'
+        '    <subfield code="u">Marseille, CPPM</subfield>'
+        '  </datafield>'
+        '  <datafield tag="700" ind1=" " ind2=" ">'
+        '    <subfield code="a">Abbott, Brad</subfield>'
+        '    <subfield code="u">Oklahoma U.</subfield>'
+        '  </datafield>'
+        '  <datafield tag="700" ind1=" " ind2=" ">'
+        '    <subfield code="a">Aad, Georges</subfield>'
+        '    <subfield code="u">Marseille, CPPM</subfield>'
+        '  </datafield>'
+        '  <datafield tag="700" ind1=" " ind2=" ">'
+        '    <subfield code="a">Abbott, Brad</subfield>'
+        '    <subfield code="u">Oklahoma U.</subfield>'
+        '  </datafield>'
+        '</record>'
+    )
+
+    expected = [
+        {
+            'affiliations': [
+                {'value': 'Marseille, CPPM'},
+            ],
+            'full_name': 'Aad, Georges',
+        },
+        {
+            'affiliations': [
+                {'value': 'Oklahoma U.'},
+            ],
+            'full_name': 'Abbott, Brad',
+        },
+    ]
+    result = hep.do(create_record(snippet))
+
+    assert expected == result['authors']
+    assert type(result['authors']) is list
+
+
+def test_author_list_ignores_duplicates_and_can_be_pickled():
+    authors = AuthorList([{'full_name': 'Aad, Georges'}])
+    authors.append({'full_name': 'Abbott, Brad'})
+    authors.extend([{'full_name': 'Aad, Georges'}, {'full_name': 'Aad, Georges', 'emails': ['foo@bar.com']}])
+
+    expected = [
+        {'full_name': 'Aad, Georges'},
+        {'full_name': 'Abbott, Brad'},
+        {'full_name': 'Aad, Georges', 'emails': ['foo@bar.com']},
+    ]
+    result = pickle.loads(pickle.dumps(authors))
+
+    assert expected == authors
+    assert expected == result
+    result.append({'full_name': 'Abbott, Brad'})
+    assert expected == result
+
+
 def test_corporate_author_from_110__a():
     schema = load_schema('hep')
     subschema = schema['properties']['corporate_author']
@@ -22,16 +22,18 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pytest
 from dojson.contrib.marc21.utils import create_record
 
 from inspire_dojson.hep import hep, hep2marc
+from inspire_dojson.hep.references import _ReferenceBuilder
 from inspire_dojson.hep.rules.bd9xx import (
     COLLECTIONS_MAP,
     COLLECTIONS_REVERSE_MAP,
     DOCUMENT_TYPE_MAP,
     DOCUMENT_TYPE_REVERSE_MAP,
 )
-from inspire_schemas.api import load_schema, validate
+from inspire_schemas.api import ReferenceBuilder, load_schema, validate
 
 
 def test_collections_map_contains_all_valid_collections():
@@ -1541,3 +1543,105 @@ def test_references_from_999C5_0_h_m_o_r_t_y():
     result = hep2marc.do(result)
 
     assert expected == result['999C5']
+
+
+def test_references_from_many_999C5_keep_their_order():
+    snippet = (
+        '<record>'
+        '  <datafield tag="999" ind1="C" ind2="5">'
+        '    <subfield code="o">1</subfield>'
+        '    <subfield code="r">arXiv:1706.09516</subfield>'
+        '  </datafield>'
+        '  <datafield tag="999" ind1="C" ind2="5">'
+        '    <subfield code="o">2</subfield>'
+        '    <subfield code="h">Ardito, R.</subfield>'
+        '  </datafield>'
+        '  <datafield tag="999" ind1="C" ind2="5">'
+        '    <subfield code="o">3</subfield>'
+        '    <subfield code="r">CERN-TH-2017-001</subfield>'
+        '  </datafield>'
+        '</record>'
+    )
+
+    expected = [
+        {
+            'reference': {
+                'arxiv_eprint': '1706.09516',
+                'label': '1',
+            },
+        },
+        {
+            'reference': {
+                'authors': [
+                    {'full_name': 'Ardito, R.'},
+                ],
+                'label': '2',
+            },
+        },
+        {
+            'reference': {
+                'label': '3',
+                'report_numbers': [
+                    'CERN-TH-2017-001',
+                ],
+            },
+        },
+    ]
+    result = hep.do(create_record(snippet))
+
+    assert expected == result['references']
+
+
+def test_references2marc_does_not_modify_the_references():
+    record = {
+        'references': [
+            {
+                'reference': {
+                    'publication_info': {
+                        'journal_title': 'JHEP',
+                        'journal_volume': '62',
+                        'page_start': '5867',
+                        'year': 2007,
+                    },
+                },
+            },
+        ],
+    }
+
+    expected = [
+        {
+            's': 'JHEP,0762,5867',
+            'y': 2007,
+            'z': 0,
+        },
+    ]
+    result = hep2marc.do(record)
+
+    assert expected == result['999C5']
+    assert '62' == record['references'][0]['reference']['publication_info']['journal_volume']
+
+
+@pytest.mark.parametrize('method,values', [
+    ('add_uid', [
+        'arXiv:1706.09516',
+        'hep-th/9711200',
+        'math.AG/0501001',
+        '10.1016/0029-5582(61)90469-2',
+        'hdl:10443/1646',
+        'urn:nbn:de:hebis:30-1',
+        'C17-07-05',
+        '9780198506263',
+        'foo',
+        '',
+    ]),
+    ('add_report_number', ['arXiv:1706.09516', 'hep-th/9711200', 'CERN-TH-2017-001']),
+    ('add_author', ['Ardito, R.', 'R. Ardito']),
+])
+def test_reference_builder_gives_the_same_references_as_inspire_schemas(method, values):
+    for value in values:
+        expected = ReferenceBuilder()
+        getattr(expected, method)(value)
+        result = _ReferenceBuilder()
+        getattr(result, method)(value)
+
+        assert expected.obj == result.obj
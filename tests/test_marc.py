@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import mmap
+import pickle
+from io import BytesIO
+
+import pytest
+from lxml import etree
+
+from dojson.contrib.marc21.utils import create_record
+from dojson.utils import GroupableOrderedDict
+
+from inspire_dojson.api import _marcjson2record
+from inspire_dojson.hep import hep
+from inspire_dojson.marc import MarcDict, create_marc_record, read_iso2709, read_marc_in_json
+
+SNIPPET = (
+    '<record xmlns="http://www.loc.gov/MARC21/slim">'
+    '  <leader>00000nam</leader>'
+    '  <controlfield tag="001">4328</controlfield>'
+    '  <controlfield tag="005"></controlfield>'
+    '  <datafield tag="245" ind1=" " ind2=" ">'
+    '    <subfield code="a">Partial Symmetries of Weak Interactions</subfield>'
+    '  </datafield>'
+    '  <datafield tag="100" ind1="#" ind2="">'
+    '    <subfield code="a">Glashow, S.L.</subfield>'
+    '    <subfield code="u">Copenhagen U.</subfield>'
+    '    <subfield code="U">Harvard U.</subfield>'
+    '    <subfield code="x"></subfield>'
+    '  </datafield>'
+    '  <datafield tag="700" ind1=" " ind2=" ">'
+    '    <subfield code="a">Weinberg, S.</subfield>'
+    '  </datafield>'
+    '  <datafield tag="700" ind1=" " ind2=" ">'
+    '    <subfield code="a">Salam, A.</subfield>'
+    '  </datafield>'
+    '  <datafield tag="980" ind1=" " ind2=" ">'
+    '    <subfield code="a">HEP</subfield>'
+    '  </datafield>'
+    '  <datafield tag="999" ind1="C" ind2="5">'
+    '    <subfield code="x"></subfield>'
+    '  </datafield>'
+    '</record>'
+)
+
+
+def test_create_marc_record_equals_create_record():
+    expected = create_record(SNIPPET, keep_singletons=False)
+    result = create_marc_record(SNIPPET)
+
+    assert expected == result
+    assert expected.items(repeated=True) == result.items(repeated=True)
+
+
+def test_create_marc_record_accepts_bytes_and_elements():
+    expected = create_marc_record(SNIPPET)
+
+    assert expected == create_marc_record(SNIPPET.encode('utf-8'))
+    assert expected == create_marc_record(etree.fromstring(SNIPPET))
+
+
+def test_marc_dict_reads_like_a_groupable_ordered_dict():
+    expected = create_record(SNIPPET, keep_singletons=False)
+    result = create_marc_record(SNIPPET)
+
+    assert expected['001'] == result['001']
+    assert expected['700__'] == result['700__']
+    assert expected['100__']['u'] == result['100__']['u']
+    assert expected.get('999C5') == result.get('999C5')
+    assert expected.keys() == result.keys()
+    assert expected.keys(repeated=True) == result.keys(repeated=True)
+    assert expected.values(expand=True) == result.values(expand=True)
+    assert list(expected) == list(result)
+    assert len(expected) == len(result)
+    assert expected.items() == result.items()
+    assert expected.items(with_order=False, repeated=True) == result.items(with_order=False, repeated=True)
+
+
+def test_marc_dict_is_immutable():
+    record = create_marc_record(SNIPPET)
+
+    with pytest.raises(TypeError):
+        record['001'] = '1'
+    with pytest.raises(TypeError):
+        del record['001']
+    with pytest.raises(TypeError):
+        record.update({'001': '1'})
+
+
+def test_marc_dict_has_no_instance_dict():
+    record = MarcDict([('001', '4328')])
+
+    assert not hasattr(record, '__dict__')
+
+
+def test_marc_dict_can_be_pickled():
+    record = create_marc_record(SNIPPET)
+
+    assert record.items(repeated=True) == pickle.loads(pickle.dumps(record)).items(repeated=True)
+
+
+def test_marc_dict_to_groupable():
+    expected = create_record(SNIPPET, keep_singletons=False)
+    result = create_marc_record(SNIPPET).to_groupable()
+
+    assert isinstance(result, GroupableOrderedDict)
+    assert isinstance(result['100__'], GroupableOrderedDict)
+    assert expected.items(repeated=True) == result.items(repeated=True)
+
+
+def test_rule_sets_convert_marc_dicts_like_groupable_ordered_dicts():
+    expected = _marcjson2record(create_record(SNIPPET, keep_singletons=False))
+    result = _marcjson2record(create_marc_record(SNIPPET))
+
+    assert expected == result
+
+
+def test_rule_sets_accept_the_options_of_dojson():
+    expected = hep.do(create_record(SNIPPET, keep_singletons=False), ignore_missing=True)
+    result = hep.do(create_marc_record(SNIPPET), ignore_missing=True)
+
+    assert expected == result
+
+
+def test_read_iso2709():
+    data = _iso2709(SNIPPET)
+
+    expected = create_marc_record(SNIPPET)
+    result = list(read_iso2709(data + b'\n' + data))
+
+    assert 2 == len(result)
+    assert expected.items(with_order=False, repeated=True)[1:] == result[0].items(with_order=False, repeated=True)[1:]
+    assert expected.items(with_order=False, repeated=True)[1:] == result[1].items(with_order=False, repeated=True)[1:]
+    assert data[:24].decode('ascii') == result[0]['leader']
+
+
+def test_read_iso2709_from_a_memory_mapped_file(tmpdir):
+    path = tmpdir.join('records.mrc')
+    path.write_binary(_iso2709(SNIPPET) * 3)
+
+    with path.open('rb') as fd:
+        expected = list(read_iso2709(fd))
+        fd.seek(0)
+        result = list(read_iso2709(mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)))
+
+    assert 3 == len(result)
+    assert expected == result
+
+
+def test_read_iso2709_raises_on_truncated_records():
+    with pytest.raises(ValueError):
+        list(read_iso2709(_iso2709(SNIPPET)[:-10]))
+
+
+def test_read_marc_in_json():
+    expected = create_marc_record(SNIPPET)
+    result = list(read_marc_in_json(BytesIO(_marc_in_json(SNIPPET) + b'\n\n' + _marc_in_json(SNIPPET))))
+
+    assert 2 == len(result)
+    assert expected.items(repeated=True) == result[0].items(repeated=True)
+    assert expected.items(repeated=True) == result[1].items(repeated=True)
+
+
+def _get_fields(marcxml):
+    tree = etree.fromstring(marcxml)
+    for field in tree.iter('{*}controlfield', '{*}datafield'):
+        subfields = [(subfield.get('code'), subfield.text or '') for subfield in field.iter('{*}subfield')]
+        yield field.get('tag'), field.get('ind1'), field.get('ind2'), field.text or '', subfields
+
+
+def _iso2709(marcxml):
+    directory = b''
+    data = b''
+    for tag, ind1, ind2, text, subfields in _get_fields(marcxml):
+        if ind1 is None:
+            field = text.encode('utf-8') + b'\x1e'
+        else:
+            field = ((ind1 or ' ') + (ind2 or ' ') + ''.join('\x1f' + code + value for code, value in subfields)).encode('utf-8') + b'\x1e'
+        directory += '{}{:04d}{:05d}'.format(tag, len(field), len(data)).encode('ascii')
+        data += field
+
+    base_address = 24 + len(directory) + 1
+    leader = '{:05d}nam a22{:05d}   4500'.format(base_address + len(data) + 1, base_address).encode('ascii')
+
+    return leader + directory + b'\x1e' + data + b'\x1d'
+
+
+def _marc_in_json(marcxml):
+    fields = []
+    for tag, ind1, ind2, text, subfields in _get_fields(marcxml):
+        if ind1 is None:
+            fields.append({tag: text})
+        else:
+            fields.append({tag: {'ind1': ind1, 'ind2': ind2, 'subfields': [{code: value} for code, value in subfields]}})
+
+    return json.dumps({'leader': '00000nam', 'fields': fields}).encode('utf-8')
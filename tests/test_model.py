@@ -22,7 +22,20 @@
 
 from __future__ import absolute_import, division, print_function
 
-from inspire_dojson.model import FilterOverdo, add_schema
+import ast
+import inspect
+import sys
+import time
+from importlib import import_module
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+from dojson import utils
+from dojson.errors import IgnoreKey
+
+from inspire_dojson.api import RULE_SETS
+from inspire_dojson.model import FilterOverdo, add_schema, clean_record, filter_keys
 
 
 def test_filteroverdo_works_without_filters():
@@ -41,3 +54,439 @@ def test_add_schema():
     result = model.do({})
 
     assert expected == result
+
+
+def test_filteroverdo_memoizes_rule_lookups():
+    model = FilterOverdo()
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    model.build()
+
+    assert model.index.query('100__') is model.index.query('100__')
+    assert '100__' in model.index._cache
+    assert model.index.query('700__') is None
+    assert '700__' in model.index._cache
+
+
+def test_filteroverdo_looks_up_literal_keys_in_advance():
+    model = FilterOverdo()
+
+    @model.over('foo', '^001')
+    def foo(self, key, value):
+        return value
+
+    @model.over('bar', '^control_number$')
+    def bar(self, key, value):
+        return value
+
+    model.build()
+
+    assert {'001', 'control_number'} == set(model.index._cache)
+
+
+def test_filteroverdo_rebuilds_the_index_when_adding_rules():
+    model = FilterOverdo()
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    assert {'foo': 'bar'} == model.do({'100__': 'bar', '700__': 'baz'})
+
+    @model.over('foo', '^700..')
+    def bar(self, key, value):
+        return value
+
+    assert {'foo': 'baz'} == model.do({'700__': 'baz'})
+
+
+def test_filteroverdo_profiles_rules_and_filters():
+    def _filter(record, blob):
+        return record
+
+    model = FilterOverdo(filters=[_filter])
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    @model.over('bar', '^700..')
+    def bar(self, key, value):
+        raise ValueError(value)
+
+    profiler = model.enable_profiling()
+    model.do({'100__': 'baz'})
+    model.do({'100__': 'qux'})
+    with pytest.raises(ValueError):
+        model.do({'700__': 'quux'})
+
+    result = profiler.report()
+    foo_name = '{}.foo:^100..'.format(__name__)
+    bar_name = '{}.bar:^700..'.format(__name__)
+
+    assert 2 == result['rules'][foo_name]['calls']
+    assert 0 == result['rules'][foo_name]['exceptions']
+    assert result['rules'][foo_name]['total_time'] >= result['rules'][foo_name]['max_time']
+    assert 1 == result['rules'][bar_name]['exceptions']
+    assert 2 == result['filters']['_filter']['calls']
+
+
+def test_filteroverdo_profiles_rules_with_the_same_name_separately():
+    model = FilterOverdo()
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    first = foo
+
+    @model.over('bar', '^700..')
+    def foo(self, key, value):
+        return value
+
+    foo.__module__ = 'inspire_dojson.hep.rules.bd7xx'
+
+    profiler = model.enable_profiling()
+    model.do({'100__': 'baz', '700__': 'qux'})
+    model.do({'700__': 'qux'})
+
+    expected = {
+        '{}.foo:^100..'.format(first.__module__): 1,
+        'inspire_dojson.hep.rules.bd7xx.foo:^700..': 2,
+    }
+    result = {name: entry['calls'] for name, entry in profiler.report()['rules'].items()}
+
+    assert expected == result
+
+
+def test_filteroverdo_does_not_count_ignored_keys_as_exceptions():
+    model = FilterOverdo()
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        raise IgnoreKey('foo')
+
+    profiler = model.enable_profiling()
+    model.do({'100__': 'bar'})
+
+    foo_name = '{}.foo:^100..'.format(__name__)
+
+    assert 1 == profiler.report()['rules'][foo_name]['calls']
+    assert 0 == profiler.report()['rules'][foo_name]['exceptions']
+
+
+def test_filteroverdo_disable_profiling_calls_rules_directly():
+    model = FilterOverdo()
+
+    @model.over('foo', '^100..', '^700..')
+    @utils.for_each_value
+    def foo(self, key, value):
+        return value
+
+    profiler = model.enable_profiling()
+    assert {'foo': ['bar']} == model.do({'100__': 'bar'})
+
+    model.disable_profiling()
+    assert {'foo': ['bar']} == model.do({'100__': 'bar'})
+
+    assert model.profiler is None
+    assert 1 == profiler.report()['rules']['{}.foo:^100..'.format(__name__)]['calls']
+    assert model.index.query('100__')[1] is foo
+
+
+def test_filteroverdo_imports_rule_modules_when_building():
+    model = FilterOverdo(rule_modules=['colorsys'])
+    sys.modules.pop('colorsys', None)
+
+    model.build()
+
+    assert 'colorsys' in sys.modules
+
+
+def test_filteroverdo_orders_rules_by_rule_module():
+    model = FilterOverdo(rule_modules=['inspire_dojson.utils.geo', 'inspire_dojson.utils.enums'])
+
+    def foo(self, key, value):
+        return 'foo'
+
+    def bar(self, key, value):
+        return 'bar'
+
+    foo.__module__ = 'inspire_dojson.utils.enums'
+    bar.__module__ = 'inspire_dojson.utils.geo'
+
+    model.over('baz', '^100..')(foo)
+    model.over('baz', '^100..')(bar)
+
+    assert {'baz': 'bar'} == model.do({'100__': 'qux'})
+
+
+def test_filteroverdo_do_incremental_only_runs_the_rules_of_changed_keys():
+    model = FilterOverdo(filters=[add_schema('hep.json'), clean_record])
+    calls = []
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        calls.append(key)
+        return value
+
+    @model.over('bar', '^700..')
+    @utils.for_each_value
+    def bar(self, key, value):
+        calls.append(key)
+        return value
+
+    old_blob = {'100__': 'baz', '700__': ['qux']}
+    new_blob = {'100__': 'baz', '700__': ['qux', 'quux']}
+    old_record = model.do(old_blob)
+    del calls[:]
+
+    expected = {'$schema': 'hep.json', 'foo': 'baz', 'bar': ['qux', 'quux']}
+    result = model.do_incremental(old_blob, new_blob, old_record)
+
+    assert expected == result
+    assert ['700__', '700__'] == calls
+    assert result['foo'] is old_record['foo']
+
+
+def test_filteroverdo_do_incremental_removes_keys_of_removed_fields():
+    model = FilterOverdo(filters=[clean_record])
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    @model.over('bar', '^700..')
+    def bar(self, key, value):
+        return value
+
+    old_blob = {'100__': 'baz', '700__': 'qux'}
+    new_blob = {'100__': 'baz'}
+
+    expected = {'foo': 'baz'}
+    result = model.do_incremental(old_blob, new_blob, model.do(old_blob))
+
+    assert expected == result
+
+
+def test_filteroverdo_do_incremental_runs_rules_sharing_keys():
+    model = FilterOverdo(filters=[clean_record])
+
+    @model.over('foo', '^100..', side_effects=['bar'])
+    def foo(self, key, value):
+        self.setdefault('bar', []).append(value)
+        return value
+
+    @model.over('bar', '^700..')
+    def bar(self, key, value):
+        return self.get('bar', []) + [value]
+
+    @model.over('baz', '^980..')
+    def baz(self, key, value):
+        return value
+
+    old_blob = {'100__': 'qux', '700__': 'quux', '980__': 'plugh'}
+    new_blob = {'100__': 'xyzzy', '700__': 'quux', '980__': 'plugh'}
+
+    expected = model.do(new_blob)
+    result = model.do_incremental(old_blob, new_blob, model.do(old_blob))
+
+    assert expected == result
+    assert {'foo': 'xyzzy', 'bar': ['xyzzy', 'quux'], 'baz': 'plugh'} == result
+
+
+def test_filteroverdo_do_incremental_runs_filters_using_changed_keys():
+    @filter_keys(['foo', 'bar'], blob_keys=['980__'])
+    def _filter(record, blob):
+        if 'foo' in record and blob.get('980__') == 'CORE':
+            record['bar'] = record['foo']
+        return record
+
+    model = FilterOverdo(filters=[_filter, clean_record])
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    old_blob = {'100__': 'baz'}
+    new_blob = {'100__': 'baz', '980__': 'CORE'}
+
+    expected = {'foo': 'baz', 'bar': 'baz'}
+    result = model.do_incremental(old_blob, new_blob, model.do(old_blob))
+
+    assert expected == result
+
+
+def test_filteroverdo_do_incremental_converts_in_full_with_undeclared_filters():
+    def _filter(record, blob):
+        record['bar'] = len(record)
+        return record
+
+    model = FilterOverdo(filters=[_filter])
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    expected = {'foo': 'baz', 'bar': 1}
+    result = model.do_incremental({}, {'100__': 'baz'}, {'bar': 0})
+
+    assert expected == result
+
+
+def test_rules_declare_the_keys_they_share_with_other_rules():
+    def _get_key(node):
+        if isinstance(node, ast.Subscript) and _is_self(node.value):
+            index = node.slice
+            if isinstance(index, ast.Index):
+                index = index.value
+            return _literal(index)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and _is_self(node.func.value):
+            return _literal(node.args[0]) if node.args else None
+        elif isinstance(node, ast.Compare) and any(_is_self(el) for el in node.comparators):
+            return _literal(node.left)
+
+    def _is_self(node):
+        return isinstance(node, ast.Name) and node.id == 'self'
+
+    def _literal(node):
+        try:
+            return ast.literal_eval(node)
+        except ValueError:
+            return None
+
+    modules = set()
+    for rule_set in RULE_SETS.values():
+        modules.update(rule_set.rule_modules)
+
+    undeclared = []
+    for name in sorted(modules):
+        tree = ast.parse(inspect.getsource(import_module(name)))
+        for function in ast.walk(tree):
+            if not isinstance(function, ast.FunctionDef):
+                continue
+
+            keys = set(_get_key(node) for node in ast.walk(function)) - {None}
+            for decorator in function.decorator_list:
+                if not (isinstance(decorator, ast.Call) and getattr(decorator.func, 'attr', None) == 'over'):
+                    continue
+                rule_set = RULE_SETS[decorator.func.value.id]
+                rule_name = _literal(decorator.args[0])
+                for key in keys - {rule_name} - rule_set.side_effects[rule_name]:
+                    undeclared.append((name, function.name, key))
+
+    assert [] == undeclared
+
+
+def test_filteroverdo_do_marc_converts_repeated_fields():
+    def _filter(record, blob):
+        record['bar'] = len(blob['700__'])
+        return record
+
+    model = FilterOverdo(filters=[_filter])
+
+    @model.over('foo', '^(100|700)..')
+    @utils.for_each_value
+    def foo(self, key, value):
+        return value['a']
+
+    marc = {'100__': {'a': 'baz'}, '700__': [{'a': 'qux'}, {'a': 'quux'}]}
+
+    expected = model.do(utils.GroupableOrderedDict(marc))
+    result = model.do_marc(marc)
+
+    assert expected == result
+    assert {'foo': ['baz', 'qux', 'quux'], 'bar': 2} == result
+
+
+def test_filteroverdo_do_only_runs_the_rules_of_the_requested_keys():
+    model = FilterOverdo(filters=[add_schema('hep.json'), clean_record])
+    calls = []
+
+    @model.over('foo', '^100..', side_effects=['bar'])
+    def foo(self, key, value):
+        calls.append(key)
+        self['bar'] = value
+        return value
+
+    @model.over('baz', '^700..')
+    def baz(self, key, value):
+        calls.append(key)
+        return value
+
+    expected = {'bar': 'qux'}
+    result = model.do({'100__': 'qux', '700__': 'quux'}, only=['bar'])
+
+    assert expected == result
+    assert ['100__'] == calls
+
+
+def test_filteroverdo_do_only_runs_the_filters_of_the_requested_keys():
+    model = FilterOverdo(filters=[add_schema('hep.json'), clean_record])
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    assert {'$schema': 'hep.json'} == model.do({'100__': 'bar'}, only=['$schema'])
+    assert {'foo': 'bar'} == model.do_marc({'100__': 'bar'}, only=['foo'])
+
+
+def test_filteroverdo_do_only_converts_in_full_with_undeclared_filters():
+    def _filter(record, blob):
+        record['bar'] = len(record)
+        return record
+
+    model = FilterOverdo(filters=[_filter])
+
+    @model.over('foo', '^100..')
+    def foo(self, key, value):
+        return value
+
+    assert model.get_required_keys(['bar']) is None
+    assert {'bar': 1} == model.do({'100__': 'baz'}, only=['bar'])
+
+
+def test_filteroverdo_do_only_cannot_be_combined_with_other_options():
+    model = FilterOverdo()
+
+    with pytest.raises(TypeError):
+        model.do({}, only=['foo'], ignore_missing=False)
+
+
+def test_filteroverdo_builds_a_cold_rule_set_once_from_many_threads():
+    from inspire_dojson.hep import hep
+
+    built = []
+
+    collect_entry_points = hep._collect_entry_points
+
+    def _collect_entry_points_slowly():
+        built.append(None)
+        time.sleep(0.1)
+        collect_entry_points()
+
+    blob = {
+        '001': '1',
+        '245__': {'a': 'foo'},
+        '980__': {'a': 'HEP'},
+    }
+
+    def _do(index):
+        return hep.do(blob)
+
+    pool = ThreadPool(8)
+    try:
+        expected = pool.apply(_do, (0,))
+        hep._collect_entry_points = _collect_entry_points_slowly
+        hep.index = None
+        results = pool.map(_do, range(8))
+    finally:
+        del hep._collect_entry_points
+        pool.close()
+
+    assert [expected] * 8 == results
+    assert 1 == len(built)
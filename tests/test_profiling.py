@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import json
+
+import pytest
+from six import StringIO
+
+from inspire_dojson.api import RULE_SETS, marcxml2record
+from inspire_dojson.profiling import (
+    disable_profiling,
+    dump_profiling_report,
+    enable_profiling,
+    get_profiling_report,
+    reset_profiling,
+)
+
+
+@pytest.fixture
+def profiling():
+    enable_profiling('hep')
+    yield
+    disable_profiling()
+
+
+SNIPPET = (
+    '<record>'
+    '  <datafield tag="245" ind1=" " ind2=" ">'
+    '    <subfield code="a">Partial Symmetries of Weak Interactions</subfield>'
+    '  </datafield>'
+    '  <datafield tag="980" ind1=" " ind2=" ">'
+    '    <subfield code="a">HEP</subfield>'
+    '  </datafield>'
+    '</record>'
+)
+
+
+def test_get_profiling_report_is_empty_when_profiling_is_disabled():
+    marcxml2record(SNIPPET)
+
+    assert {} == get_profiling_report()
+    assert all(rule_set.profiler is None for rule_set in RULE_SETS.values())
+
+
+def test_get_profiling_report(profiling):
+    marcxml2record(SNIPPET)
+    marcxml2record(SNIPPET)
+
+    result = get_profiling_report()
+
+    assert ['hep'] == list(result)
+    assert 2 == result['hep']['rules']['inspire_dojson.hep.rules.bd2xx.titles:^(210|245|246|247)..']['calls']
+    assert 2 == result['hep']['filters']['_add_schema']['calls']
+
+
+def test_reset_profiling(profiling):
+    marcxml2record(SNIPPET)
+    reset_profiling()
+
+    assert {'hep': {'filters': {}, 'rules': {}}} == get_profiling_report()
+
+
+def test_dump_profiling_report(profiling):
+    marcxml2record(SNIPPET)
+
+    fp = StringIO()
+    dump_profiling_report(fp, 'hep')
+
+    assert get_profiling_report('hep') == json.loads(fp.getvalue())
+
+
+def test_enable_profiling_raises_on_unknown_rule_sets():
+    with pytest.raises(ValueError):
+        enable_profiling('foo')
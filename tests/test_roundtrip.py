@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import json
+
+from inspire_dojson.roundtrip import check_roundtrips, main
+
+
+def test_check_roundtrips_reports_lossless_records(hep_marcxml):
+    report = check_roundtrips([hep_marcxml(1)], workers=0)
+
+    assert 1 == report['records']
+    assert 1 == report['lossless']
+    assert {'lost': 0, 'records': 1} == report['json_keys']['titles']
+    assert {'lost': 0, 'records': 1} == report['marc_tags']['245']
+
+
+def test_check_roundtrips_reports_lost_keys_and_tags(hep_marcxml):
+    fields = (
+        '  <datafield tag="100" ind1=" " ind2=" ">'
+        '    <subfield code="a">Glashow, S.L.</subfield>'
+        '    <subfield code="x">1008235</subfield>'
+        '  </datafield>'
+    )
+
+    report = check_roundtrips([hep_marcxml(1, fields), hep_marcxml(2)], workers=0)
+
+    assert 2 == report['records']
+    assert 1 == report['lossless']
+    assert {'lost': 1, 'records': 1} == report['json_keys']['authors']
+    assert {'lost': 1, 'records': 1} == report['marc_tags']['100']
+    assert {'lost': 0, 'records': 2} == report['json_keys']['titles']
+
+    lossy = [el for el in report['slowest'] if el['json_keys']]
+    assert [1] == [el['control_number'] for el in lossy]
+    assert ['authors'] == lossy[0]['json_keys']
+
+
+def test_check_roundtrips_skips_other_collections_and_counts_errors(hep_marcxml):
+    institution = (
+        '<record>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">INSTITUTION</subfield>'
+        '  </datafield>'
+        '</record>'
+    )
+
+    report = check_roundtrips([institution, hep_marcxml('foo')], workers=0)
+
+    assert 0 == report['records']
+    assert 1 == report['skipped']
+    assert {'ValueError': 1} == report['errors']
+
+
+def test_check_roundtrips_on_a_pool(hep_marcxml):
+    marcxmls = [hep_marcxml(recid) for recid in range(1, 21)]
+
+    report = check_roundtrips(marcxmls, workers=2, chunk_size=3, slowest=5)
+
+    assert 20 == report['records']
+    assert 20 == report['lossless']
+    assert 5 == len(report['slowest'])
+    assert sorted(report['slowest'], key=lambda el: -el['elapsed']) == report['slowest']
+
+
+def test_main_writes_the_report(tmpdir, hep_marcxml):
+    collection = tmpdir.join('records.xml')
+    collection.write(u'<collection>{}{}</collection>'.format(hep_marcxml(1), hep_marcxml(2)))
+    output = tmpdir.join('report.json')
+
+    assert 0 == main([str(collection), '--workers', '0', '--output', str(output)])
+
+    report = json.loads(output.read())
+    assert 2 == report['records']
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from io import BytesIO
+
+import pytest
+from lxml import etree
+
+from inspire_dojson.api import _get_rule_set_name
+from inspire_dojson.marc import create_marc_record
+from inspire_dojson.routing import route_marcxml_records, sniff_rule_set_name
+
+
+@pytest.mark.parametrize('snippet,expected', [
+    (
+        '<record>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">HEPNAMES</subfield>'
+        '  </datafield>'
+        '</record>',
+        'hepnames',
+    ),
+    (
+        '<marc:record xmlns:marc="http://www.loc.gov/MARC21/slim">'
+        '  <marc:datafield tag="980" ind1="" ind2="#">'
+        '    <marc:subfield code="b">CORE</marc:subfield>'
+        '    <marc:subfield code="a">Conferences</marc:subfield>'
+        '  </marc:datafield>'
+        '</marc:record>',
+        'conferences',
+    ),
+    (
+        "<record>"
+        "  <datafield ind1='1' tag='980' ind2=' '>"
+        "    <subfield code='a'>JOB</subfield>"
+        "  </datafield>"
+        "</record>",
+        'hep',
+    ),
+    (
+        '<record>'
+        '  <controlfield tag="003">SzGeCERN</controlfield>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">DATA</subfield>'
+        '  </datafield>'
+        '</record>',
+        'cds2hep_marc',
+    ),
+    (
+        '<record>'
+        '  <!-- <datafield tag="980" ind1=" " ind2=" "><subfield code="a">JOB</subfield></datafield> -->'
+        '  <datafield tag="980" ind1=" " ind2=" "/>'
+        '</record>',
+        'hep',
+    ),
+    (
+        '<record>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">&#74;OB</subfield>'
+        '  </datafield>'
+        '</record>',
+        'jobs',
+    ),
+    (
+        '<record>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a"><![CDATA[EXPERIMENT]]></subfield>'
+        '  </datafield>'
+        '</record>',
+        'experiments',
+    ),
+])
+def test_sniff_rule_set_name(snippet, expected):
+    assert expected == _get_rule_set_name(create_marc_record(snippet))
+    assert expected == sniff_rule_set_name(snippet)
+    assert expected == sniff_rule_set_name(snippet.encode('utf-8'))
+    assert expected == sniff_rule_set_name(etree.fromstring(snippet))
+
+
+def test_route_marcxml_records():
+    collection = (
+        b'<collection xmlns="http://www.loc.gov/MARC21/slim">'
+        b'  <record>'
+        b'    <controlfield tag="001">1</controlfield>'
+        b'    <datafield tag="980" ind1=" " ind2=" ">'
+        b'      <subfield code="a">HEPNAMES</subfield>'
+        b'    </datafield>'
+        b'  </record>'
+        b'  <record>'
+        b'    <controlfield tag="001">2</controlfield>'
+        b'  </record>'
+        b'  <record>'
+        b'    <controlfield tag="001">3</controlfield>'
+        b'    <datafield tag="980" ind1=" " ind2=" ">'
+        b'      <subfield code="a">JOB</subfield>'
+        b'    </datafield>'
+        b'  </record>'
+        b'</collection>'
+    )
+    hepnames = []
+    others = []
+
+    expected = {'hep': 1, 'hepnames': 1, 'jobs': 1}
+    result = route_marcxml_records(BytesIO(collection), {'hepnames': hepnames.append}, default=others.append)
+
+    assert expected == result
+    assert ['1'] == [create_marc_record(marcxml)['001'] for marcxml in hepnames]
+    assert ['2', '3'] == [create_marc_record(marcxml)['001'] for marcxml in others]
+
+
+def test_route_marcxml_records_skips_records_without_a_sink():
+    collection = (
+        b'<collection>'
+        b'  <record><controlfield tag="001">1</controlfield></record>'
+        b'</collection>'
+    )
+
+    assert {'hep': 1} == route_marcxml_records(BytesIO(collection), {})
@@ -22,20 +22,25 @@
 
 from __future__ import absolute_import, division, print_function
 
+from collections import OrderedDict
+
 import pytest
 
 from flask import current_app
 from mock import patch
 
 from inspire_dojson.utils import (
+    CleanList,
     absolute_url,
     afs_url,
     normalize_rank,
     force_single_element,
     get_recid_from_ref,
     get_record_ref,
+    memoize,
     dedupe_all_lists,
     strip_empty_values,
+    strip_empty_values_and_dedupe_lists,
     normalize_date_aggressively,
 )
 
@@ -302,6 +307,91 @@ def test_strip_empty_values_returns_none_on_none():
     assert strip_empty_values(None) is None
 
 
+def test_strip_empty_values_and_dedupe_lists():
+    obj = {
+        '_foo': (),
+        'foo': (1, 2, 3, 1),
+        '_bar': [None, '', {}],
+        'bar': [{'baz': None, 'qux': [1, 1]}, {'qux': [1]}, {'qux': [2]}],
+        'l0': list(range(10)) + list(range(10)),
+        'o2': [{'foo': [1, 2]}, {'foo': [1, 1, 2]}] * 10,
+        'quux': False,
+        'plugh': 0,
+    }
+
+    expected = dedupe_all_lists(strip_empty_values(obj))
+    result = strip_empty_values_and_dedupe_lists(obj)
+
+    assert expected == result
+    assert {'qux': [1]} == result['bar'][0]
+    assert (1, 2, 3) == result['foo']
+
+
+def test_strip_empty_values_and_dedupe_lists_does_not_copy_clean_values():
+    obj = {
+        'foo': [{'bar': 'baz'}, {'bar': 'qux'}],
+        'quux': {'plugh': [1, 2]},
+    }
+
+    result = strip_empty_values_and_dedupe_lists(obj)
+
+    assert result is obj
+    assert result['foo'][0] is obj['foo'][0]
+
+
+def test_strip_empty_values_and_dedupe_lists_does_not_modify_its_input():
+    obj = {
+        'foo': [{'bar': 'baz'}, {'bar': 'baz'}],
+        'quux': {'plugh': [1, 2], 'xyzzy': None},
+    }
+
+    result = strip_empty_values_and_dedupe_lists(obj)
+
+    assert {'foo': [{'bar': 'baz'}], 'quux': {'plugh': [1, 2]}} == result
+    assert [{'bar': 'baz'}, {'bar': 'baz'}] == obj['foo']
+    assert {'plugh': [1, 2], 'xyzzy': None} == obj['quux']
+    assert result['quux']['plugh'] is obj['quux']['plugh']
+
+
+def test_strip_empty_values_and_dedupe_lists_handles_dict_subclasses():
+    obj = OrderedDict([('foo', None), ('bar', 1), ('baz', [None]), ('qux', [1, 1])])
+
+    expected = dedupe_all_lists(strip_empty_values(obj))
+    result = strip_empty_values_and_dedupe_lists(obj)
+
+    assert expected == result
+    assert {'bar': 1, 'qux': [1]} == result
+
+
+def test_strip_empty_values_and_dedupe_lists_keeps_values_of_different_types():
+    obj = {
+        'foo': [[1, 2], (1, 2), [1, 2]],
+        'bar': [{'baz': 'qux'}, {('baz', 'qux')}],
+    }
+
+    expected = dedupe_all_lists(strip_empty_values(obj))
+    result = strip_empty_values_and_dedupe_lists(obj)
+
+    assert expected == result
+    assert [[1, 2], (1, 2)] == result['foo']
+    assert [{'baz': 'qux'}, {('baz', 'qux')}] == result['bar']
+
+
+def test_strip_empty_values_and_dedupe_lists_returns_none_on_empty_values():
+    assert strip_empty_values_and_dedupe_lists(None) is None
+    assert strip_empty_values_and_dedupe_lists({'foo': [None, {}]}) is None
+
+
+def test_strip_empty_values_and_dedupe_lists_trusts_clean_lists():
+    obj = {'foo': CleanList([{'bar': 'baz'}, {'bar': 'baz'}])}
+
+    result = strip_empty_values_and_dedupe_lists(obj)
+
+    assert {'foo': [{'bar': 'baz'}, {'bar': 'baz'}]} == result
+    assert type(result['foo']) is list
+    assert strip_empty_values_and_dedupe_lists(CleanList()) is None
+
+
 def test_normalize_date_aggressively_accepts_correct_date():
     assert normalize_date_aggressively('2015-02-24') == '2015-02-24'
 
@@ -321,3 +411,20 @@ def test_normalize_date_aggressively_raises_on_wrong_format():
 
 def test_normalize_date_aggressively_ignores_fake_dates():
         assert normalize_date_aggressively('0000') is None
+
+
+def test_memoize():
+    calls = []
+
+    def _double(value):
+        calls.append(value)
+        return 2 * value
+
+    double = memoize(_double)
+
+    assert 4 == double(2)
+    assert 4 == double(2)
+    assert [2] == calls
+    assert [1, 1] == double([1])
+    assert [1, 1] == double([1])
+    assert [2, [1], [1]] == calls
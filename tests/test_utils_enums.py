@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import importlib
+import pkgutil
+
+from mock import patch
+
+from inspire_schemas import api as schemas_api
+from inspire_schemas import utils as schemas_utils
+
+import inspire_dojson
+from inspire_dojson import validation
+from inspire_dojson.api import marcxml2record
+from inspire_dojson.utils import enums
+
+
+def test_enums_are_frozensets():
+    assert isinstance(enums.ISBN_MEDIA, frozenset)
+    assert 'hardcover' in enums.ISBN_MEDIA
+    assert 'erratum' in enums.MATERIALS
+    assert 'review' in enums.PUBLICATION_TYPES
+    assert 'curator' in enums.INSPIRE_CATEGORY_SOURCES
+    assert 'Astrophysics' in enums.INSPIRE_CATEGORIES
+    assert 'hep-th' in enums.ARXIV_CATEGORIES
+
+
+def test_enums_by_lowercase():
+    assert 'Astrophysics' == enums.INSPIRE_CATEGORIES_BY_LOWERCASE['astrophysics']
+    assert 'hep-th' == enums.ARXIV_CATEGORIES_BY_LOWERCASE['hep-th']
+
+
+def test_memoized_helpers_match_inspire_schemas():
+    for value in ('hep-th', 'HEP-TH', 'funct-an', 'math.FA', 'foo'):
+        assert schemas_utils.normalize_arxiv_category(value) == enums.normalize_arxiv_category(value)
+
+    for value in ('astrophysics', 'hep-th', 'foo', '', None):
+        assert schemas_utils.classify_field(value) == enums.classify_field(value)
+
+
+def test_is_arxiv_matches_inspire_schemas():
+    values = (
+        'arXiv:1706.09516',
+        '1706.09516v2',
+        'hep-th/9711200',
+        'HEP-TH/9711200',
+        'math.FA/0101010',
+        'math-fa/0101010',
+        'foo-bar/9711200',
+        'CERN-TH-2017-001',
+        '',
+        '   ',
+    )
+    for value in values:
+        assert schemas_utils.is_arxiv(value) == enums.is_arxiv(value)
+
+
+def test_no_other_module_loads_schemas():
+    forbidden = {
+        schemas_api.load_schema,
+        schemas_utils.classify_field,
+        schemas_utils.load_schema,
+        schemas_utils.normalize_arxiv_category,
+        schemas_utils.valid_arxiv_categories,
+    }
+
+    offenders = []
+    for _, name, _ in pkgutil.walk_packages(inspire_dojson.__path__, 'inspire_dojson.'):
+        if name in (enums.__name__, validation.__name__):
+            continue
+        module = importlib.import_module(name)
+        for attr, value in vars(module).items():
+            try:
+                if value in forbidden:
+                    offenders.append('{}.{}'.format(name, attr))
+            except TypeError:
+                pass
+
+    assert [] == offenders
+
+
+def test_rules_do_not_load_schemas_per_record():
+    snippet = (
+        '<record>'
+        '  <datafield tag="020" ind1=" " ind2=" ">'
+        '    <subfield code="a">9780198506225</subfield>'
+        '    <subfield code="b">print</subfield>'
+        '  </datafield>'
+        '  <datafield tag="037" ind1=" " ind2=" ">'
+        '    <subfield code="9">arXiv</subfield>'
+        '    <subfield code="a">arXiv:1706.09516</subfield>'
+        '    <subfield code="c">hep-th</subfield>'
+        '  </datafield>'
+        '  <datafield tag="650" ind1="1" ind2="7">'
+        '    <subfield code="2">INSPIRE</subfield>'
+        '    <subfield code="a">Astrophysics</subfield>'
+        '  </datafield>'
+        '  <datafield tag="773" ind1=" " ind2=" ">'
+        '    <subfield code="m">erratum</subfield>'
+        '    <subfield code="p">Phys.Rev.</subfield>'
+        '  </datafield>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">Review</subfield>'
+        '  </datafield>'
+        '</record>'
+    )
+
+    expected = marcxml2record(snippet)
+
+    with patch.object(schemas_utils, 'load_schema') as mock_load_schema:
+        result = marcxml2record(snippet)
+
+    assert not mock_load_schema.called
+    assert expected == result
@@ -23,13 +23,32 @@
 from __future__ import absolute_import, division, print_function
 
 from inspire_dojson.utils.geo import (
+    match_country_code,
     match_country_name_to_its_code,
+    match_us_state,
+    parse_addresses,
     parse_conference_address,
     parse_institution_address,
 )
 
 
-# TODO: test match_country_code
+def test_match_country_code_accepts_iso_codes():
+    expected = 'CH'
+    result = match_country_code('ch')
+
+    assert expected == result
+
+
+def test_match_country_code_uses_alternative_codes():
+    expected = 'GB'
+    result = match_country_code('UK')
+
+    assert expected == result
+
+
+def test_match_country_code_returns_none_on_unknown_codes():
+    assert match_country_code('XX') is None
+    assert match_country_code(None) is None
 
 
 def test_match_country_name_to_its_code_fetches_from_country_to_iso_code():
@@ -157,3 +176,25 @@ def test_parse_institution_address_preserves_the_original_address():
     result = parse_institution_address(**address)
 
     assert expected == result
+
+
+def test_match_us_state_uses_alternative_spellings():
+    expected = 'NM'
+    result = match_us_state('N. Mex.')
+
+    assert expected == result
+
+
+def test_match_us_state_returns_none_on_unknown_states():
+    assert match_us_state('Bavaria') is None
+
+
+def test_parse_addresses():
+    addresses = ['Geneva, Switzerland', 'Batavia, Ill.', 'Geneva, Switzerland']
+
+    expected = [parse_conference_address(address) for address in addresses]
+    result = parse_addresses(addresses)
+
+    assert expected == result
+    assert result[0] is not result[2]
+    assert result[0]['cities'] is not result[2]['cities']
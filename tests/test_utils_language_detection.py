@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+from inspire_dojson.utils import language_detection
+from inspire_dojson.utils.language_detection import (
+    detect_language,
+    detect_languages,
+    set_backend,
+)
+
+
+@pytest.fixture
+def counting_backend():
+    calls = []
+
+    def _backend(texts):
+        calls.append(texts)
+        return ['xx' for _ in texts]
+
+    set_backend(_backend)
+    yield calls
+    set_backend(None)
+
+
+def test_detect_language():
+    expected = 'en'
+    result = detect_language('The redshift of extragalactic nebulae')
+
+    assert expected == result
+
+
+def test_detect_language_is_deterministic():
+    text = 'Teoria delle stringhe'
+
+    language_detection.clear_memo()
+    expected = detect_language(text)
+    for _ in range(5):
+        language_detection.clear_memo()
+        assert expected == detect_language(text)
+
+
+def test_detect_language_returns_none_when_undetectable():
+    assert detect_language('') is None
+    assert detect_language(None) is None
+    assert detect_language('1234') is None
+
+
+def test_detect_languages_calls_the_backend_once(counting_backend):
+    texts = ['foo bar', 'baz', 'foo  bar ', 'baz']
+
+    expected = ['xx', 'xx', 'xx', 'xx']
+    result = detect_languages(texts)
+
+    assert expected == result
+    assert [['foo bar', 'baz']] == counting_backend
+
+
+def test_detect_languages_memoizes_by_normalized_text(counting_backend):
+    detect_language('foo bar')
+    detect_language('  foo\nbar')
+
+    assert [['foo bar']] == counting_backend
+
+
+def test_detect_languages_evicts_least_recently_used(counting_backend, monkeypatch):
+    monkeypatch.setattr(language_detection, 'MEMO_SIZE', 2)
+
+    detect_languages(['foo', 'bar'])
+    detect_language('foo')
+    detect_language('baz')
+    detect_language('foo')
+    detect_language('bar')
+
+    assert [['foo', 'bar'], ['baz'], ['bar']] == counting_backend
+
+
+def test_detect_languages_returns_memoized_languages_evicted_by_the_same_call(counting_backend, monkeypatch):
+    monkeypatch.setattr(language_detection, 'MEMO_SIZE', 2)
+
+    detect_language('foo')
+
+    expected = ['xx', 'xx', 'xx', 'xx']
+    result = detect_languages(['foo', 'bar', 'baz', 'qux'])
+
+    assert expected == result
+    assert [['foo'], ['bar', 'baz', 'qux']] == counting_backend
+
+
+def test_detect_languages_from_many_threads(counting_backend, monkeypatch):
+    monkeypatch.setattr(language_detection, 'MEMO_SIZE', 5)
+    texts = [str(index % 10) + ' foo' for index in range(100)]
+
+    def _detect(index):
+        return detect_languages(texts[index:] + texts[:index])
+
+    pool = ThreadPool(8)
+    try:
+        results = pool.map(_detect, range(100))
+    finally:
+        pool.close()
+
+    assert all(result == ['xx'] * 100 for result in results)
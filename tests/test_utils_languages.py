@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from mock import patch
+
+from inspire_dojson.utils import languages
+from inspire_dojson.utils.languages import (
+    get_alpha_2_from_name,
+    get_name_from_alpha_2,
+    get_name_from_alpha_3,
+)
+
+
+def test_get_alpha_2_from_name():
+    expected = 'en'
+    result = get_alpha_2_from_name(' english ')
+
+    assert expected == result
+
+
+def test_get_alpha_2_from_name_returns_none_on_unknown_names():
+    assert get_alpha_2_from_name('english and french') is None
+
+
+def test_get_alpha_2_from_name_returns_none_on_languages_without_alpha_2():
+    assert get_alpha_2_from_name('Ari') is None
+
+
+def test_get_alpha_2_from_name_remembers_unknown_names():
+    get_alpha_2_from_name('Klingon')
+
+    with patch.object(languages, '_get_index') as mock_get_index:
+        assert get_alpha_2_from_name('Klingon') is None
+        mock_get_index.assert_not_called()
+
+
+def test_get_name_from_alpha_2():
+    expected = 'French'
+    result = get_name_from_alpha_2('fr')
+
+    assert expected == result
+
+
+def test_get_name_from_alpha_2_raises_on_unknown_codes():
+    with pytest.raises(KeyError):
+        get_name_from_alpha_2('xx')
+
+
+def test_get_name_from_alpha_3():
+    expected = 'German'
+    result = get_name_from_alpha_3('DEU')
+
+    assert expected == result
+
+
+def test_get_name_from_alpha_3_falls_back_to_bibliographic_codes():
+    expected = 'German'
+    result = get_name_from_alpha_3('ger')
+
+    assert expected == result
+
+
+def test_get_name_from_alpha_3_returns_none_on_unknown_codes():
+    assert get_name_from_alpha_3('xxx') is None
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+from __future__ import absolute_import, division, print_function
+
+from inspire_dojson.api import marcxml2record
+from inspire_dojson.validation import get_validator, validate_record, validate_records
+
+
+def test_get_validator_builds_each_validator_once():
+    assert get_validator('hep') is get_validator('hep')
+    assert get_validator('hep') is not get_validator('authors')
+
+
+def test_validate_record_accepts_valid_records(hep_marcxml):
+    record = marcxml2record(hep_marcxml(1))
+
+    assert [] == validate_record(record)
+    assert 'hep.json' == record['$schema']
+
+
+def test_validate_record_collects_errors(hep_marcxml):
+    record = marcxml2record(hep_marcxml(1))
+    record['titles'] = [{'title': 1}]
+    record['control_number'] = 'foo'
+
+    expected = [
+        {
+            'message': "'foo' is not of type 'integer'",
+            'path': ['control_number'],
+            'schema_path': ['properties', 'control_number', 'type'],
+            'validator': 'type',
+        },
+        {
+            'message': "1 is not of type 'string'",
+            'path': ['titles', 0, 'title'],
+            'schema_path': ['properties', 'titles', 'items', 'properties', 'title', 'type'],
+            'validator': 'type',
+        },
+    ]
+    result = validate_record(record)
+
+    assert expected == result
+
+
+def test_validate_record_reports_missing_and_unknown_schemas():
+    assert ['$schema'] == [error['validator'] for error in validate_record({})]
+    assert [['$schema']] == [error['path'] for error in validate_record({'$schema': 'foo.json'})]
+
+
+def test_validate_records_does_not_stop_at_invalid_records(hep_marcxml):
+    records = [marcxml2record(hep_marcxml(1)), {'$schema': 'hep.json'}, marcxml2record(hep_marcxml(3))]
+    stats = {}
+
+    result = list(validate_records(records, stats=stats))
+
+    assert [0, 1, 2] == [el.index for el in result]
+    assert [] == result[0].errors
+    assert result[1].errors
+    assert [] == result[2].errors
+    assert 3 == stats['records']
+    assert 1 == stats['invalid']
+    assert stats['errors'] == len(result[1].errors)
+    assert stats['elapsed'] > 0